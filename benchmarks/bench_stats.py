@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Run the standard statistics benchmarks and save the results.
+
+Generates the 10k, 100k and 1M commit synthetic repositories (kept under
+``benchmarks/repos`` so later runs reuse them), times every statistics
+function with cold and warm caches and writes the results to
+``benchmarks/results/stats-<version>.json``. Pass ``--baseline`` with an
+earlier results file to print how each timing changed.
+
+Usage:
+    python benchmarks/bench_stats.py [--presets 10k,100k] [--baseline FILE]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from qgits import __version__
+from qgits.qgit_bench import (
+    BENCH_PRESETS,
+    RepoSpec,
+    compare_results,
+    run_stats_benchmark,
+)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main() -> int:
+    """Run the benchmarks described by the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--presets",
+        default=",".join(BENCH_PRESETS),
+        help="Repository sizes to benchmark (comma-separated)",
+    )
+    parser.add_argument("--functions", help="Stats functions to time (comma-separated)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument(
+        "--workdir",
+        default=os.path.join(BENCH_DIR, "repos"),
+        help="Directory the synthetic repositories are kept in",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(BENCH_DIR, "results", f"stats-{__version__}.json"),
+        help="File to write JSON results to",
+    )
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    specs = {name: RepoSpec.preset(name) for name in args.presets.split(",")}
+    results = run_stats_benchmark(
+        specs,
+        functions=args.functions.split(",") if args.functions else None,
+        repeat=args.repeat,
+        workdir=args.workdir,
+        progress=lambda message: print(message, file=sys.stderr),
+    )
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["comparison"] = compare_results(json.load(f), results)
+        for row in results["comparison"]:
+            ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "n/a"
+            print(
+                f"{row['repository']:>5} {row['function']:<12} {row['cache']:<5} "
+                f"{row['baseline_seconds']:9.3f}s -> {row['current_seconds']:9.3f}s "
+                f"({ratio})"
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ from pathlib import Path
 from qgits.qgit_commands import (
     BenedictCommand,
     StatsCommand,
+    BenchCommand,
     DoctorCommand,
     LastCommand,
     ShoveCommand,
@@ -77,7 +78,8 @@ def main() -> Optional[int]:
                 "--arnold": ("store_true", "Automatically handle sensitive files"),
                 "--patterns": (str, "Custom patterns to scan for"),
                 "--update": ("store_true", "Update .gitignore automatically"),
-                "--reverse": ("store_true", "Untrack matched files")
+                "--reverse": ("store_true", "Untrack matched files"),
+                "--index": ("store_true", "Scan only files git tracks or would track")
             }),
             "stats": (StatsCommand(), "Generate repository statistics", {
                 "--author": (str, "Filter stats by author"),
@@ -85,8 +87,27 @@ def main() -> Optional[int]:
                 "--files": ("store_true", "Show file-level statistics"),
                 "--from": (str, "Start date for analysis (YYYY-MM-DD)"),
                 "--to": (str, "End date for analysis (YYYY-MM-DD)"),
-                "--format": (str, "Output format (text/json)"),
-                "--leaderboard": ("store_true", "Show interactive leaderboard of contributors")
+                "--format": (str, "Output format (text/json/msgpack)"),
+                "--leaderboard": ("store_true", "Show interactive leaderboard of contributors"),
+                "--rebuild": ("store_true", "Rebuild the stats cache from scratch"),
+                "--top-files": (int, "Files listed per contributor on the leaderboard"),
+                "--approx": ("store_true", "Estimate distinct counts in bounded memory"),
+                "--ownership": ("store_true", "Show current line ownership from git blame")
+            }),
+            "bench": (BenchCommand(), "Benchmark repository statistics", {
+                "suite": (str, "Benchmark suite to run", ["stats"]),
+                "--preset": (str, "Repository sizes to benchmark (10k/100k/1m, comma-separated)"),
+                "--commits": (int, "Commits in a custom synthetic repository"),
+                "--authors": (int, "Authors in the synthetic repository"),
+                "--files": (int, "Files in the synthetic repository"),
+                "--churn": (float, "Mean lines changed per file change"),
+                "--skew": (float, "Zipf exponent of file and author activity"),
+                "--seed": (int, "Seed of the repository generator"),
+                "--repeat": (int, "Runs per function and cache state"),
+                "--functions": (str, "Stats functions to time (comma-separated)"),
+                "--workdir": (str, "Keep generated repositories here for reuse"),
+                "--output": (str, "Write JSON results to this file"),
+                "--compare": (str, "Compare against a previous results file")
             }),
             "doctor": (DoctorCommand(), "Check repository health", {
                 "--verbose": ("store_true", "Show detailed diagnostic information"),
@@ -100,9 +121,10 @@ def main() -> Optional[int]:
                 "--safespace": ("store_true", "Create safespace for current changes")
             }),
             "shove": (ShoveCommand(), "Force push changes", {
-                "--force": ("store_true", "Force push without security checks"),
+                "--force": ("store_true", "Push even if the security check flags files"),
                 "--no-verify": ("store_true", "Skip pre-push verification"),
-                "--branch": (str, "Target branch (default: main)")
+                "--branch": (str, "Target branch (default: main)"),
+                "--full-scan": ("store_true", "Scan the whole working tree instead of only the outgoing commits")
             }),
             "author": (AuthorCommand(), "Display information about the author", {}),
             "cancel": (None, "Remove files from Git history", {
@@ -177,7 +199,10 @@ def main() -> Optional[int]:
                 "--force": ("store_true", "Skip confirmation prompts"),
                 "--exclude": (str, "Patterns to exclude from untracking")
             }),
-            "leaderboard": (LeaderboardCommand(), "Show interactive leaderboard of contributors", {}),
+            "leaderboard": (LeaderboardCommand(), "Show interactive leaderboard of contributors", {
+                "--top-files": (int, "Files listed per contributor"),
+                "--approx": ("store_true", "Estimate file counts in bounded memory")
+            }),
         }
 
         # Register all commands
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""QGit benchmark module for measuring statistics performance.
+
+Synthetic repositories are generated deterministically with ``git
+fast-import`` from a :class:`RepoSpec`, so the same spec and seed always
+produce the same history. Every statistics function is then timed against
+each repository with a cold and a warm stats cache, each run in a fresh
+process so its peak RSS can be recorded, and the results are returned as a
+JSON-serializable dictionary that can be compared across versions.
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from qgits import __version__
+from qgits.qgit_errors import GitCommandError
+from qgits.qgit_logger import logger
+from qgits.qgit_stats import (
+    StatsStore,
+    get_churn_stats,
+    get_commit_stats,
+    get_leaderboard_stats,
+    get_ownership_stats,
+    get_team_stats,
+    stats_workers,
+)
+
+# Commit counts of the standard benchmark repositories
+BENCH_PRESETS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Statistics functions timed by run_stats_benchmark, keyed by report name
+BENCH_FUNCTIONS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "commit": get_commit_stats,
+    "churn": get_churn_stats,
+    "team": get_team_stats,
+    "leaderboard": get_leaderboard_stats,
+    "ownership": get_ownership_stats,
+}
+
+# Cache states each function is timed in
+CACHE_STATES = ("cold", "warm")
+
+# Timezones handed out to synthetic authors in turn
+BENCH_TIMEZONES = ("+0000", "-0500", "+0100", "-0800", "+0530", "+0900")
+
+# Timestamp of the first synthetic commit (2015-01-01) and the span the
+# history is spread over
+BENCH_EPOCH = 1_420_070_400
+BENCH_SPAN = 10 * 365 * 86400
+
+# Written into the git directory once a repository is fully generated
+SPEC_FILE = "qgit-bench.json"
+
+
+@dataclass
+class RepoSpec:
+    """Shape of a synthetic benchmark repository.
+
+    Attributes:
+        commits: Number of commits on the generated branch
+        authors: Number of distinct authors
+        files: Number of distinct files
+        directories: Number of top-level directories files are spread over
+        files_per_commit: Mean number of files changed per commit
+        churn: Mean number of lines changed per file change
+        max_lines: Files are kept at or below this many lines
+        skew: Zipf exponent of how often each file and author appears;
+            0 spreads changes uniformly
+        seed: Seed of the random generator
+    """
+
+    commits: int = 10_000
+    authors: int = 50
+    files: int = 2_000
+    directories: int = 20
+    files_per_commit: float = 3.0
+    churn: float = 8.0
+    max_lines: int = 200
+    skew: float = 1.1
+    seed: int = 0
+
+    @classmethod
+    def preset(cls, name: str, **overrides: Any) -> "RepoSpec":
+        """Create the spec of a standard benchmark repository.
+
+        Args:
+            name: One of ``BENCH_PRESETS``
+            **overrides: Spec fields to change from the preset
+
+        Returns:
+            The repository spec
+
+        Raises:
+            ValueError: If the preset is unknown
+        """
+        if name not in BENCH_PRESETS:
+            raise ValueError(f"Unknown benchmark preset: {name}")
+        commits = BENCH_PRESETS[name]
+        return cls(
+            **{
+                "commits": commits,
+                "authors": max(10, commits // 200),
+                "files": max(500, commits // 5),
+                **overrides,
+            }
+        )
+
+
+def _zipf_weights(count: int, skew: float) -> List[float]:
+    """Cumulative Zipf weights of ranks 1..count."""
+    return list(itertools.accumulate(1.0 / rank**skew for rank in range(1, count + 1)))
+
+
+def _mean_draw(rng: random.Random, mean: float) -> int:
+    """Draw a positive integer from a geometric-like distribution."""
+    if mean <= 1:
+        return 1
+    return 1 + int(rng.expovariate(1.0 / (mean - 1)))
+
+
+def _fast_import_stream(spec: RepoSpec):
+    """Generate the ``git fast-import`` stream of a synthetic repository.
+
+    Files and authors are drawn from Zipf distributions so a few of each
+    dominate the history, as in real repositories. Each file change
+    replaces a random block of lines, so numstat reports both additions
+    and deletions.
+
+    Args:
+        spec: Shape of the repository
+
+    Yields:
+        Chunks of the fast-import stream
+    """
+    rng = random.Random(spec.seed)
+    authors = [
+        f"Author {i} <author{i}@example.com>".encode()
+        for i in range(spec.authors)
+    ]
+    author_zones = [
+        BENCH_TIMEZONES[i % len(BENCH_TIMEZONES)].encode() for i in range(spec.authors)
+    ]
+    paths = [
+        f"dir{i % spec.directories}/mod{i // spec.directories % 8}/file{i}.txt"
+        for i in range(spec.files)
+    ]
+    # Hot files are spread over all directories rather than the first few
+    rng.shuffle(paths)
+    file_weights = _zipf_weights(spec.files, spec.skew)
+    author_weights = _zipf_weights(spec.authors, spec.skew)
+
+    contents: Dict[str, List[bytes]] = {}
+    gap = max(1.0, BENCH_SPAN / spec.commits)
+    timestamp = BENCH_EPOCH
+    for number in range(1, spec.commits + 1):
+        timestamp += 1 + int(rng.expovariate(1.0 / gap))
+        author = rng.choices(range(spec.authors), cum_weights=author_weights)[0]
+        count = min(_mean_draw(rng, spec.files_per_commit), spec.files)
+        changed = dict.fromkeys(rng.choices(paths, cum_weights=file_weights, k=count))
+
+        message = f"Change {number}\n".encode()
+        signature = b"%s %d %s\n" % (authors[author], timestamp, author_zones[author])
+        chunk = [
+            b"commit refs/heads/main\n",
+            b"author " + signature,
+            b"committer " + signature,
+            b"data %d\n%s" % (len(message), message),
+        ]
+        for path in changed:
+            lines = contents.setdefault(path, [])
+            size = _mean_draw(rng, spec.churn)
+            start = rng.randint(0, len(lines))
+            removed = rng.randint(0, min(size, len(lines) - start))
+            added = size - removed
+            if len(lines) - removed + added > spec.max_lines:
+                removed, added = min(size, len(lines) - start), 0
+            lines[start : start + removed] = [
+                b"%d:%d\n" % (number, i) for i in range(added)
+            ]
+            data = b"".join(lines)
+            chunk.append(b"M 100644 inline %s\ndata %d\n" % (path.encode(), len(data)))
+            chunk.append(data)
+        chunk.append(b"\n")
+        yield b"".join(chunk)
+    yield b"done\n"
+
+
+def generate_repository(path: str, spec: RepoSpec) -> bool:
+    """Generate a synthetic repository unless an identical one exists.
+
+    Args:
+        path: Directory of the repository, created if missing
+        spec: Shape of the repository
+
+    Returns:
+        True if the repository was generated, False if it was reused
+
+    Raises:
+        GitCommandError: If git fails to build the repository
+    """
+    spec_path = os.path.join(path, ".git", SPEC_FILE)
+    if os.path.exists(spec_path):
+        with open(spec_path) as f:
+            if json.load(f) == asdict(spec):
+                return False
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+    def git(*args: str, **kwargs: Any) -> None:
+        result = subprocess.run(
+            ["git", *args], cwd=path, capture_output=True, **kwargs
+        )
+        if result.returncode != 0:
+            raise GitCommandError(
+                "git " + " ".join(args), result.stderr.decode(errors="replace")
+            )
+
+    git("init", "-q")
+    importer = subprocess.Popen(
+        ["git", "fast-import", "--quiet", "--done"],
+        cwd=path,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        for chunk in _fast_import_stream(spec):
+            importer.stdin.write(chunk)
+        importer.stdin.close()
+    except BrokenPipeError:
+        pass
+    stderr = importer.stderr.read()
+    if importer.wait() != 0:
+        raise GitCommandError("git fast-import", stderr.decode(errors="replace"))
+    git("symbolic-ref", "HEAD", "refs/heads/main")
+    git("reset", "-q", "--hard")
+
+    with open(spec_path, "w") as f:
+        json.dump(asdict(spec), f)
+    return True
+
+
+def _peak_rss(children: bool = False) -> Optional[int]:
+    """Peak resident set size in bytes of this process or its children.
+
+    Returns None where the ``resource`` module is unavailable, e.g. on Windows.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _measure(repo: str, function: str, cold: bool, conn: Any) -> None:
+    """Time one statistics function in a fresh process.
+
+    Args:
+        repo: Repository to compute statistics for
+        function: Key of ``BENCH_FUNCTIONS``
+        cold: Whether to delete the stats cache first
+        conn: Pipe end receiving the measurement
+    """
+    try:
+        os.chdir(repo)
+        if cold:
+            db_path = StatsStore._default_path()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+        baseline = _peak_rss()
+        start = time.perf_counter()
+        stats = BENCH_FUNCTIONS[function]()
+        seconds = time.perf_counter() - start
+        conn.send(
+            {
+                "seconds": seconds,
+                "baseline_rss_bytes": baseline,
+                "peak_rss_bytes": _peak_rss(),
+                "peak_child_rss_bytes": _peak_rss(children=True),
+                "error": None if stats else "empty result",
+            }
+        )
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def measure(repo: str, function: str, cold: bool) -> Dict[str, Any]:
+    """Time one statistics function in a fresh interpreter.
+
+    A fresh process keeps in-memory caches of earlier runs out of the
+    measurement, as for a separate ``qgit stats`` invocation, and gives a
+    peak RSS that belongs to this function alone.
+
+    Args:
+        repo: Repository to compute statistics for
+        function: Key of ``BENCH_FUNCTIONS``
+        cold: Whether to delete the stats cache first
+
+    Returns:
+        Dictionary with the wall time, peak RSS of the process and of its
+        largest child, and an error message if the run failed
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(repo, function, cold, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": "benchmark process exited unexpectedly"}
+    process.join()
+    return result
+
+
+def _summarize(function: str, cache: str, runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine repeated measurements of one function and cache state."""
+    errors = [run["error"] for run in runs if run.get("error")]
+    if errors:
+        return {"function": function, "cache": cache, "error": errors[0]}
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "function": function,
+        "cache": cache,
+        "runs": len(runs),
+        "seconds": seconds,
+        "min_seconds": min(seconds),
+        "median_seconds": statistics.median(seconds),
+        "baseline_rss_bytes": _max_rss(runs, "baseline_rss_bytes"),
+        "peak_rss_bytes": _max_rss(runs, "peak_rss_bytes"),
+        "peak_child_rss_bytes": _max_rss(runs, "peak_child_rss_bytes"),
+    }
+
+
+def _max_rss(runs: List[Dict[str, Any]], key: str) -> Optional[int]:
+    """Largest RSS measurement across runs, or None if none was recorded."""
+    values = [run[key] for run in runs if run[key] is not None]
+    return max(values) if values else None
+
+
+def _environment() -> Dict[str, Any]:
+    """Describe the version and machine the benchmark ran on."""
+    git_version = subprocess.run(
+        ["git", "--version"], capture_output=True, text=True
+    ).stdout.strip()
+    return {
+        "qgit_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "git": git_version,
+        "cpu_count": os.cpu_count(),
+        "stats_workers": stats_workers(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run_stats_benchmark(
+    specs: Dict[str, RepoSpec],
+    functions: Optional[List[str]] = None,
+    repeat: int = 3,
+    workdir: Optional[str] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Benchmark the statistics functions against synthetic repositories.
+
+    Every function is timed ``repeat`` times with a cold cache, deleted
+    before each run, and then ``repeat`` times with the warm cache left by
+    the previous run.
+
+    Args:
+        specs: Repository specs keyed by name, e.g. a preset name
+        functions: Keys of ``BENCH_FUNCTIONS`` to time, all when None
+        repeat: Runs per function and cache state
+        workdir: Directory to keep generated repositories in for reuse by
+            later runs; a temporary directory removed afterwards when None
+        progress: Optional callback receiving a message per step
+
+    Returns:
+        Dictionary with the benchmark environment and, per repository, its
+        spec, generation time and one result per function and cache state
+
+    Raises:
+        ValueError: If an unknown function is requested
+        GitCommandError: If a repository cannot be generated
+    """
+    functions = functions or list(BENCH_FUNCTIONS)
+    unknown = [name for name in functions if name not in BENCH_FUNCTIONS]
+    if unknown:
+        raise ValueError(f"Unknown stats functions: {', '.join(unknown)}")
+
+    notify = progress or (lambda message: None)
+    root = workdir or tempfile.mkdtemp(prefix="qgit-bench-")
+    results: Dict[str, Any] = {"environment": _environment(), "repositories": []}
+    try:
+        for name, spec in specs.items():
+            path = os.path.join(root, name)
+            notify(f"Generating {name} repository ({spec.commits} commits)")
+            start = time.perf_counter()
+            generated = generate_repository(path, spec)
+            entry: Dict[str, Any] = {
+                "name": name,
+                "spec": asdict(spec),
+                "generate_seconds": time.perf_counter() - start if generated else None,
+                "results": [],
+            }
+            for function in functions:
+                for cache in CACHE_STATES:
+                    notify(f"Timing {function} ({cache} cache) on {name}")
+                    runs = [
+                        measure(path, function, cold=cache == "cold")
+                        for _ in range(repeat)
+                    ]
+                    entry["results"].append(_summarize(function, cache, runs))
+            results["repositories"].append(entry)
+    finally:
+        if workdir is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    logger.log(
+        level="info",
+        command="bench",
+        message="Stats benchmark completed",
+        metadata={"repositories": list(specs), "functions": functions},
+    )
+    return results
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Compare two benchmark results function by function.
+
+    Args:
+        baseline: Results of an earlier :func:`run_stats_benchmark`
+        current: Results to compare against the baseline
+
+    Returns:
+        One row per repository, function and cache state present in both,
+        with both median times, their ratio and both peak RSS values
+    """
+
+    def index(results: Dict[str, Any]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        return {
+            (repo["name"], result["function"], result["cache"]): result
+            for repo in results.get("repositories", [])
+            for result in repo["results"]
+            if not result.get("error")
+        }
+
+    before = index(baseline)
+    rows = []
+    for key, after in index(current).items():
+        if key not in before:
+            continue
+        old, new = before[key]["median_seconds"], after["median_seconds"]
+        rows.append(
+            {
+                "repository": key[0],
+                "function": key[1],
+                "cache": key[2],
+                "baseline_seconds": old,
+                "current_seconds": new,
+                "ratio": new / old if old else None,
+                "baseline_peak_rss_bytes": before[key]["peak_rss_bytes"],
+                "current_peak_rss_bytes": after["peak_rss_bytes"],
+            }
+        )
+    return rows
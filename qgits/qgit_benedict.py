@@ -9,9 +9,11 @@ This module provides core functionality for:
 
 import fnmatch
 import os
+import sqlite3
 from datetime import datetime
+from itertools import cycle
 from time import sleep
-from typing import Any, Dict, Generator, List, Tuple
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple
 
 from qgits.qgit_errors import (
     FileOperationError,
@@ -21,7 +23,10 @@ from qgits.qgit_errors import (
     format_error,
 )
 from qgits.qgit_git import GitCommand
+from qgits.qgit_logger import logger
 from qgits.qgit_utils import (
+    ScanCache,
+    ScanProgress,
     detect_risky_files,
     format_category_emoji,
     format_size,
@@ -138,13 +143,22 @@ def _format_error(text: str) -> str:
 
 
 def scan_repository(
-    directory: str = ".", batch_size: int = 1000
+    directory: str = ".",
+    workers: Optional[int] = None,
+    source: str = "filesystem",
+    use_cache: bool = True,
 ) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
     """Scan repository for potentially risky files.
 
     Args:
         directory: Directory to scan
-        batch_size: Number of files to process in each batch
+        workers: Number of threads listing directories, see
+            :func:`detect_risky_files`
+        source: "filesystem" to walk the working tree, "index" to scan only
+            what git tracks or would track, or "push" to scan only the files
+            the outgoing commits add or modify
+        use_cache: Whether a "filesystem" scan may reuse the listings of
+            directories unchanged since the last scan
 
     Returns:
         Tuple of (scan results, total files scanned)
@@ -154,14 +168,35 @@ def scan_repository(
     """
     try:
         print(_format_header("Repository Security Scan"))
-        spinner = _spinner("Scanning repository for potentially risky files...")
-        for frame in spinner:
-            print(frame, end="", flush=True)
-            # Break after a short time - in real implementation this would be tied to detect_risky_files progress
-            sleep(0.5)
-            break
-
-        results, total_files = detect_risky_files(directory, batch_size)
+        frames = cycle(SPINNERS)
+
+        def report_progress(progress: ScanProgress) -> None:
+            print(
+                f"\r{COLORS['CYAN']}{next(frames)}{COLORS['ENDC']} Scanning: "
+                f"{progress.files:,} files ({progress.files_per_second:,.0f}/s), "
+                f"{progress.pending:,} directories remaining",
+                end="",
+                flush=True,
+            )
+
+        cache = None
+        if use_cache and source == "filesystem":
+            try:
+                cache = ScanCache()
+            except (sqlite3.Error, OSError) as e:
+                logger.log(
+                    level="warning",
+                    command="benedict",
+                    message="Scan cache unavailable, scanning without it",
+                    metadata={"error": str(e)},
+                )
+        try:
+            results, total_files = detect_risky_files(
+                directory, workers, progress=report_progress, source=source, cache=cache
+            )
+        finally:
+            if cache:
+                cache.close()
         print(
             "\r" + _format_success("Scan completed successfully!") + " " * 50
         )  # Clear spinner line
@@ -200,6 +235,17 @@ def _display_scan_summary(
     # Print summary
     print(_format_header("📊 Scan Summary"))
     print(f"Total files scanned: {COLORS['BOLD']}{total_files:,}{COLORS['ENDC']}")
+    skipped = sum(
+        1
+        for files in results.values()
+        for file_info in files
+        if file_info.get("directory")
+    )
+    if skipped:
+        print(
+            f"Matching directories not scanned: "
+            f"{COLORS['BOLD']}{skipped:,}{COLORS['ENDC']}"
+        )
     total_risky = sum(len(files) for files in results.values())
     print(
         f"Total risky files found: {COLORS['WARNING' if total_risky > 0 else 'GREEN']}{total_risky:,}{COLORS['ENDC']}"
@@ -240,7 +286,12 @@ def _display_category_details(files: List[Dict[str, Any]]) -> None:
         # Show top 5 largest files
         sorted_files = sorted(group_files, key=lambda x: x["size"], reverse=True)
         for file_info in sorted_files[:5]:
-            size_str = format_size(file_info["size"])
+            if file_info.get("directory"):
+                size_str = "directory, not scanned"
+            else:
+                size_str = format_size(file_info["size"])
+            if file_info.get("deleted"):
+                size_str += ", deleted but still in outgoing commits"
             print(
                 f"     • {COLORS['BLUE']}{file_info['path']}{COLORS['ENDC']} ({size_str})"
             )
@@ -367,7 +418,7 @@ def check_tracked_files(file_patterns: List[str] = None) -> Dict[str, Dict[str,
         file_patterns = DEFAULT_SENSITIVE_PATTERNS
 
     try:
-        tracked_files = GitCommand.run("git ls-files").split("\n")
+        tracked_files = GitCommand.stream(["git", "ls-files", "-z"], separator="\0")
         return _find_problematic_files(tracked_files, file_patterns)
 
     except (GitCommandError, GitStateError, GitRepositoryError) as e:
@@ -376,12 +427,12 @@ def check_tracked_files(file_patterns: List[str] = None) -> Dict[str, Dict[str,
 
 
 def _find_problematic_files(
-    tracked_files: List[str], patterns: List[str]
+    tracked_files: Iterable[str], patterns: List[str]
 ) -> Dict[str, Dict[str, Any]]:
     """Find tracked files matching problematic patterns.
 
     Args:
-        tracked_files: List of tracked file paths
+        tracked_files: Tracked file paths, consumed in a single pass
         patterns: List of problematic patterns to check
 
     Returns:
@@ -392,23 +443,26 @@ def _find_problematic_files(
     """
     problematic_files = {}
 
-    for pattern in patterns:
-        # Convert git pattern to Python glob pattern
-        if pattern.startswith("*"):
-            pattern = f".{pattern}"
+    # Convert git patterns to Python glob patterns
+    glob_patterns = [f".{p}" if p.startswith("*") else p for p in patterns]
 
-        matches = [f for f in tracked_files if fnmatch.fnmatch(f, pattern)]
+    for file in tracked_files:
+        # The last matching pattern wins, as with the per-pattern scan before
+        pattern = next(
+            (p for p in reversed(glob_patterns) if fnmatch.fnmatch(file, p)), None
+        )
+        if pattern is None:
+            continue
 
-        for file in matches:
-            try:
-                size = os.path.getsize(file)
-                problematic_files[file] = {"size": size, "pattern": pattern}
-            except OSError as e:
-                raise FileOperationError(
-                    f"Failed to get size of file: {file}",
-                    filepath=file,
-                    operation="getsize",
-                ) from e
+        try:
+            size = os.path.getsize(file)
+            problematic_files[file] = {"size": size, "pattern": pattern}
+        except OSError as e:
+            raise FileOperationError(
+                f"Failed to get size of file: {file}",
+                filepath=file,
+                operation="getsize",
+            ) from e
 
     return problematic_files
 
@@ -565,8 +619,11 @@ def expel() -> bool:
         print(_format_header("Untracking All Files"))
 
         # Get list of tracked files
-        tracked_files = GitCommand.run("git ls-files").split("\n")
-        tracked_files = [f for f in tracked_files if f]  # Remove empty strings
+        tracked_files = [
+            f
+            for f in GitCommand.stream(["git", "ls-files", "-z"], separator="\0")
+            if f
+        ]
 
         if not tracked_files:
             print("No tracked files found.")
@@ -8,7 +8,9 @@ health checks. Each command inherits from the base QGitCommand class.
 
 import argparse
 from abc import ABC, abstractmethod
+import json
 import os
+import sys
 from typing import Dict, Optional, Any
 from pathlib import Path
 
@@ -22,7 +24,20 @@ from qgits.qgit_errors import (
 )
 from qgits.qgit_logger import logger
 from qgits.qgit_author_data import get_random_facts, get_random_quote, get_random_advice
-from qgits.qgit_stats import get_commit_stats, get_churn_stats, get_team_stats, get_leaderboard_stats
+from qgits.qgit_stats import (
+    ChurnAggregator,
+    CommitAggregator,
+    LeaderboardAggregator,
+    StatsAggregator,
+    TeamAggregator,
+    LEADERBOARD_TOP_FILES,
+    collect_ownership,
+    collect_stats,
+    get_leaderboard_stats,
+    iter_stats,
+    resolve_date_range,
+)
+from qgits.qgit_stats_format import STREAM_FORMATS, write_stats
 
 def fallback_display():
     """Display author information in plain text mode if GUI fails."""
@@ -178,7 +193,9 @@ class BenedictCommand(QGitCommand):
             self.verify_repository()
 
             # Delegate scanning to qgit_benedict
-            results, total_files = scan_repository()
+            results, total_files = scan_repository(
+                source="index" if getattr(args, "index", False) else "filesystem"
+            )
 
             # Handle .gitignore updates based on user choice
             should_update = (
@@ -237,7 +254,12 @@ class LeaderboardCommand(QGitCommand):
             
             # Get leaderboard statistics with error handling
             try:
-                stats = get_leaderboard_stats()
+                stats = get_leaderboard_stats(
+                    rebuild=getattr(args, "rebuild", False),
+                    top_files=getattr(args, "top_files", None)
+                    or LEADERBOARD_TOP_FILES,
+                    approximate=True if getattr(args, "approx", False) else None,
+                )
             except Exception as e:
                 self.handle_error(e)
                 stats = {"authors": []}  # Create empty stats on error
@@ -283,18 +305,56 @@ class StatsCommand(QGitCommand):
             True if stats generated successfully, False otherwise
         """
         try:
+            output_format = getattr(args, "format", None) or "text"
+            if output_format != "text" and output_format not in STREAM_FORMATS:
+                self.add_error(f"Unknown stats format: {output_format}")
+                return False
+
+            if getattr(args, "ownership", False):
+                return self._ownership(args, output_format)
+
             # Handle leaderboard mode
             if hasattr(args, 'leaderboard') and args.leaderboard:
+                if output_format != "text":
+                    return self._stream_stats(
+                        {
+                            "leaderboard": LeaderboardAggregator(
+                                getattr(args, "top_files", None)
+                                or LEADERBOARD_TOP_FILES,
+                                True if getattr(args, "approx", False) else None,
+                            )
+                        },
+                        args,
+                        output_format,
+                    )
                 return LeaderboardCommand().execute(args)
                 
-            # Collect repository statistics using the new stats module
-            commit_stats = get_commit_stats(
-                author=args.author,
-                start_date=args.from_date if hasattr(args, 'from_date') else None,
-                end_date=args.to_date if hasattr(args, 'to_date') else None
+            # Collect all requested reports from a single history walk;
+            # --from/--to/--author are answered from the stored rollups
+            since, until = resolve_date_range(
+                getattr(args, "from", None), getattr(args, "to", None)
             )
-            churn_stats = get_churn_stats()
-            team_stats = get_team_stats() if args.team else None
+            approximate = getattr(args, "approx", False)
+            aggregators = {
+                "commit": CommitAggregator(
+                    author=args.author,
+                    since=since,
+                    until=until,
+                    approximate=approximate,
+                ),
+                "churn": ChurnAggregator(),
+            }
+            if args.team:
+                aggregators["team"] = TeamAggregator(approximate=approximate)
+            if output_format != "text":
+                return self._stream_stats(aggregators, args, output_format)
+            stats = collect_stats(
+                aggregators, rebuild=getattr(args, "rebuild", False)
+            )
+
+            commit_stats = stats["commit"]
+            churn_stats = stats["churn"]
+            team_stats = stats.get("team")
 
             # Display collected statistics
             self._display_stats(commit_stats, churn_stats, team_stats)
@@ -304,6 +364,73 @@ class StatsCommand(QGitCommand):
             self.add_error(f"Error generating stats: {str(e)}")
             return False
 
+    def _ownership(self, args: argparse.Namespace, output_format: str) -> bool:
+        """Compute and show current line ownership.
+
+        Args:
+            args: Command arguments including the rebuild flag
+            output_format: "text", "json" or "msgpack"
+
+        Returns:
+            True if ownership was computed, False otherwise
+        """
+
+        def report_progress(done: int, total: int) -> None:
+            if total and sys.stderr.isatty():
+                end = "\n" if done == total else ""
+                print(f"\rBlaming files: {done}/{total}", end=end, file=sys.stderr)
+
+        stats = collect_ownership(
+            rebuild=getattr(args, "rebuild", False), progress=report_progress
+        )
+        if output_format != "text":
+            stream = sys.stdout if output_format == "json" else sys.stdout.buffer
+            write_stats([("ownership", stats)], output_format, stream)
+            return True
+
+        print("\n🧬 Code Ownership")
+        print("=" * 50)
+        print(f"Surviving Lines: {stats['total_lines']}")
+        print(f"Files: {stats['total_files']}")
+        print("\nOwners:")
+        for name, author in list(stats["authors"].items())[:10]:
+            print(
+                f"• {name}: {author['lines']} lines ({author['share']:.1f}%) "
+                f"in {author['files']} files"
+            )
+        print("\nDirectories:")
+        directories = sorted(
+            stats["directories"].items(), key=lambda item: -item[1]["lines"]
+        )
+        for name, directory in directories[:10]:
+            print(
+                f"• {name}: {directory['lines']} lines, "
+                f"mostly {directory['owner']}"
+            )
+        print("\n" + "=" * 50)
+        return True
+
+    def _stream_stats(
+        self,
+        aggregators: Dict[str, StatsAggregator],
+        args: argparse.Namespace,
+        output_format: str,
+    ) -> bool:
+        """Write reports as streamed records as soon as each completes.
+
+        Args:
+            aggregators: Aggregators keyed by report name
+            args: Command arguments including the rebuild flag
+            output_format: "json" for NDJSON or "msgpack" for MessagePack
+
+        Returns:
+            True once every report has been written
+        """
+        reports = iter_stats(aggregators, rebuild=getattr(args, "rebuild", False))
+        stream = sys.stdout if output_format == "json" else sys.stdout.buffer
+        write_stats(reports, output_format, stream)
+        return True
+
     def _display_stats(self, commit_stats: Dict[str, Any], 
                       churn_stats: Dict[str, Any], 
                       team_stats: Optional[Dict[str, Any]] = None) -> None:
@@ -322,6 +449,21 @@ class StatsCommand(QGitCommand):
         print(f"Daily Average: {commit_stats.get('daily_average', 0):.2f} commits")
         print(f"Weekly Average: {commit_stats.get('weekly_average', 0):.2f} commits")
         print(f"Monthly Average: {commit_stats.get('monthly_average', 0):.2f} commits")
+        if 'unique_files' in commit_stats:
+            print(f"Unique Files Touched: ~{commit_stats['unique_files']}")
+
+        if commit_stats.get('directories'):
+            print("\nMost Active Directories:")
+            directories = sorted(
+                commit_stats['directories'].items(),
+                key=lambda item: item[1]['additions'] + item[1]['deletions'],
+                reverse=True,
+            )
+            for name, stats in directories[:10]:
+                print(
+                    f"• {name}: {stats['commits']} commits, "
+                    f"+{stats['additions']} -{stats['deletions']}"
+                )
 
         # Display churn statistics
         print("\n📈 Code Churn")
@@ -347,6 +489,7 @@ class StatsCommand(QGitCommand):
                     print(f"\n{author}:")
                     print(f"  • Commits: {stats['commits']}")
                     print(f"  • Active Days: {stats['active_days']}")
+                    print(f"  • Files Touched: {stats['files_touched']}")
                     print(f"  • First Commit: {stats['first_commit']}")
                     print(f"  • Last Commit: {stats['last_commit']}")
                     print(f"  • Activity Span: {stats['commit_span_days']} days")
@@ -354,6 +497,104 @@ class StatsCommand(QGitCommand):
         print("\n" + "=" * 50)
 
 
+class BenchCommand(QGitCommand):
+    """Benchmark repository statistics against synthetic repositories.
+
+    Generates deterministic repositories of a chosen size and times every
+    statistics function with cold and warm caches, producing JSON results
+    that can be compared between QGit versions.
+    """
+
+    def execute(self, args: argparse.Namespace) -> bool:
+        """Execute the benchmark command.
+
+        Args:
+            args: Command arguments including the suite, repository presets
+                or shape, functions to time and output paths
+
+        Returns:
+            True if the benchmark completed, False otherwise
+        """
+        from .qgit_bench import RepoSpec, compare_results, run_stats_benchmark
+
+        suite = getattr(args, "suite", None) or "stats"
+        if suite != "stats":
+            self.add_error(f"Unknown benchmark suite: {suite}")
+            return False
+
+        overrides = {}
+        for name in ("commits", "authors", "files", "churn", "skew", "seed"):
+            value = getattr(args, name, None)
+            if value is not None:
+                overrides[name] = value
+        presets = (getattr(args, "preset", None) or "10k").split(",")
+        try:
+            if "commits" in overrides and not getattr(args, "preset", None):
+                specs = {f"{overrides['commits']}-commits": RepoSpec(**overrides)}
+            else:
+                specs = {
+                    name: RepoSpec.preset(name, **overrides) for name in presets
+                }
+            functions = getattr(args, "functions", None)
+
+            results = run_stats_benchmark(
+                specs,
+                functions=functions.split(",") if functions else None,
+                repeat=getattr(args, "repeat", None) or 3,
+                workdir=getattr(args, "workdir", None),
+                progress=lambda message: print(message, file=sys.stderr),
+            )
+            baseline_path = getattr(args, "compare", None)
+            if baseline_path:
+                with open(baseline_path) as f:
+                    results["comparison"] = compare_results(json.load(f), results)
+        except (ValueError, OSError, GitCommandError) as e:
+            self.add_error(f"Error running benchmark: {str(e)}")
+            return False
+
+        output = getattr(args, "output", None)
+        if not output:
+            json.dump(results, sys.stdout, indent=2)
+            print()
+            return True
+
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        self._display_results(results)
+        print(f"\nResults written to {output}")
+        return True
+
+    def _display_results(self, results: Dict[str, Any]) -> None:
+        """Display benchmark results and any comparison as tables.
+
+        Args:
+            results: Results of run_stats_benchmark, with a "comparison"
+                entry when compared against a baseline
+        """
+        for repo in results["repositories"]:
+            print(f"\n⏱  {repo['name']} ({repo['spec']['commits']} commits)")
+            print("=" * 50)
+            for result in repo["results"]:
+                label = f"{result['function']} ({result['cache']})"
+                if result.get("error"):
+                    print(f"• {label}: failed: {result['error']}")
+                    continue
+                peak = result["peak_rss_bytes"]
+                memory = f", peak RSS {peak / 2**20:.0f} MiB" if peak else ""
+                print(f"• {label}: {result['median_seconds']:.3f}s{memory}")
+
+        if results.get("comparison"):
+            print("\n📊 Compared to Baseline")
+            print("=" * 50)
+            for row in results["comparison"]:
+                ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "n/a"
+                print(
+                    f"• {row['repository']} {row['function']} ({row['cache']}): "
+                    f"{row['baseline_seconds']:.3f}s -> "
+                    f"{row['current_seconds']:.3f}s ({ratio})"
+                )
+
+
 class DoctorCommand(QGitCommand):
     """Perform a comprehensive health check of the Git repository.
 
@@ -524,7 +765,10 @@ class ShoveCommand(QGitCommand):
             self.verify_repository()
             
             # Execute shove workflow
-            return execute_shove()
+            return execute_shove(
+                source="filesystem" if getattr(args, "full_scan", False) else "push",
+                force=getattr(args, "force", False),
+            )
             
         except Exception as e:
             self.handle_error(e)
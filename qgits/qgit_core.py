@@ -24,11 +24,13 @@ from qgits.qgit_git import GitCommand
 from qgits.qgit_logger import logger
 
 
-def run_command(command: str) -> str:
+def run_command(command: str, cache: bool = False) -> str:
     """Execute a shell command and return its output.
 
     Args:
         command: The shell command to execute
+        cache: Whether to reuse the output of an identical read-only command
+            while the repository state is unchanged
 
     Returns:
         The command output as string
@@ -38,7 +40,7 @@ def run_command(command: str) -> str:
         GitNetworkError: If the command fails due to network issues
         GitStateError: If the repository is in an invalid state
     """
-    return GitCommand.run(command)
+    return GitCommand.run(command, cache=cache)
 
 
 def handle_core_command(command: str, args: Any) -> bool:
@@ -128,8 +130,7 @@ def handle_core_command(command: str, args: Any) -> bool:
             
         elif command == "all":
             # Check for any changes first
-            status = GitCommand.run("git status --porcelain")
-            if not status.strip():
+            if GitCommand.get_repo_status().is_clean:
                 print("No changes to commit.")
                 return True
                 
@@ -45,7 +45,8 @@ QGIT_COMMANDS: Dict[str, Dict[str, Any]] = {
         "description": "Scan codebase for potentially risky files and update .gitignore",
         "usage": "qgit benedict [--arnold]",
         "options": {
-            "--arnold": "Automatically update .gitignore and reverse tracked files"
+            "--arnold": "Automatically update .gitignore and reverse tracked files",
+            "--index": "Scan only files git tracks or would track, skipping ignored trees",
         },
     },
     "expel": {
@@ -95,6 +96,24 @@ QGIT_COMMANDS: Dict[str, Dict[str, Any]] = {
             "--period": "Time period for analysis (day/week/month/year/all)"
         },
     },
+    "bench": {
+        "description": "Benchmark repository statistics on deterministic synthetic repositories",
+        "usage": "qgit bench stats [options]",
+        "options": {
+            "--preset": "Repository sizes to benchmark (10k/100k/1m, comma-separated)",
+            "--commits": "Benchmark a custom repository with this many commits",
+            "--authors": "Authors in the synthetic repository",
+            "--files": "Files in the synthetic repository",
+            "--churn": "Mean lines changed per file change",
+            "--skew": "Zipf exponent of file and author activity",
+            "--seed": "Seed of the repository generator",
+            "--repeat": "Runs per function and cache state",
+            "--functions": "Stats functions to time (commit/churn/team/leaderboard/ownership)",
+            "--workdir": "Keep generated repositories here for reuse",
+            "--output": "Write JSON results to this file",
+            "--compare": "Compare against a previous results file",
+        },
+    },
     "doctor": {
         "description": "Perform a comprehensive health check of the Git repository",
         "usage": "qgit doctor",
@@ -134,8 +153,11 @@ QGIT_COMMANDS: Dict[str, Dict[str, Any]] = {
     },
     "shove": {
         "description": "Safely push to origin main after security checks",
-        "usage": "qgit shove",
-        "options": {},
+        "usage": "qgit shove [--full-scan] [--force]",
+        "options": {
+            "--full-scan": "Scan the whole working tree instead of only the outgoing commits",
+            "--force": "Push even if the security check flags files, including possible secrets",
+        },
     },
     "leaderboard": {
         "description": "Interactive leaderboard showing contributor statistics and achievements",
@@ -5,13 +5,15 @@ This module provides advanced diagnostic capabilities for Git repositories,
 including configuration checks, performance analysis, and automated fixes.
 """
 
+import asyncio
 import os
 import sys
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
-from qgits.qgit_errors import GitCommandError
+from qgits.qgit_errors import GitCommandError, GitOperationError, GitRepositoryError
 from qgits.qgit_git import GitCommand
+from qgits.qgit_objects import ObjectStore
 from qgits.qgit_utils import format_size
 
 
@@ -62,9 +64,21 @@ class RepositoryDoctor:
             True if all config checks pass, False otherwise
         """
         try:
+            # Check core settings
+            core_settings = {
+                "core.autocrlf": ("input" if sys.platform != "win32" else "true"),
+                "core.fileMode": "true",
+                "core.ignorecase": "false",
+                "pull.rebase": "true",
+            }
+
+            # Read all config keys concurrently; unset keys come back empty
+            keys = ["user.name", "user.email", *core_settings]
+            values = dict(zip(keys, asyncio.run(self._read_config(keys))))
+
             # Check user configuration
-            user_name = GitCommand.run("git config --get user.name")
-            user_email = GitCommand.run("git config --get user.email")
+            user_name = values["user.name"]
+            user_email = values["user.email"]
 
             if not user_name:
                 self.add_issue(
@@ -82,16 +96,8 @@ class RepositoryDoctor:
                     "git config --global user.email 'your.email@example.com'",
                 )
 
-            # Check core settings
-            core_settings = {
-                "core.autocrlf": ("input" if sys.platform != "win32" else "true"),
-                "core.fileMode": "true",
-                "core.ignorecase": "false",
-                "pull.rebase": "true",
-            }
-
             for setting, expected in core_settings.items():
-                value = GitCommand.run(f"git config --get {setting}")
+                value = values[setting]
                 if value != expected:
                     self.add_issue(
                         "config",
@@ -130,6 +136,49 @@ class RepositoryDoctor:
             self.add_issue("config", "critical", f"Error checking git config: {str(e)}")
             return False
 
+    @staticmethod
+    async def _read_config(keys: List[str]) -> List[str]:
+        """Read several Git config values concurrently.
+
+        Args:
+            keys: Configuration keys to read
+
+        Returns:
+            The value of each key, or an empty string if it is not set
+        """
+        return await asyncio.gather(
+            *[
+                GitCommand.arun(["git", "config", "--get", key], check=False)
+                for key in keys
+            ]
+        )
+
+    @staticmethod
+    async def _probe_remotes(names: List[str]) -> List[Optional[Exception]]:
+        """Test connectivity to several remotes concurrently.
+
+        Args:
+            names: Remote names to test
+
+        Returns:
+            None for each reachable remote, otherwise the error raised
+        """
+
+        async def probe(name: str) -> None:
+            await GitCommand.arun(
+                ["git", "ls-remote", "--exit-code", name], timeout=30
+            )
+
+        results = await asyncio.gather(
+            *[probe(name) for name in names], return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(
+                result, GitOperationError
+            ):
+                raise result
+        return results
+
     def check_remote_connection(self) -> bool:
         """Check remote repository connectivity and configuration.
 
@@ -148,17 +197,19 @@ class RepositoryDoctor:
                 )
                 return True
 
-            # Check each remote
+            # Each remote is listed once for fetch and once for push
+            remote_urls = {}
             for remote in remotes:
-                if not remote:
-                    continue
+                if remote:
+                    name, url, *_ = remote.split()
+                    remote_urls.setdefault(name, url)
 
-                name, url, *_ = remote.split()
+            # Test all connections concurrently
+            probes = asyncio.run(self._probe_remotes(list(remote_urls)))
 
-                # Test connection
-                try:
-                    GitCommand.run(f"git ls-remote --exit-code {name}")
-                except GitCommandError:
+            # Check each remote
+            for (name, url), error in zip(remote_urls.items(), probes):
+                if error is not None:
                     self.add_issue(
                         "remote",
                         "critical",
@@ -200,33 +251,27 @@ class RepositoryDoctor:
             True if no problematic large files found, False otherwise
         """
         try:
-            # Get all objects in the repository
-            objects = GitCommand.run("git rev-list --objects --all").split("\n")
-
-            # Get sizes of all objects
-            sizes = GitCommand.run(
-                "git cat-file --batch-check='%(objectname) %(objecttype) %(objectsize) %(rest)'"
-                " --batch-all-objects"
-            ).split("\n")
-
+            # Read blob sizes straight from pack and loose object headers
+            threshold = size_threshold_mb * 1024 * 1024
+            large_blobs = {}
+            with ObjectStore.open() as store:
+                for info in store.iter_objects("blob"):
+                    if info.size > threshold:
+                        large_blobs[info.oid] = info.size / (1024 * 1024)
+
+            # Resolve paths for the large blobs in a single history walk
             large_files = []
-            for size_line in sizes:
-                if not size_line:
-                    continue
-
-                parts = size_line.split()
-                if len(parts) >= 3 and parts[1] == "blob":
-                    size_mb = int(parts[2]) / (1024 * 1024)
-                    if size_mb > size_threshold_mb:
-                        filename = next(
-                            (
-                                line.split()[1]
-                                for line in objects
-                                if line.startswith(parts[0])
-                            ),
-                            "unknown",
-                        )
-                        large_files.append((filename, size_mb))
+            if large_blobs:
+                paths = {}
+                rev_list = ["git", "rev-list", "--objects", "--all"]
+                for line in GitCommand.stream(rev_list):
+                    oid, _, path = line.partition(" ")
+                    if oid in large_blobs and oid not in paths:
+                        paths[oid] = path
+                large_files = [
+                    (paths.get(oid, "unknown"), size_mb)
+                    for oid, size_mb in large_blobs.items()
+                ]
 
             if large_files:
                 for filename, size in large_files:
@@ -240,7 +285,7 @@ class RepositoryDoctor:
 
             return True
 
-        except GitCommandError as e:
+        except (GitCommandError, GitRepositoryError) as e:
             self.add_issue(
                 "storage", "warning", f"Error checking large files: {str(e)}"
             )
@@ -399,14 +444,8 @@ class RepositoryDoctor:
                     )
 
             # Check for tracked files that should be ignored
-            status = GitCommand.run("git status --porcelain")
-            for line in status.split("\n"):
-                if not line:
-                    continue
-
-                status_code = line[:2]
-                filename = line[3:]
-
+            status = GitCommand.get_repo_status()
+            for filename in status.codes:
                 # Check if file matches any common pattern
                 for patterns in common_patterns.values():
                     for pattern in patterns:
@@ -450,7 +489,6 @@ class RepositoryDoctor:
                 lfs_installed = False
 
             # Check for potential LFS candidates
-            large_files = []
             binary_extensions = {
                 ".zip",
                 ".pdf",
@@ -463,21 +501,36 @@ class RepositoryDoctor:
                 ".bin",
             }
 
-            status = GitCommand.run("git status --porcelain")
-            for line in status.split("\n"):
-                if not line:
-                    continue
-
-                filename = line[3:]
+            # Committed binaries are sized from the object store, pending
+            # changes from the working tree
+            lfs_threshold = 5 * 1024 * 1024  # 5MB
+            sizes = {}
+            with ObjectStore.open() as store:
+                for entry in GitCommand.stream(
+                    ["git", "ls-files", "-s", "-z"], separator="\0"
+                ):
+                    meta, _, filename = entry.partition("\t")
+                    ext = os.path.splitext(filename)[1].lower()
+                    if ext in binary_extensions:
+                        info = store.info(meta.split()[1])
+                        if info is not None:
+                            sizes[filename] = info.size
+
+            status = GitCommand.get_repo_status()
+            for filename in status.codes:
                 ext = os.path.splitext(filename)[1].lower()
 
                 if ext in binary_extensions:
                     try:
-                        size = os.path.getsize(filename)
-                        if size > 5 * 1024 * 1024:  # 5MB
-                            large_files.append((filename, size))
+                        sizes[filename] = os.path.getsize(filename)
                     except OSError:
-                        continue
+                        sizes.pop(filename, None)
+
+            large_files = [
+                (filename, size)
+                for filename, size in sizes.items()
+                if size > lfs_threshold
+            ]
 
             if large_files and not lfs_installed:
                 self.add_issue(
@@ -539,13 +592,12 @@ class RepositoryDoctor:
 
             # Check for large commits
             large_commits = []
-            log = GitCommand.run(
-                "git log --pretty=format:'%h %ad %s' --date=short --numstat"
-            )
             current_commit = None
             current_changes = 0
 
-            for line in log.split("\n"):
+            for line in GitCommand.stream(
+                ["git", "log", "--pretty=format:%h %ad %s", "--date=short", "--numstat"]
+            ):
                 if not line:
                     continue
                 if not line[0].isdigit():
@@ -554,7 +606,7 @@ class RepositoryDoctor:
                     current_commit = line
                     current_changes = 0
                 else:
-                    added, deleted, _ = line.split("\t")
+                    added, deleted, _ = line.split("\t", 2)
                     if added.isdigit() and deleted.isdigit():
                         current_changes += int(added) + int(deleted)
 
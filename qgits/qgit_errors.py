@@ -43,6 +43,12 @@ class GitCommandError(GitOperationError):
         )
 
 
+class GitTimeoutError(GitCommandError):
+    """Error raised when a Git command exceeds its time limit."""
+
+    pass
+
+
 class GitConfigError(GitOperationError):
     """Error raised when there are Git configuration issues."""
 
@@ -6,10 +6,29 @@ handling common Git operations. All other modules should use this interface
 rather than implementing their own Git command execution.
 """
 
+import asyncio
+import atexit
+import hashlib
+import os
+import shlex
 import subprocess
+import tempfile
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 from qgits.qgit_errors import (
     GitCommandError,
@@ -17,10 +36,223 @@ from qgits.qgit_errors import (
     GitNetworkError,
     GitRepositoryError,
     GitStateError,
+    GitTimeoutError,
 )
 from .qgit_logger import logger
 
 
+@dataclass
+class GitObjectInfo:
+    """Type and size of a Git object as reported by ``git cat-file``."""
+
+    oid: str
+    type: str
+    size: int
+
+
+@dataclass
+class GitObject(GitObjectInfo):
+    """A Git object together with its raw content."""
+
+    data: bytes
+
+
+@dataclass
+class RepoStatus:
+    """Snapshot of the working tree state from a single ``git status`` call.
+
+    Paths are relative to the repository root. ``codes`` maps every changed
+    path to its two-letter ``XY`` status code (``??`` for untracked files).
+    """
+
+    branch: Optional[str] = None
+    oid: Optional[str] = None
+    upstream: Optional[str] = None
+    ahead: int = 0
+    behind: int = 0
+    staged: List[str] = field(default_factory=list)
+    unstaged: List[str] = field(default_factory=list)
+    untracked: List[str] = field(default_factory=list)
+    conflicted: List[str] = field(default_factory=list)
+    codes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_clean(self) -> bool:
+        """Whether there are no staged, unstaged, untracked or conflicted paths."""
+        return not self.codes
+
+    @classmethod
+    def parse(cls, output: str) -> "RepoStatus":
+        """Parse ``git status --porcelain=v2 -z --branch`` output.
+
+        Args:
+            output: Raw NUL-delimited status output
+
+        Returns:
+            The parsed repository status
+        """
+        status = cls()
+        records = iter(output.split("\0"))
+        for record in records:
+            if not record:
+                continue
+            kind = record[0]
+            if kind == "#":
+                key, _, value = record[2:].partition(" ")
+                if key == "branch.oid":
+                    status.oid = None if value == "(initial)" else value
+                elif key == "branch.head":
+                    status.branch = "HEAD" if value == "(detached)" else value
+                elif key == "branch.upstream":
+                    status.upstream = value
+                elif key == "branch.ab":
+                    ahead, behind = value.split()
+                    status.ahead, status.behind = int(ahead), abs(int(behind))
+            elif kind == "1":
+                fields = record.split(" ", 8)
+                status._add_change(fields[1], fields[8])
+            elif kind == "2":
+                fields = record.split(" ", 9)
+                next(records, None)  # Original path of the rename or copy
+                status._add_change(fields[1], fields[9])
+            elif kind == "u":
+                fields = record.split(" ", 10)
+                status.conflicted.append(fields[10])
+                status.codes[fields[10]] = fields[1]
+            elif kind == "?":
+                status.untracked.append(record[2:])
+                status.codes[record[2:]] = "??"
+        return status
+
+    def _add_change(self, xy: str, path: str) -> None:
+        """Record an ordinary or renamed entry with status code ``xy``."""
+        if xy[0] != ".":
+            self.staged.append(path)
+        if xy[1] != ".":
+            self.unstaged.append(path)
+        self.codes[path] = xy
+
+    def to_porcelain(self) -> str:
+        """Render the changed paths in ``git status --porcelain`` v1 style."""
+        return "\n".join(
+            f"{xy.replace('.', ' ')} {path}" for path, xy in self.codes.items()
+        )
+
+
+class _CatFileSession:
+    """Long-lived ``git cat-file`` co-process answering object requests.
+
+    The process is started lazily on the first request and restarted
+    transparently if it has exited. Requests are serialized with a lock so
+    the session can be shared between threads.
+    """
+
+    # Keep each request chunk well below the pipe buffer size so that writing
+    # a chunk can never block on git waiting for us to drain its output.
+    CHUNK_SIZE = 256
+
+    def __init__(self, mode: str, cwd: str):
+        """Initialize the session.
+
+        Args:
+            mode: Either ``--batch`` or ``--batch-check``
+            cwd: Working directory the co-process is bound to
+        """
+        self.mode = mode
+        self.cwd = cwd
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    @property
+    def command(self) -> str:
+        """The command line of the co-process, used for error reporting."""
+        return f"git cat-file {self.mode}"
+
+    def _ensure_running(self) -> subprocess.Popen:
+        """Start the co-process if it is not running."""
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", self.mode],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.cwd,
+            )
+        return self._process
+
+    def _read_response(self, process: subprocess.Popen, request: str) -> Any:
+        """Read a single response for ``request`` from the co-process."""
+        header = process.stdout.readline()
+        if not header:
+            raise BrokenPipeError(f"{self.command} exited unexpectedly")
+        fields = header.decode("utf-8", errors="replace").rstrip("\n").split(" ")
+        if len(fields) < 3 or fields[-1] in ("missing", "ambiguous"):
+            return None
+        oid, obj_type, size = fields[0], fields[1], int(fields[2])
+        if self.mode == "--batch-check":
+            return GitObjectInfo(oid=oid, type=obj_type, size=size)
+        data = process.stdout.read(size)
+        process.stdout.read(1)  # Trailing newline after the content
+        return GitObject(oid=oid, type=obj_type, size=size, data=data)
+
+    def _request_chunk(self, requests: List[str]) -> List[Any]:
+        """Send a chunk of requests and collect their responses in order."""
+        process = self._ensure_running()
+        payload = "".join(f"{request}\n" for request in requests)
+        process.stdin.write(payload.encode("utf-8"))
+        process.stdin.flush()
+        return [self._read_response(process, request) for request in requests]
+
+    def request(self, requests: List[str]) -> List[Any]:
+        """Resolve a list of object names.
+
+        Args:
+            requests: Object names (oids or revision expressions) to look up
+
+        Returns:
+            One response per request, None for objects that do not exist
+
+        Raises:
+            GitCommandError: If the co-process cannot be (re)started
+        """
+        results: List[Any] = []
+        with self._lock:
+            for i in range(0, len(requests), self.CHUNK_SIZE):
+                chunk = requests[i : i + self.CHUNK_SIZE]
+                try:
+                    results.extend(self._request_chunk(chunk))
+                except (BrokenPipeError, OSError, ValueError):
+                    # The co-process died mid-request; restart it once and retry
+                    self._terminate()
+                    try:
+                        results.extend(self._request_chunk(chunk))
+                    except (BrokenPipeError, OSError, ValueError) as e:
+                        self._terminate()
+                        raise GitCommandError(self.command, str(e))
+        return results
+
+    def _terminate(self) -> None:
+        """Stop the co-process, killing it if it does not exit promptly."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            if process.stdin:
+                process.stdin.close()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        finally:
+            if process.stdout:
+                process.stdout.close()
+
+    def close(self) -> None:
+        """Shut the co-process down cleanly."""
+        with self._lock:
+            self._terminate()
+
+
 class GitCommand:
     """Centralized interface for Git operations.
 
@@ -29,13 +261,82 @@ class GitCommand:
     interface rather than implementing their own Git command execution.
     """
 
+    # Persistent ``git cat-file`` sessions keyed by (mode, working directory)
+    _object_sessions: Dict[Tuple[str, str], _CatFileSession] = {}
+    _object_sessions_lock = threading.Lock()
+
+    # Upper bound on concurrently running async Git processes
+    MAX_CONCURRENCY = max(
+        1,
+        (
+            len(os.sched_getaffinity(0))
+            if hasattr(os, "sched_getaffinity")
+            else os.cpu_count() or 1
+        ),
+    )
+    _async_semaphore: Optional[Tuple[Any, asyncio.Semaphore]] = None
+
+    # Cached RepoStatus snapshots keyed by working directory
+    _status_cache: Dict[str, RepoStatus] = {}
+
+    # Subcommands that never modify the repository or working tree
+    READ_ONLY_SUBCOMMANDS = frozenset(
+        {
+            "blame",
+            "cat-file",
+            "describe",
+            "diff",
+            "diff-tree",
+            "for-each-ref",
+            "grep",
+            "log",
+            "ls-files",
+            "ls-remote",
+            "ls-tree",
+            "merge-base",
+            "rev-list",
+            "rev-parse",
+            "show",
+            "show-ref",
+            "status",
+            "version",
+        }
+    )
+
+    # Read-only commands whose output run() may memoize when asked to
+    CACHEABLE_COMMANDS = (
+        ("git", "cat-file"),
+        ("git", "config", "--get"),
+        ("git", "describe"),
+        ("git", "for-each-ref"),
+        ("git", "log"),
+        ("git", "ls-tree"),
+        ("git", "merge-base"),
+        ("git", "rev-list"),
+        ("git", "rev-parse"),
+        ("git", "show"),
+        ("git", "show-ref"),
+    )
+    RESULT_CACHE_SIZE = 256
+
+    # Memoized outputs keyed by (cwd, argv), stored with a repo fingerprint
+    _result_cache: "OrderedDict[Tuple[str, Tuple[str, ...]], Tuple[Any, str]]" = (
+        OrderedDict()
+    )
+    _result_cache_lock = threading.Lock()
+    _cache_hits = 0
+    _cache_misses = 0
+    _git_dirs: Dict[str, Optional[Tuple[str, str]]] = {}
+
     @staticmethod
-    def run(command: str, check: bool = True) -> str:
+    def run(command: str, check: bool = True, cache: bool = False) -> str:
         """Execute a Git command and return its output.
 
         Args:
             command: The Git command to execute
             check: Whether to raise an exception on non-zero exit codes
+            cache: Whether to memoize the output of an allowlisted read-only
+                command until the repository state changes
 
         Returns:
             The command output as string
@@ -46,72 +347,719 @@ class GitCommand:
             GitStateError: If the repository is in an invalid state
         """
         start_time = time.time()
+        cache_key = GitCommand._cache_key(command) if cache else None
+        if cache_key is not None:
+            fingerprint = GitCommand._repo_fingerprint()
+            cached = GitCommand._cache_lookup(cache_key, fingerprint)
+            if cached is not None:
+                logger.log(
+                    level="debug",
+                    command=command,
+                    message="Git command served from cache",
+                    metadata={"cache": "hit"},
+                    status="success",
+                    duration=time.time() - start_time,
+                )
+                return cached
+        elif GitCommand.is_mutating(command):
+            GitCommand.invalidate_caches()
         try:
             result = subprocess.run(
                 command, shell=True, check=check, capture_output=True, text=True
             )
             duration = time.time() - start_time
 
+            output = result.stdout.strip()
+
             # Log successful command
             logger.log(
                 level="info",
                 command=command,
                 message="Git command executed successfully",
-                metadata={
-                    "output": result.stdout.strip(),
-                    "error": result.stderr.strip() if result.stderr else None,
-                    "return_code": result.returncode,
-                },
+                metadata=GitCommand._output_metadata(
+                    output, result.stderr, result.returncode
+                ),
                 status="success",
                 duration=duration,
             )
 
-            return result.stdout.strip()
+            if cache_key is not None and result.returncode == 0:
+                GitCommand._cache_store(cache_key, fingerprint, output)
+            return output
         except subprocess.CalledProcessError as e:
-            error_msg = e.stderr.strip()
+            return GitCommand._handle_failure(
+                command, e.stderr.strip(), e.returncode, time.time() - start_time, check
+            )
+
+    @staticmethod
+    def _output_metadata(
+        output: str, error: Optional[str], return_code: int
+    ) -> Callable[[], Dict[str, Any]]:
+        """Build deferred log metadata summarizing a command's output.
+
+        The summary (size, line count and digest) is computed on the logger's
+        writer thread. The full output and stderr are only kept when debug
+        logging is enabled.
+
+        Args:
+            output: The command's stdout
+            error: The command's stderr, if any
+            return_code: The command's exit code
+
+        Returns:
+            A callable producing the metadata dict
+        """
+        capture = logger.is_enabled_for("debug")
+
+        def build() -> Dict[str, Any]:
+            data = output.encode("utf-8", errors="replace")
+            metadata = {
+                "output_bytes": len(data),
+                "output_lines": output.count("\n") + 1 if output else 0,
+                "output_digest": hashlib.blake2b(data, digest_size=8).hexdigest(),
+                "return_code": return_code,
+            }
+            if capture:
+                metadata["output"] = output
+                metadata["error"] = error.strip() if error else None
+            return metadata
+
+        return build
+
+    @staticmethod
+    def _handle_failure(
+        command: str, error_output: str, return_code: int, duration: float, check: bool
+    ) -> str:
+        """Classify, log and optionally raise a failed Git command.
+
+        Args:
+            command: The Git command that failed
+            error_output: The command's stderr output
+            return_code: The command's exit code
+            duration: How long the command ran, in seconds
+            check: Whether to raise the classified error
+
+        Returns:
+            A short error message when check is False
+
+        Raises:
+            GitCommandError: If the command fails and check is True
+            GitNetworkError: If the command fails due to network issues
+            GitStateError: If the repository is in an invalid state
+        """
+        # Determine error type and log accordingly
+        if any(
+            s in error_output.lower()
+            for s in ["network", "connection refused", "ssh", "timeout"]
+        ):
+            error_type = "network"
+            error_class = GitNetworkError
+            error_msg = "Network error during Git operation"
+        elif "not a git repository" in error_output.lower():
+            error_type = "repository"
+            error_class = GitRepositoryError
+            error_msg = "Not a Git repository"
+        elif any(
+            s in error_output.lower()
+            for s in ["index locked", "head locked", "ref locked"]
+        ):
+            error_type = "state"
+            error_class = GitStateError
+            error_msg = "Repository is in a locked state"
+        else:
+            error_type = "command"
+            error_class = GitCommandError
+            error_msg = f"Git command failed: {command}"
+
+        # Log error
+        logger.log(
+            level="error",
+            command=command,
+            message=error_msg,
+            metadata={
+                "error_type": error_type,
+                "error_output": error_output,
+                "return_code": return_code,
+            },
+            status="error",
+            duration=duration,
+        )
+
+        if check:
+            raise error_class(command, error_output)
+        return error_msg
+
+    @staticmethod
+    def stream(
+        argv: List[str],
+        separator: str = "\n",
+        check: bool = True,
+        chunk_size: int = 64 * 1024,
+        input: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Execute a Git command and yield its output record by record.
+
+        The command runs without a shell. Output is read incrementally, so
+        memory use does not grow with the size of the output, and git blocks
+        on a full pipe while the consumer is busy. If the consumer stops
+        early, the child process is killed.
+
+        Args:
+            argv: The command and its arguments, e.g. ``["git", "log", "-z"]``
+            separator: Record separator, e.g. ``"\\0"`` for ``-z`` output
+            check: Whether to raise an exception on non-zero exit codes
+            chunk_size: Maximum number of bytes to read from the pipe at once
+            input: Optional text to write to the command's stdin, e.g. the
+                revisions for ``--stdin``
+
+        Yields:
+            Decoded output records, without the separator
+
+        Raises:
+            GitCommandError: If the command fails and check is True
+            GitNetworkError: If the command fails due to network issues
+            GitStateError: If the repository is in an invalid state
+        """
+        command = shlex.join(argv)
+        sep = separator.encode("utf-8")
+        start_time = time.time()
+        if GitCommand.is_mutating(command):
+            GitCommand.invalidate_caches()
+
+        # stderr goes to a file so a chatty command can never fill a pipe we
+        # are not reading and deadlock
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                process = subprocess.Popen(
+                    argv,
+                    stdin=None if input is None else subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                )
+            except OSError as e:
+                raise GitCommandError(command, str(e))
+
+            # Feed stdin from a thread so a large input and a large output
+            # cannot block each other
+            if input is not None:
+                threading.Thread(
+                    target=GitCommand._feed_stdin,
+                    args=(process, input.encode("utf-8")),
+                    daemon=True,
+                ).start()
+
+            records = 0
+            completed = False
+            try:
+                pending = b""
+                while True:
+                    chunk = process.stdout.read1(chunk_size)
+                    if not chunk:
+                        break
+                    parts = chunk.split(sep)
+                    parts[0] = pending + parts[0]
+                    pending = parts.pop()
+                    for part in parts:
+                        records += 1
+                        yield part.decode("utf-8", errors="replace")
+                if pending:
+                    records += 1
+                    yield pending.decode("utf-8", errors="replace")
+                completed = True
+            finally:
+                if not completed:
+                    process.kill()
+                process.stdout.close()
+                return_code = process.wait()
+
             duration = time.time() - start_time
+            if return_code != 0:
+                stderr_file.seek(0)
+                error_output = stderr_file.read().decode("utf-8", errors="replace")
+                GitCommand._handle_failure(
+                    command, error_output.strip(), return_code, duration, check
+                )
+                return
+
+        logger.log(
+            level="info",
+            command=command,
+            message="Git command streamed successfully",
+            metadata={"records": records, "return_code": return_code},
+            status="success",
+            duration=duration,
+        )
 
-            # Determine error type and log accordingly
-            if any(
-                s in error_msg.lower()
-                for s in ["network", "connection refused", "ssh", "timeout"]
-            ):
-                error_type = "network"
-                error_class = GitNetworkError
-                error_msg = "Network error during Git operation"
-            elif "not a git repository" in error_msg.lower():
-                error_type = "repository"
-                error_class = GitRepositoryError
-                error_msg = "Not a Git repository"
-            elif any(
-                s in error_msg.lower()
-                for s in ["index locked", "head locked", "ref locked"]
-            ):
-                error_type = "state"
-                error_class = GitStateError
-                error_msg = "Repository is in a locked state"
-            else:
-                error_type = "command"
-                error_class = GitCommandError
-                error_msg = f"Git command failed: {command}"
+    @staticmethod
+    def _feed_stdin(process: subprocess.Popen, payload: bytes) -> None:
+        """Write a payload to a process's stdin and close it."""
+        try:
+            process.stdin.write(payload)
+        except OSError:
+            # The process exited early; its return code reports why
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
 
-            # Log error
-            logger.log(
-                level="error",
-                command=command,
-                message=error_msg,
-                metadata={
-                    "error_type": error_type,
-                    "error_output": e.stderr.strip(),
-                    "return_code": e.returncode,
-                },
-                status="error",
-                duration=duration,
+    @classmethod
+    def _async_slots(cls) -> asyncio.Semaphore:
+        """Get the semaphore bounding async Git processes on the running loop."""
+        loop = asyncio.get_running_loop()
+        if cls._async_semaphore is None or cls._async_semaphore[0] is not loop:
+            cls._async_semaphore = (loop, asyncio.Semaphore(cls.MAX_CONCURRENCY))
+        return cls._async_semaphore[1]
+
+    @staticmethod
+    async def _kill_async(process: asyncio.subprocess.Process) -> None:
+        """Kill an async child process and reap it."""
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    @staticmethod
+    def _handle_timeout(command: str, timeout: float, duration: float) -> None:
+        """Log and raise a timed-out Git command.
+
+        Raises:
+            GitTimeoutError: Always
+        """
+        error_output = f"Timed out after {timeout}s"
+        logger.log(
+            level="error",
+            command=command,
+            message=f"Git command timed out: {command}",
+            metadata={"error_type": "timeout", "timeout": timeout},
+            status="error",
+            duration=duration,
+        )
+        raise GitTimeoutError(command, error_output)
+
+    @classmethod
+    async def arun(
+        cls,
+        argv: List[str],
+        check: bool = True,
+        timeout: Optional[float] = None,
+        cwd: Optional[str] = None,
+    ) -> str:
+        """Execute a Git command asynchronously and return its output.
+
+        At most ``MAX_CONCURRENCY`` async Git processes run at once; the
+        timeout covers the process itself, not the wait for a free slot.
+        Cancelling the awaiting task kills the child process.
+
+        Args:
+            argv: The command and its arguments, e.g. ``["git", "log"]``
+            check: Whether to raise an exception on non-zero exit codes
+            timeout: Optional time limit in seconds
+            cwd: Optional working directory for the command
+
+        Returns:
+            The command output as string (empty on failure when check is False)
+
+        Raises:
+            GitCommandError: If the command fails and check is True
+            GitTimeoutError: If the command exceeds the timeout
+            GitNetworkError: If the command fails due to network issues
+            GitStateError: If the repository is in an invalid state
+        """
+        command = shlex.join(argv)
+        if cls.is_mutating(command):
+            cls.invalidate_caches()
+
+        async with cls._async_slots():
+            start_time = time.time()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                )
+            except OSError as e:
+                raise GitCommandError(command, str(e))
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await cls._kill_async(process)
+                cls._handle_timeout(command, timeout, time.time() - start_time)
+            except asyncio.CancelledError:
+                await cls._kill_async(process)
+                raise
+
+        duration = time.time() - start_time
+        output = stdout.decode("utf-8", errors="replace").strip()
+        if process.returncode != 0:
+            cls._handle_failure(
+                command,
+                stderr.decode("utf-8", errors="replace").strip(),
+                process.returncode,
+                duration,
+                check,
+            )
+            return output
+
+        logger.log(
+            level="info",
+            command=command,
+            message="Git command executed successfully",
+            metadata=cls._output_metadata(
+                output, stderr.decode("utf-8", errors="replace"), process.returncode
+            ),
+            status="success",
+            duration=duration,
+        )
+        return output
+
+    @classmethod
+    async def astream(
+        cls,
+        argv: List[str],
+        separator: str = "\n",
+        check: bool = True,
+        timeout: Optional[float] = None,
+        cwd: Optional[str] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[str]:
+        """Execute a Git command asynchronously and yield its output records.
+
+        The async counterpart of ``stream``. The concurrency slot is held
+        until the stream is exhausted or closed, and closing or cancelling
+        the consumer kills the child process.
+
+        Args:
+            argv: The command and its arguments, e.g. ``["git", "log", "-z"]``
+            separator: Record separator, e.g. ``"\\0"`` for ``-z`` output
+            check: Whether to raise an exception on non-zero exit codes
+            timeout: Optional time limit in seconds for the whole stream
+            cwd: Optional working directory for the command
+            chunk_size: Maximum number of bytes to read from the pipe at once
+
+        Yields:
+            Decoded output records, without the separator
+
+        Raises:
+            GitCommandError: If the command fails and check is True
+            GitTimeoutError: If the command exceeds the timeout
+            GitNetworkError: If the command fails due to network issues
+            GitStateError: If the repository is in an invalid state
+        """
+        command = shlex.join(argv)
+        sep = separator.encode("utf-8")
+        if cls.is_mutating(command):
+            cls.invalidate_caches()
+
+        async with cls._async_slots():
+            start_time = time.time()
+            deadline = None if timeout is None else start_time + timeout
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                )
+            except OSError as e:
+                raise GitCommandError(command, str(e))
+
+            # Drain stderr concurrently so it can never fill up and block git
+            stderr_task = asyncio.ensure_future(process.stderr.read())
+            records = 0
+            completed = False
+            try:
+                pending = b""
+                while True:
+                    remaining = None if deadline is None else deadline - time.time()
+                    try:
+                        chunk = await asyncio.wait_for(
+                            process.stdout.read(chunk_size), remaining
+                        )
+                    except asyncio.TimeoutError:
+                        cls._handle_timeout(command, timeout, time.time() - start_time)
+                    if not chunk:
+                        break
+                    parts = chunk.split(sep)
+                    parts[0] = pending + parts[0]
+                    pending = parts.pop()
+                    for part in parts:
+                        records += 1
+                        yield part.decode("utf-8", errors="replace")
+                if pending:
+                    records += 1
+                    yield pending.decode("utf-8", errors="replace")
+                await process.wait()
+                completed = True
+            finally:
+                if not completed:
+                    stderr_task.cancel()
+                    await cls._kill_async(process)
+
+            stderr = await stderr_task
+
+        duration = time.time() - start_time
+        if process.returncode != 0:
+            cls._handle_failure(
+                command,
+                stderr.decode("utf-8", errors="replace").strip(),
+                process.returncode,
+                duration,
+                check,
+            )
+            return
+
+        logger.log(
+            level="info",
+            command=command,
+            message="Git command streamed successfully",
+            metadata={"records": records, "return_code": process.returncode},
+            status="success",
+            duration=duration,
+        )
+
+    @classmethod
+    def is_mutating(cls, command: str) -> bool:
+        """Check whether a command may change repository or working tree state.
+
+        Anything that is not a plain ``git <read-only subcommand>`` invocation
+        is treated as mutating.
+
+        Args:
+            command: The command line to classify
+
+        Returns:
+            True unless the command is known to be read-only
+        """
+        parts = command.split()
+        if len(parts) < 2 or parts[0] != "git":
+            return True
+        if any(op in command for op in (";", "&&", "||", " | ", ">", "`", "$(")):
+            return True
+        return parts[1] not in cls.READ_ONLY_SUBCOMMANDS
+
+    @classmethod
+    def invalidate_caches(cls) -> None:
+        """Drop all cached RepoStatus snapshots and memoized command output."""
+        cls._status_cache.clear()
+        with cls._result_cache_lock:
+            cls._result_cache.clear()
+
+    @classmethod
+    def _cache_key(cls, command: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        """Build the result cache key for a command, if it may be cached.
+
+        Args:
+            command: The command line to run
+
+        Returns:
+            A (cwd, argv) key, or None when the command is not cacheable
+        """
+        if any(op in command for op in (";", "&&", "||", "|", ">", "<", "`", "$")):
+            return None
+        try:
+            argv = tuple(shlex.split(command))
+        except ValueError:
+            return None
+        if not any(argv[: len(prefix)] == prefix for prefix in cls.CACHEABLE_COMMANDS):
+            return None
+        return os.getcwd(), argv
+
+    @classmethod
+    def _repo_fingerprint(cls) -> Optional[Tuple[Any, ...]]:
+        """Cheaply fingerprint the repository state for the current directory.
+
+        The fingerprint combines the HEAD oid with the stat data of the index,
+        packed-refs and config files, so it changes whenever a commit, checkout,
+        staging, ref packing or config write happens.
+
+        Returns:
+            A hashable fingerprint, or None outside a Git repository
+        """
+        cwd = os.getcwd()
+        if cwd not in cls._git_dirs:
+            try:
+                result = subprocess.run(
+                    ["git", "rev-parse", "--git-dir", "--git-common-dir"],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                git_dir, common_dir = (
+                    os.path.join(cwd, line) for line in result.stdout.splitlines()[:2]
+                )
+                cls._git_dirs[cwd] = (git_dir, common_dir)
+            except (subprocess.CalledProcessError, OSError, ValueError):
+                cls._git_dirs[cwd] = None
+        dirs = cls._git_dirs[cwd]
+        if dirs is None:
+            return None
+        git_dir, common_dir = dirs
+
+        def read(path: str) -> Optional[str]:
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    return f.read().strip()
+            except OSError:
+                return None
+
+        def stat(path: str) -> Optional[Tuple[int, int]]:
+            try:
+                st = os.stat(path)
+                return st.st_mtime_ns, st.st_size
+            except OSError:
+                return None
+
+        head = read(os.path.join(git_dir, "HEAD"))
+        head_oid = None
+        if head and head.startswith("ref: "):
+            # Packed refs are covered by the packed-refs stat below
+            head_oid = read(os.path.join(common_dir, head[5:]))
+        return (
+            head,
+            head_oid,
+            stat(os.path.join(git_dir, "index")),
+            stat(os.path.join(common_dir, "packed-refs")),
+            stat(os.path.join(common_dir, "config")),
+        )
+
+    @classmethod
+    def _cache_lookup(
+        cls, key: Tuple[str, Tuple[str, ...]], fingerprint: Optional[Tuple[Any, ...]]
+    ) -> Optional[str]:
+        """Return memoized output for a key if the repository is unchanged."""
+        with cls._result_cache_lock:
+            entry = cls._result_cache.get(key)
+            if fingerprint is not None and entry is not None:
+                if entry[0] == fingerprint:
+                    cls._result_cache.move_to_end(key)
+                    cls._cache_hits += 1
+                    return entry[1]
+                del cls._result_cache[key]
+            cls._cache_misses += 1
+            return None
+
+    @classmethod
+    def _cache_store(
+        cls,
+        key: Tuple[str, Tuple[str, ...]],
+        fingerprint: Optional[Tuple[Any, ...]],
+        output: str,
+    ) -> None:
+        """Memoize command output, evicting the least recently used entry."""
+        if fingerprint is None:
+            return
+        with cls._result_cache_lock:
+            cls._result_cache[key] = (fingerprint, output)
+            cls._result_cache.move_to_end(key)
+            while len(cls._result_cache) > cls.RESULT_CACHE_SIZE:
+                cls._result_cache.popitem(last=False)
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, int]:
+        """Get result cache counters for profiling.
+
+        Returns:
+            Dictionary with hits, misses, current size and maximum size
+        """
+        with cls._result_cache_lock:
+            return {
+                "hits": cls._cache_hits,
+                "misses": cls._cache_misses,
+                "size": len(cls._result_cache),
+                "max_size": cls.RESULT_CACHE_SIZE,
+            }
+
+    @classmethod
+    def get_repo_status(cls, refresh: bool = False) -> RepoStatus:
+        """Get a snapshot of branch and working tree state.
+
+        The snapshot is produced by a single ``git status --porcelain=v2``
+        call and cached until a mutating Git command runs.
+
+        Args:
+            refresh: Whether to bypass the cached snapshot
+
+        Returns:
+            The current repository status
+
+        Raises:
+            GitRepositoryError: If not in a Git repository
+        """
+        key = os.getcwd()
+        status = None if refresh else cls._status_cache.get(key)
+        if status is None:
+            status = RepoStatus.parse(
+                cls.run(
+                    "git status --porcelain=v2 -z --branch --untracked-files=all"
+                )
             )
+            cls._status_cache[key] = status
+        return status
+
+    @classmethod
+    def _object_session(cls, mode: str) -> _CatFileSession:
+        """Get the ``git cat-file`` session for the current directory.
+
+        Args:
+            mode: Either ``--batch`` or ``--batch-check``
+
+        Returns:
+            The session, created lazily on first use
+        """
+        key = (mode, os.getcwd())
+        with cls._object_sessions_lock:
+            session = cls._object_sessions.get(key)
+            if session is None:
+                session = _CatFileSession(mode, key[1])
+                cls._object_sessions[key] = session
+            return session
+
+    @classmethod
+    def read_object(cls, oid: str) -> Optional[GitObject]:
+        """Read a Git object through the persistent ``cat-file --batch`` session.
 
-            if check:
-                raise error_class(command, e.stderr.strip())
-            return error_msg
+        Args:
+            oid: Object id or any revision expression git can resolve
+
+        Returns:
+            The object with its type, size and raw content, or None if missing
+
+        Raises:
+            GitCommandError: If the cat-file session cannot be used
+        """
+        return cls._object_session("--batch").request([oid])[0]
+
+    @classmethod
+    def object_info(cls, oids: Iterable[str]) -> Dict[str, Optional[GitObjectInfo]]:
+        """Get type and size for many objects without reading their content.
+
+        Args:
+            oids: Object ids or revision expressions to look up
+
+        Returns:
+            Dictionary mapping each requested name to its info, or None if missing
+
+        Raises:
+            GitCommandError: If the cat-file session cannot be used
+        """
+        requests = list(dict.fromkeys(oids))
+        responses = cls._object_session("--batch-check").request(requests)
+        return dict(zip(requests, responses))
+
+    @classmethod
+    def close_object_sessions(cls) -> None:
+        """Shut down all persistent ``git cat-file`` sessions."""
+        with cls._object_sessions_lock:
+            sessions = list(cls._object_sessions.values())
+            cls._object_sessions.clear()
+        for session in sessions:
+            session.close()
 
     @classmethod
     def is_repo(cls) -> bool:
@@ -121,7 +1069,7 @@ class GitCommand:
             True if current directory is a Git repo, False otherwise
         """
         try:
-            cls.run("git rev-parse --is-inside-work-tree", check=False)
+            cls.run("git rev-parse --is-inside-work-tree", check=False, cache=True)
             return True
         except:
             return False
@@ -131,30 +1079,33 @@ class GitCommand:
         """Get the name of the current Git branch.
 
         Returns:
-            The name of the current branch
+            The name of the current branch, or "HEAD" when detached
 
         Raises:
             GitCommandError: If not in a Git repository or other error
         """
-        return cls.run("git rev-parse --abbrev-ref HEAD")
+        return cls.get_repo_status().branch or "HEAD"
 
     @classmethod
     def get_staged_files(cls) -> List[str]:
         """Get list of staged files.
 
         Returns:
-            List of filenames that are currently staged
+            List of filenames that are currently staged, including conflicts
         """
-        return cls.run("git diff --cached --name-only").split("\n")
+        status = cls.get_repo_status()
+        return status.staged + status.conflicted
 
     @classmethod
     def get_modified_files(cls) -> List[str]:
         """Get list of modified files.
 
         Returns:
-            List of filenames that have been modified but not staged
+            List of filenames that have been modified but not staged,
+            including conflicts
         """
-        return cls.run("git ls-files -m").split("\n")
+        status = cls.get_repo_status()
+        return status.unstaged + status.conflicted
 
     @classmethod
     def get_untracked_files(cls) -> List[str]:
@@ -163,7 +1114,7 @@ class GitCommand:
         Returns:
             List of filenames that are not tracked by Git
         """
-        return cls.run("git ls-files --others --exclude-standard").split("\n")
+        return list(cls.get_repo_status().untracked)
 
     @classmethod
     def stage_files(cls, files: Optional[List[str]] = None) -> None:
@@ -413,7 +1364,7 @@ class GitCommand:
             GitConfigError: If there is an error accessing the configuration
         """
         try:
-            return cls.run(f"git config --get {key}")
+            return cls.run(f"git config --get {key}", cache=True)
         except GitCommandError as e:
             if "key does not exist" in e.error_output.lower():
                 return None
@@ -459,7 +1410,7 @@ class GitCommand:
             Remote URL or None if not set
         """
         try:
-            return cls.run(f"git config --get remote.{remote}.url")
+            return cls.run(f"git config --get remote.{remote}.url", cache=True)
         except GitCommandError:
             return None
 
@@ -473,25 +1424,75 @@ class GitCommand:
         """
         cls.run(f"git remote add {name} {url}")
 
+    @staticmethod
+    def _parse_commit(oid: str, data: bytes) -> Dict[str, Any]:
+        """Parse a raw commit object into the commit information dictionary.
+
+        Args:
+            oid: Object id of the commit
+            data: Raw commit object content
+
+        Returns:
+            Dictionary containing commit information
+        """
+        text = data.decode("utf-8", errors="replace")
+        headers, _, body = text.partition("\n\n")
+        info = {"hash": oid, "author_name": "", "author_email": "", "timestamp": None}
+        for line in headers.split("\n"):
+            if line.startswith("author "):
+                ident, _, date = line[len("author ") :].rpartition(">")
+                name, _, email = ident.partition("<")
+                info["author_name"] = name.strip()
+                info["author_email"] = email.strip()
+                info["timestamp"] = datetime.fromtimestamp(int(date.split()[0]))
+                break
+        # Same as git's %s: the first paragraph joined into a single line
+        info["message"] = " ".join(body.strip().split("\n\n", 1)[0].split("\n"))
+        return info
+
     @classmethod
     def get_commit_info(cls, commit: str = "HEAD") -> Dict[str, str]:
         """Get information about a commit.
 
+        Tags are peeled to the commit they point at. The lookup goes through
+        the persistent cat-file session instead of spawning ``git show``.
+
         Args:
             commit: Commit reference
 
         Returns:
             Dictionary containing commit information
+
+        Raises:
+            GitCommandError: If the commit does not exist
         """
-        format_str = "%H|%an|%ae|%at|%s"
-        info = cls.run(f"git show -s --format='{format_str}' {commit}").split("|")
-        return {
-            "hash": info[0],
-            "author_name": info[1],
-            "author_email": info[2],
-            "timestamp": datetime.fromtimestamp(int(info[3])),
-            "message": info[4],
-        }
+        obj = cls.read_object(f"{commit}^{{commit}}")
+        if obj is None:
+            raise GitCommandError(
+                f"git cat-file --batch {commit}", f"Not a valid commit: {commit}"
+            )
+        return cls._parse_commit(obj.oid, obj.data)
+
+    @classmethod
+    def get_tag_contents(cls, tag: str) -> str:
+        """Get the message stored in a tag, like ``%(contents)``.
+
+        Args:
+            tag: Tag name
+
+        Returns:
+            The tag message, or the commit message for lightweight tags
+
+        Raises:
+            GitCommandError: If the tag does not exist
+        """
+        obj = cls.read_object(f"refs/tags/{tag}")
+        if obj is None:
+            raise GitCommandError(
+                f"git cat-file --batch refs/tags/{tag}", f"Tag not found: {tag}"
+            )
+        text = obj.data.decode("utf-8", errors="replace")
+        return text.partition("\n\n")[2].strip()
 
     @classmethod
     def get_file_history(cls, path: str, max_entries: int = 10) -> List[Dict[str, Any]]:
@@ -568,10 +1569,9 @@ class GitCommand:
         Returns:
             Status string
         """
-        cmd = ["git status"]
         if porcelain:
-            cmd.append("--porcelain")
-        return cls.run(" ".join(cmd))
+            return cls.get_repo_status().to_porcelain()
+        return cls.run("git status")
 
     @classmethod
     def get_diff(cls, staged: bool = False, files: Optional[List[str]] = None) -> str:
@@ -590,3 +1590,6 @@ class GitCommand:
         if files:
             cmd.extend([f"'{f}'" for f in files])
         return cls.run(" ".join(cmd))
+
+
+atexit.register(GitCommand.close_object_sessions)
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""Commit ancestry and reachability queries.
+
+This module answers "which of these commits are contained in which of these
+refs" with a single history walk. When the repository has a commit-graph
+file (or a split commit-graph chain) the walk reads parents and generation
+numbers from the memory-mapped graph and stops as soon as generations drop
+below the oldest commit in question. Otherwise it falls back to one batched
+``git rev-list`` stream.
+"""
+
+import bisect
+import heapq
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from qgits.qgit_errors import GitCommandError, GitRepositoryError
+from qgits.qgit_git import GitCommand
+from qgits.qgit_logger import logger
+from qgits.qgit_objects import ObjectStore
+
+# Parent slot value meaning "no parent" in the CDAT chunk
+GRAPH_PARENT_NONE = 0x70000000
+GRAPH_EXTRA_EDGES = 0x80000000
+GRAPH_LAST_EDGE = 0x80000000
+
+# Commits newer than the commit-graph that we are willing to walk by hand
+MAX_UNGRAPHED_COMMITS = 10000
+
+
+class _GraphUnavailable(Exception):
+    """Internal signal that the commit-graph cannot answer a query."""
+
+
+class _GraphLayer:
+    """A single memory-mapped commit-graph file."""
+
+    def __init__(self, path: str, hash_size: int, base_count: int):
+        self.path = path
+        self.hash_size = hash_size
+        self.base_count = base_count
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature, version, hash_version, num_chunks = struct.unpack(
+            ">4sBBB", self._map[:7]
+        )
+        if signature != b"CGPH" or version != 1:
+            self.close()
+            raise GitRepositoryError(f"Unsupported commit-graph file: {path}")
+        if hash_version != (2 if hash_size == 32 else 1):
+            self.close()
+            raise GitRepositoryError(f"Commit-graph hash mismatch: {path}")
+
+        chunks = {}
+        for i in range(num_chunks):
+            start = 8 + i * 12
+            chunk_id, offset = struct.unpack(">4sQ", self._map[start : start + 12])
+            chunks[chunk_id] = offset
+        try:
+            fanout = chunks[b"OIDF"]
+            self._oids = chunks[b"OIDL"]
+            self._data = chunks[b"CDAT"]
+        except KeyError:
+            self.close()
+            raise GitRepositoryError(f"Incomplete commit-graph file: {path}")
+        self._edges = chunks.get(b"EDGE")
+        self._fanout = struct.unpack(">256I", self._map[fanout : fanout + 1024])
+        self.count = self._fanout[255]
+
+    def oid(self, index: int) -> bytes:
+        """Get the binary object name at a local position."""
+        start = self._oids + index * self.hash_size
+        return self._map[start : start + self.hash_size]
+
+    def find(self, name: bytes) -> Optional[int]:
+        """Find the local position of a commit by binary name."""
+        first = name[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self.oid(mid)
+            if current < name:
+                lo = mid + 1
+            elif current > name:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def commit_data(self, index: int) -> Tuple[int, int, int]:
+        """Get (parent1, parent2, topological level) at a local position."""
+        start = self._data + index * (self.hash_size + 16) + self.hash_size
+        parent1, parent2, level = struct.unpack(">III", self._map[start : start + 12])
+        return parent1, parent2, level >> 2
+
+    def extra_edges(self, start: int) -> List[int]:
+        """Read the octopus parent list starting at an EDGE chunk index."""
+        if self._edges is None:
+            raise GitRepositoryError(f"Missing EDGE chunk in {self.path}")
+        parents = []
+        while True:
+            offset = self._edges + start * 4
+            value = struct.unpack(">I", self._map[offset : offset + 4])[0]
+            parents.append(value & ~GRAPH_LAST_EDGE)
+            if value & GRAPH_LAST_EDGE:
+                return parents
+            start += 1
+
+    def close(self) -> None:
+        """Unmap the commit-graph file."""
+        self._map.close()
+
+
+class CommitGraph:
+    """Read-only view of a commit-graph file or split commit-graph chain.
+
+    Positions are global across the chain: the base layer comes first and
+    each later layer continues numbering where the previous one ended.
+    """
+
+    def __init__(self, layers: List[_GraphLayer]):
+        self._layers = layers
+        self._bases = [layer.base_count for layer in layers]
+
+    @classmethod
+    def open(cls, store: ObjectStore) -> Optional["CommitGraph"]:
+        """Open the commit-graph of an object store.
+
+        Args:
+            store: The repository's object store
+
+        Returns:
+            The commit graph, or None if the repository has none
+        """
+        info_dir = os.path.join(store.objects_dir, "info")
+        chain_path = os.path.join(info_dir, "commit-graphs", "commit-graph-chain")
+        if os.path.isfile(chain_path):
+            with open(chain_path, "r", encoding="ascii") as f:
+                hashes = [line.strip() for line in f if line.strip()]
+            paths = [
+                os.path.join(info_dir, "commit-graphs", f"graph-{h}.graph")
+                for h in hashes
+            ]
+        elif os.path.isfile(os.path.join(info_dir, "commit-graph")):
+            paths = [os.path.join(info_dir, "commit-graph")]
+        else:
+            return None
+
+        layers: List[_GraphLayer] = []
+        try:
+            for path in paths:
+                base_count = layers[-1].base_count + layers[-1].count if layers else 0
+                layers.append(_GraphLayer(path, store.hash_size, base_count))
+        except (OSError, GitRepositoryError):
+            for layer in layers:
+                layer.close()
+            raise
+        return cls(layers)
+
+    def __enter__(self) -> "CommitGraph":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _layer(self, position: int) -> _GraphLayer:
+        return self._layers[bisect.bisect_right(self._bases, position) - 1]
+
+    def find(self, oid: str) -> Optional[int]:
+        """Find the global position of a commit.
+
+        Args:
+            oid: Full hex commit id
+
+        Returns:
+            The commit's position, or None if it is not in the graph
+        """
+        name = bytes.fromhex(oid)
+        for layer in self._layers:
+            index = layer.find(name)
+            if index is not None:
+                return layer.base_count + index
+        return None
+
+    def oid(self, position: int) -> str:
+        """Get the hex commit id at a global position."""
+        layer = self._layer(position)
+        return layer.oid(position - layer.base_count).hex()
+
+    def commit(self, position: int) -> Tuple[List[int], int]:
+        """Get the parent positions and generation of a commit.
+
+        Args:
+            position: Global position of the commit
+
+        Returns:
+            Tuple of (parent positions, generation number)
+        """
+        layer = self._layer(position)
+        parent1, parent2, generation = layer.commit_data(position - layer.base_count)
+        parents = []
+        if parent1 != GRAPH_PARENT_NONE:
+            parents.append(parent1)
+            if parent2 & GRAPH_EXTRA_EDGES:
+                parents.extend(layer.extra_edges(parent2 & ~GRAPH_EXTRA_EDGES))
+            elif parent2 != GRAPH_PARENT_NONE:
+                parents.append(parent2)
+        return parents, generation
+
+    def close(self) -> None:
+        """Unmap all layers."""
+        for layer in self._layers:
+            layer.close()
+        self._layers = []
+        self._bases = []
+
+
+class Reachability:
+    """Batched "is commit X contained in ref Y" queries."""
+
+    @staticmethod
+    def resolve(revisions: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolve revisions to full commit ids through the cat-file session.
+
+        Args:
+            revisions: Commit ids, abbreviations or ref names
+
+        Returns:
+            Dictionary mapping each revision to its commit id, or None if missing
+        """
+        revisions = list(dict.fromkeys(revisions))
+        infos = GitCommand.object_info(f"{rev}^{{commit}}" for rev in revisions)
+        return {
+            rev: info.oid if info is not None else None
+            for rev, info in zip(revisions, infos.values())
+        }
+
+    @staticmethod
+    def remote_branches() -> Dict[str, str]:
+        """Get remote-tracking branches and their tips, skipping symbolic refs.
+
+        Returns:
+            Dictionary mapping short branch names to commit ids
+        """
+        output = GitCommand.run(
+            "git for-each-ref --format='%(objectname) %(refname:short) %(symref)' "
+            "refs/remotes",
+            cache=True,
+        )
+        branches = {}
+        for line in output.split("\n"):
+            parts = line.split()
+            if len(parts) == 2:
+                branches[parts[1]] = parts[0]
+        return branches
+
+    @classmethod
+    def containing(
+        cls, commits: Iterable[str], refs: Dict[str, str]
+    ) -> Dict[str, List[str]]:
+        """Find which refs contain each of a set of commits, in one walk.
+
+        Args:
+            commits: Commit ids or revisions to look up
+            refs: Dictionary mapping ref names to tip revisions
+
+        Returns:
+            Dictionary mapping each requested commit to the names of the refs
+            whose history contains it, in the order the refs were given
+
+        Raises:
+            GitCommandError: If Git cannot resolve the revisions
+        """
+        commits = list(dict.fromkeys(commits))
+        names = list(refs)
+        resolved = cls.resolve(commits + list(refs.values()))
+        targets: Dict[str, List[str]] = {}
+        for commit in commits:
+            if resolved[commit] is not None:
+                targets.setdefault(resolved[commit], []).append(commit)
+        tips: Dict[str, int] = {}
+        for bit, name in enumerate(names):
+            tip = resolved[refs[name]]
+            if tip is not None:
+                tips[tip] = tips.get(tip, 0) | (1 << bit)
+
+        masks: Dict[str, int] = {}
+        if targets and tips:
+            try:
+                masks = cls._walk_graph(targets, tips)
+                method = "commit-graph"
+            except _GraphUnavailable:
+                masks = cls._walk_rev_list(targets, tips)
+                method = "rev-list"
+            logger.log(
+                level="debug",
+                command="reachability",
+                message="Resolved commit containment",
+                metadata={
+                    "commits": len(targets),
+                    "refs": len(names),
+                    "method": method,
+                },
+            )
+
+        result = {commit: [] for commit in commits}
+        for oid, requested in targets.items():
+            mask = masks.get(oid, 0)
+            contained = [name for bit, name in enumerate(names) if mask >> bit & 1]
+            for commit in requested:
+                result[commit] = contained
+        return result
+
+    @classmethod
+    def is_ancestor(cls, ancestor: str, descendant: str) -> bool:
+        """Check whether one commit is contained in another's history.
+
+        Args:
+            ancestor: Candidate ancestor revision
+            descendant: Descendant revision
+
+        Returns:
+            True if ``ancestor`` is reachable from ``descendant``
+        """
+        return bool(cls.containing([ancestor], {descendant: descendant})[ancestor])
+
+    @staticmethod
+    def _propagate(
+        walk: Iterator[Tuple[str, List[str]]],
+        targets: Dict[str, List[str]],
+        tips: Dict[str, int],
+    ) -> Dict[str, int]:
+        """Propagate ref bitmasks along a children-before-parents walk.
+
+        Each commit's mask is final once it is emitted, because every child
+        that can reach it has been emitted earlier.
+
+        Args:
+            walk: Iterator of (commit, parents) in topological order
+            targets: Commits whose masks are wanted
+            tips: Ref tips and the bits of the refs pointing at them
+
+        Returns:
+            Dictionary mapping reachable target commits to ref bitmasks
+        """
+        pending = dict(tips)
+        found: Dict[str, int] = {}
+        for commit, parents in walk:
+            mask = pending.pop(commit, 0)
+            for parent in parents:
+                pending[parent] = pending.get(parent, 0) | mask
+            if commit in targets:
+                found[commit] = mask
+                if len(found) == len(targets):
+                    break
+        return found
+
+    @classmethod
+    def _walk_rev_list(
+        cls, targets: Dict[str, List[str]], tips: Dict[str, int]
+    ) -> Dict[str, int]:
+        """Walk history with one ``git rev-list --topo-order --parents`` stream."""
+        argv = ["git", "rev-list", "--topo-order", "--parents", *tips]
+        walk = (
+            (parts[0], parts[1:])
+            for parts in (line.split() for line in GitCommand.stream(argv))
+            if parts
+        )
+        return cls._propagate(walk, targets, tips)
+
+    @classmethod
+    def _walk_graph(
+        cls, targets: Dict[str, List[str]], tips: Dict[str, int]
+    ) -> Dict[str, int]:
+        """Walk history in generation order using the commit-graph.
+
+        Raises:
+            _GraphUnavailable: If there is no usable commit-graph
+        """
+        try:
+            store = ObjectStore.open()
+            graph = CommitGraph.open(store)
+        except (OSError, GitRepositoryError):
+            raise _GraphUnavailable()
+        if graph is None:
+            raise _GraphUnavailable()
+
+        with store, graph:
+            nodes: Dict[str, Tuple[List[str], int]] = {}
+            ungraphed = 0
+
+            def node(oid: str) -> Tuple[List[str], int]:
+                """Get parents and generation, computing it for new commits."""
+                nonlocal ungraphed
+                stack = [oid]
+                while stack:
+                    current = stack[-1]
+                    if current in nodes:
+                        stack.pop()
+                        continue
+                    position = graph.find(current)
+                    if position is not None:
+                        parents, generation = graph.commit(position)
+                        if generation == 0:
+                            # Graph written without generation numbers
+                            raise _GraphUnavailable()
+                        nodes[current] = ([graph.oid(p) for p in parents], generation)
+                        stack.pop()
+                        continue
+                    # Commits newer than the graph get 1 + max parent generation
+                    obj = GitCommand.read_object(current)
+                    if obj is None or obj.type != "commit":
+                        raise _GraphUnavailable()
+                    headers = obj.data.split(b"\n\n", 1)[0].split(b"\n")
+                    parents = [
+                        line[7:].decode("ascii")
+                        for line in headers
+                        if line.startswith(b"parent ")
+                    ]
+                    missing = [p for p in parents if p not in nodes]
+                    if missing:
+                        ungraphed += 1
+                        if ungraphed > MAX_UNGRAPHED_COMMITS:
+                            raise _GraphUnavailable()
+                        stack.extend(missing)
+                        continue
+                    generation = 1 + max((nodes[p][1] for p in parents), default=0)
+                    nodes[current] = (parents, generation)
+                    stack.pop()
+                return nodes[oid]
+
+            try:
+                floor = min(node(oid)[1] for oid in targets)
+            except GitCommandError:
+                raise _GraphUnavailable()
+
+            def walk() -> Iterator[Tuple[str, List[str]]]:
+                heap = [(-node(tip)[1], tip) for tip in tips]
+                heapq.heapify(heap)
+                queued = set(tips)
+                while heap:
+                    negative_generation, oid = heapq.heappop(heap)
+                    if -negative_generation < floor:
+                        return
+                    parents = node(oid)[0]
+                    yield oid, parents
+                    for parent in parents:
+                        if parent not in queued:
+                            queued.add(parent)
+                            heapq.heappush(heap, (-node(parent)[1], parent))
+
+            try:
+                return cls._propagate(walk(), targets, tips)
+            except GitCommandError:
+                raise _GraphUnavailable()
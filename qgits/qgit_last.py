@@ -11,6 +11,7 @@ from typing import List, Tuple, Optional
 
 from qgits.qgit_core import run_command
 from qgits.qgit_errors import GitCommandError, GitStateError
+from qgits.qgit_git import GitCommand
 from qgits.qgit_logger import logger
 
 def get_recent_commits(count: int = 10) -> List[Tuple[str, str, str]]:
@@ -73,9 +74,9 @@ def create_safespace(commit_hash: str) -> str:
         metadata = {
             "commit_hash": commit_hash,
             "created_at": datetime.now().isoformat(),
-            "branch": run_command("git rev-parse --abbrev-ref HEAD").strip(),
+            "branch": run_command("git rev-parse --abbrev-ref HEAD", cache=True).strip(),
             "working_dir": os.getcwd(),
-            "current_commit": run_command("git rev-parse HEAD").strip()
+            "current_commit": run_command("git rev-parse HEAD", cache=True).strip()
         }
         
         with open(temp_dir / "metadata.json", "w") as f:
@@ -97,8 +98,9 @@ def create_safespace(commit_hash: str) -> str:
                 pass
         
         # Save current directory state
+        status_output = GitCommand.get_repo_status(refresh=True).to_porcelain()
         with open(temp_dir / "status", "w") as f:
-            f.write(run_command("git status --porcelain"))
+            f.write(status_output)
         
         # Save all tracked files in their current state
         current_files = run_command("git ls-files").split("\n")
@@ -125,7 +127,6 @@ def create_safespace(commit_hash: str) -> str:
                     )
         
         # Save untracked files
-        status_output = run_command("git status --porcelain")
         untracked_dir = temp_dir / "untracked"
         untracked_dir.mkdir(mode=0o700)
         
@@ -211,7 +212,7 @@ def checkout_commit(commit_hash: str, safespace_dir: Optional[str] = None) -> No
                 )
         
         # Create backup branch
-        current_branch = run_command("git rev-parse --abbrev-ref HEAD").strip()
+        current_branch = run_command("git rev-parse --abbrev-ref HEAD", cache=True).strip()
         backup_branch = f"backup_{current_branch}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         run_command(f"git branch {backup_branch}")
         
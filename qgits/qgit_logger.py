@@ -5,17 +5,19 @@ This module provides a centralized logging system that uses SQLite for storage
 and leverages the resource manager for optimized performance on M4 systems.
 """
 
-import asyncio
+import atexit
 import json
 import os
+import random
 import sqlite3
 import threading
+import time
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from queue import Empty, Queue
-from typing import Any, Dict, List, Optional
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from internal.resource_manager import get_resource_manager
 
@@ -30,10 +32,19 @@ class LogEntry:
     level: str
     command: str
     message: str
-    metadata: Dict[str, Any]
+    metadata: Union[Dict[str, Any], Callable[[], Dict[str, Any]]]
     status: str
     duration: float
 
+    def resolve_metadata(self) -> Dict[str, Any]:
+        """Get the metadata dict, building it now if it was deferred."""
+        if not callable(self.metadata):
+            return self.metadata
+        try:
+            return self.metadata() or {}
+        except Exception as e:
+            return {"metadata_error": str(e)}
+
 
 class QGitLogger:
     """Centralized logging system for qgit operations.
@@ -44,8 +55,23 @@ class QGitLogger:
 
     _instance = None
     _lock = threading.Lock()
-    _log_queue: Queue = Queue()
-    _is_processing = False
+
+    # Writer tuning: queue bound, batch size and how long a batch may wait
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 500
+    BATCH_LATENCY = 0.05
+    SHUTDOWN_TIMEOUT = 5.0
+
+    _INSERT_SQL = """
+        INSERT INTO logs
+        (timestamp, level, command, message, metadata, status, duration)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    # Queue marker telling the writer thread to exit
+    _STOP = object()
+
+    # Numeric severities used for level filtering
+    LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40, "critical": 50}
 
     def __new__(cls, *args, **kwargs):
         with cls._lock:
@@ -74,52 +100,132 @@ class QGitLogger:
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
 
+        # Level threshold and per-level sampling, e.g. QGIT_LOG_LEVEL=debug
+        # and QGIT_LOG_SAMPLE=info=0.1,debug=0.01
+        self.set_level(os.environ.get("QGIT_LOG_LEVEL", "info"))
+        self.sample_rates: Dict[str, float] = {}
+        for item in os.environ.get("QGIT_LOG_SAMPLE", "").split(","):
+            level, _, rate = item.partition("=")
+            try:
+                self.set_sampling(level.strip(), float(rate))
+            except ValueError:
+                continue
+
         # Initialize resource manager
         self.resource_manager = get_resource_manager(
             Path(os.path.dirname(self.db_path))
         )
 
-        # Initialize database
-        self._init_db()
+        # Bounded entry queue; QGIT_LOG_OVERFLOW=block waits instead of dropping
+        self._log_queue: Queue = Queue(maxsize=self.QUEUE_SIZE)
+        self.overflow_policy = os.environ.get("QGIT_LOG_OVERFLOW", "drop")
+        self.dropped = 0
+
+        # Logs are stored in one SQLite file per day next to db_path, which
+        # is still read as a legacy partition if it exists
+        self.log_dir = os.path.dirname(self.db_path)
 
         # Start background processing
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writer_day: Optional[str] = None
         self._start_background_processing()
+        atexit.register(self.close)
 
-    def _init_db(self):
-        """Initialize the SQLite database with optimized settings."""
-        with self._get_db() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    level TEXT NOT NULL,
-                    command TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    metadata TEXT,
-                    status TEXT,
-                    duration REAL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
+    PARTITION_PREFIX = "qgit-"
+    PARTITION_SUFFIX = ".db"
+
+    def _init_db(self, conn: sqlite3.Connection):
+        """Create the log schema in a partition with optimized settings."""
+        conn.execute(
             """
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                level TEXT NOT NULL,
+                command TEXT NOT NULL,
+                message TEXT NOT NULL,
+                metadata TEXT,
+                status TEXT,
+                duration REAL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
             )
+        """
+        )
+
+        # Create indexes for common queries
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON logs(timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_command ON logs(command)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_level ON logs(level)")
+
+        # Set pragmas for optimization
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=10000")
 
-            # Create indexes for common queries
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON logs(timestamp)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_command ON logs(command)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_level ON logs(level)")
+    def _partition_path(self, day: str) -> str:
+        """Get the file holding one day's logs.
+
+        Args:
+            day: Date in YYYY-MM-DD format
+        """
+        return os.path.join(
+            self.log_dir, f"{self.PARTITION_PREFIX}{day}{self.PARTITION_SUFFIX}"
+        )
 
-            # Set pragmas for optimization
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA cache_size=10000")
+    def _partitions(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """List day partitions overlapping a date range, newest first.
+
+        Args:
+            start_date: Optional inclusive start (ISO format)
+            end_date: Optional inclusive end (ISO format)
+
+        Returns:
+            List of (day, path) tuples
+        """
+        try:
+            names = os.listdir(self.log_dir)
+        except OSError:
+            return []
+        partitions = []
+        for name in names:
+            if not (
+                name.startswith(self.PARTITION_PREFIX)
+                and name.endswith(self.PARTITION_SUFFIX)
+            ):
+                continue
+            day = name[len(self.PARTITION_PREFIX) : -len(self.PARTITION_SUFFIX)]
+            if len(day) != 10:
+                continue
+            if start_date and day < start_date[:10]:
+                continue
+            if end_date and day > end_date[:10]:
+                continue
+            partitions.append((day, os.path.join(self.log_dir, name)))
+        partitions.sort(reverse=True)
+        return partitions
+
+    @staticmethod
+    def _unlink_db(path: str) -> None:
+        """Remove an SQLite file together with its WAL and shared memory files."""
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(path + suffix)
+            except FileNotFoundError:
+                pass
 
     @contextmanager
-    def _get_db(self):
-        """Get a database connection with automatic cleanup."""
+    def _get_db(self, path: Optional[str] = None):
+        """Get a database connection with automatic cleanup.
+
+        Args:
+            path: Partition file to open, defaults to the legacy database
+        """
+        path = path or self.db_path
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(path)
             conn.row_factory = sqlite3.Row
             yield conn
             conn.commit()
@@ -127,97 +233,202 @@ class QGitLogger:
             if conn:
                 conn.rollback()
             raise FileOperationError(
-                f"Database error: {str(e)}", filepath=self.db_path, operation="database"
+                f"Database error: {str(e)}", filepath=path, operation="database"
             )
         finally:
             if conn:
                 conn.close()
 
     def _start_background_processing(self):
-        """Start background processing of log queue using ResourceManager."""
+        """Start the writer thread that drains the log queue."""
+        self._writer = threading.Thread(
+            target=self._process_queue, name="qgit-log-writer", daemon=True
+        )
+        self._writer.start()
 
-        async def process_entries(entries):
-            """Process a batch of log entries using ResourceManager."""
-            try:
-                await self.resource_manager.perf_optimizer.run_io_bound(
-                    self._write_entries_to_db, entries
-                )
-            except Exception as e:
-                print(f"Error writing entries to database: {e}")
-
-        def process_queue():
-            """Main queue processing loop with improved error handling."""
+    def _process_queue(self):
+        """Block on the queue and write entries in coalesced batches.
+
+        A batch is written once it reaches BATCH_SIZE entries or its first
+        entry has waited BATCH_LATENCY seconds. Flush events queued by
+        :meth:`flush` are set after everything queued before them is written.
+        """
+        running = True
+        while running:
+            item = self._log_queue.get()
+            entries: List[LogEntry] = []
+            flushes: List[threading.Event] = []
+            deadline = time.monotonic() + self.BATCH_LATENCY
             while True:
+                if item is self._STOP:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    flushes.append(item)
+                    break
+                entries.append(item)
+                remaining = deadline - time.monotonic()
+                if len(entries) >= self.BATCH_SIZE or remaining <= 0:
+                    break
                 try:
-                    entries = []
-                    # Process up to 100 entries at a time
-                    for _ in range(100):
-                        try:
-                            entry = self._log_queue.get_nowait()
-                            entries.append(entry)
-                        except Empty:
-                            break
-
-                    if entries:
-                        # Use asyncio to process entries
-                        asyncio.run(process_entries(entries))
-                    else:
-                        # Use resource manager's optimized sleep
-                        asyncio.run(asyncio.sleep(0.1))
+                    item = self._log_queue.get(timeout=remaining)
+                except Empty:
+                    break
 
+            if entries:
+                try:
+                    self._write_entries_to_db(entries)
                 except Exception as e:
-                    print(f"Error in queue processing: {e}")
-                    asyncio.run(asyncio.sleep(1))
+                    print(f"Error writing entries to database: {e}")
+            for event in flushes:
+                event.set()
 
-        # Start processing thread
-        thread = threading.Thread(target=process_queue, daemon=True)
-        thread.start()
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+            self._writer_conn = None
 
     def _write_entries_to_db(self, entries: List[LogEntry]):
-        """Write entries to database with optimized batch processing."""
-        with self._get_db() as conn:
-            conn.executemany(
-                """
-                INSERT INTO logs 
-                (timestamp, level, command, message, metadata, status, duration)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                [
-                    (
-                        e.timestamp,
-                        e.level,
-                        e.command,
-                        e.message,
-                        json.dumps(e.metadata),
-                        e.status,
-                        e.duration,
+        """Write a batch of entries into their day partitions.
+
+        The writer keeps one persistent connection to the current day's
+        partition and reopens it only when the day changes.
+        """
+        by_day: Dict[str, List[LogEntry]] = {}
+        for e in entries:
+            by_day.setdefault(e.timestamp[:10], []).append(e)
+
+        for day, day_entries in sorted(by_day.items()):
+            if self._writer_day != day and self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+            if self._writer_conn is None:
+                self._writer_conn = sqlite3.connect(self._partition_path(day))
+                self._init_db(self._writer_conn)
+                self._writer_day = day
+            try:
+                with self._writer_conn:
+                    self._writer_conn.executemany(
+                        self._INSERT_SQL,
+                        [
+                            (
+                                e.timestamp,
+                                e.level,
+                                e.command,
+                                e.message,
+                                json.dumps(e.resolve_metadata(), default=str),
+                                e.status,
+                                e.duration,
+                            )
+                            for e in day_entries
+                        ],
                     )
-                    for e in entries
-                ],
-            )
+            except sqlite3.Error:
+                # Reconnect on the next batch in case the connection went bad
+                self._writer_conn.close()
+                self._writer_conn = None
+                raise
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every entry logged so far has been written.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the queue was flushed within the timeout
+        """
+        if not self._writer.is_alive():
+            return False
+        event = threading.Event()
+        self._log_queue.put(event)
+        return event.wait(timeout)
+
+    def close(self):
+        """Flush pending entries and stop the writer thread."""
+        if self._writer.is_alive():
+            self._log_queue.put(self._STOP)
+            self._writer.join(self.SHUTDOWN_TIMEOUT)
+
+    def set_level(self, level: str) -> None:
+        """Set the minimum level that gets recorded.
+
+        Args:
+            level: One of debug, info, warning, error or critical
+        """
+        self.min_level = self.LEVELS.get(level.lower(), self.LEVELS["info"])
+
+    def set_sampling(self, level: str, rate: float) -> None:
+        """Record only a fraction of entries at a level.
+
+        Args:
+            level: Level to sample
+            rate: Fraction of entries to keep, between 0 and 1
+
+        Raises:
+            ValueError: If the level is unknown
+        """
+        if level.lower() not in self.LEVELS:
+            raise ValueError(f"Unknown log level: {level}")
+        self.sample_rates[level.lower()] = min(max(rate, 0.0), 1.0)
+
+    def is_enabled_for(self, level: str) -> bool:
+        """Check whether entries at a level pass the level threshold.
+
+        Args:
+            level: Level to check
+
+        Returns:
+            True if entries at this level are recorded
+        """
+        return self.LEVELS.get(level, self.LEVELS["info"]) >= self.min_level
 
     def log(
         self,
         level: str,
         command: str,
         message: str,
-        metadata: Optional[Dict[str, Any]] = None,
+        metadata: Optional[
+            Union[Dict[str, Any], Callable[[], Dict[str, Any]]]
+        ] = None,
         status: str = "success",
         duration: float = 0.0,
     ):
-        """Log a qgit operation with memory-optimized metadata handling."""
+        """Log a qgit operation.
+
+        Entries below the level threshold or dropped by sampling cost only a
+        dict lookup. Metadata may be passed as a callable, which is invoked on
+        the background writer thread, so expensive fields are never built on
+        the caller's hot path.
+
+        Args:
+            level: Log level
+            command: Command being logged
+            message: Human-readable message
+            metadata: Metadata dict or a callable returning one
+            status: Operation status
+            duration: Operation duration in seconds
+        """
+        if not self.is_enabled_for(level):
+            return
+        rate = self.sample_rates.get(level)
+        if rate is not None and random.random() >= rate:
+            return
         entry = LogEntry(
             timestamp=datetime.now().isoformat(),
             level=level,
             command=command,
             message=message,
-            metadata=self.resource_manager.memory_manager.get_cached_data(str(metadata))
-            or metadata
-            or {},
+            metadata=metadata or {},
             status=status,
             duration=duration,
         )
-        self._log_queue.put(entry)
+        if self.overflow_policy == "block":
+            self._log_queue.put(entry)
+            return
+        try:
+            self._log_queue.put_nowait(entry)
+        except Full:
+            self.dropped += 1
 
     def get_logs(
         self,
@@ -239,6 +450,9 @@ class QGitLogger:
         Returns:
             List of log entries as dictionaries
         """
+        # Make entries logged by this process visible to the query
+        self.flush(timeout=1.0)
+
         query = "SELECT * FROM logs WHERE 1=1"
         params = []
 
@@ -259,12 +473,24 @@ class QGitLogger:
             params.append(end_date)
 
         query += " ORDER BY timestamp DESC LIMIT ?"
-        params.append(limit)
 
-        with self._get_db() as conn:
-            cursor = conn.execute(query, params)
-            rows = cursor.fetchall()
-            return [
+        # Partitions are disjoint days, so reading them newest first yields
+        # rows already in order; the legacy database predates all of them
+        paths = [path for _, path in self._partitions(start_date, end_date)]
+        if os.path.exists(self.db_path):
+            paths.append(self.db_path)
+
+        logs: List[Dict[str, Any]] = []
+        for path in paths:
+            if len(logs) >= limit:
+                break
+            with self._get_db(path) as conn:
+                try:
+                    rows = conn.execute(query, params + [limit - len(logs)]).fetchall()
+                except sqlite3.OperationalError:
+                    # Partition created but not yet initialized
+                    continue
+            logs.extend(
                 {
                     "timestamp": row["timestamp"],
                     "level": row["level"],
@@ -275,11 +501,15 @@ class QGitLogger:
                     "duration": row["duration"],
                 }
                 for row in rows
-            ]
+            )
+        return logs
 
     async def cleanup_old_logs(self, days: int = 30):
         """Clean up logs older than specified days.
 
+        Whole day partitions are unlinked, so retention never rewrites or
+        locks the partitions still being written.
+
         Args:
             days: Number of days of logs to keep
         """
@@ -288,9 +518,20 @@ class QGitLogger:
             - timedelta(days=days)
         ).isoformat()
 
-        with self._get_db() as conn:
-            conn.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff_date,))
-            conn.execute("VACUUM")  # Reclaim space
+        for day, path in self._partitions(end_date=cutoff_date):
+            if day < cutoff_date[:10]:
+                self._unlink_db(path)
+
+        # The legacy database goes once everything in it has expired
+        if os.path.exists(self.db_path):
+            with self._get_db(self.db_path) as conn:
+                try:
+                    newest = conn.execute("SELECT MAX(timestamp) FROM logs")
+                    newest = newest.fetchone()[0]
+                except sqlite3.OperationalError:
+                    newest = None
+            if newest is None or newest < cutoff_date:
+                self._unlink_db(self.db_path)
 
     async def optimize_storage(self):
         """Optimize database storage using resource manager."""
@@ -298,10 +539,12 @@ class QGitLogger:
             # Use resource manager to optimize cache
             await self.resource_manager.cache_manager.optimize_cache()
 
-            # Optimize database
-            with self._get_db() as conn:
-                conn.execute("PRAGMA optimize")
-                conn.execute("ANALYZE")
+            # Optimize the most recent partition, the one queried most often
+            partitions = self._partitions()
+            if partitions:
+                with self._get_db(partitions[0][1]) as conn:
+                    conn.execute("PRAGMA optimize")
+                    conn.execute("ANALYZE")
         except Exception as e:
             print(f"Error optimizing log storage: {e}")
 
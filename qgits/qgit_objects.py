@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""Read-only access to Git object metadata without spawning Git.
+
+This module memory-maps pack indexes and packfiles and decodes loose object
+headers directly, so object existence, type and size queries never fork a
+process and never inflate more than the first few bytes of an object.
+"""
+
+import mmap
+import os
+import re
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from qgits.qgit_errors import GitRepositoryError
+from qgits.qgit_git import GitObjectInfo
+
+# Pack object type numbers as stored in pack entry headers
+OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OFS_DELTA = 6
+REF_DELTA = 7
+
+# Compressed bytes fed to zlib per step when decoding object headers
+HEADER_CHUNK = 256
+
+
+def _read_text(path: str) -> Optional[str]:
+    """Read a small text file, returning None if it does not exist."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _inflate_prefix(chunks: Iterator[bytes], length: int) -> bytes:
+    """Inflate just enough of a zlib stream to produce ``length`` bytes.
+
+    Args:
+        chunks: Compressed input, consumed lazily
+        length: Number of decompressed bytes wanted
+
+    Returns:
+        Up to ``length`` decompressed bytes
+
+    Raises:
+        GitRepositoryError: If the stream is corrupt
+    """
+    decompressor = zlib.decompressobj()
+    output = b""
+    try:
+        for chunk in chunks:
+            output += decompressor.decompress(chunk, length - len(output))
+            if len(output) >= length or decompressor.eof:
+                break
+    except zlib.error as e:
+        raise GitRepositoryError(f"Corrupt object data: {str(e)}")
+    return output
+
+
+def _delta_sizes(data: bytes) -> Tuple[int, int]:
+    """Decode the base and result sizes from the start of a delta."""
+    sizes = []
+    pos = 0
+    for _ in range(2):
+        size = shift = 0
+        while True:
+            if pos >= len(data):
+                raise GitRepositoryError("Truncated delta header")
+            c = data[pos]
+            pos += 1
+            size |= (c & 0x7F) << shift
+            shift += 7
+            if not c & 0x80:
+                break
+        sizes.append(size)
+    return sizes[0], sizes[1]
+
+
+class PackIndex:
+    """Memory-mapped ``.idx`` file supporting version 1 and 2 layouts."""
+
+    V2_MAGIC = b"\377tOc"
+
+    def __init__(self, path: str, hash_size: int = 20):
+        self.path = path
+        self.hash_size = hash_size
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:4] == self.V2_MAGIC:
+            version = struct.unpack(">I", self._map[4:8])[0]
+            if version != 2:
+                self.close()
+                raise GitRepositoryError(f"Unsupported pack index version {version}")
+            self.version = 2
+            fanout_start = 8
+        else:
+            self.version = 1
+            fanout_start = 0
+
+        fanout_end = fanout_start + 1024
+        self._fanout = struct.unpack(">256I", self._map[fanout_start:fanout_end])
+        self.count = self._fanout[255]
+        table = fanout_end
+        if self.version == 2:
+            self._names = table
+            self._offsets = table + self.count * (hash_size + 4)
+            self._large_offsets = self._offsets + self.count * 4
+        else:
+            self._names = table + 4
+            self._entry_size = hash_size + 4
+
+    def _name(self, index: int) -> bytes:
+        """Get the binary object name stored at an index position."""
+        if self.version == 2:
+            start = self._names + index * self.hash_size
+        else:
+            start = self._names + index * self._entry_size
+        return self._map[start : start + self.hash_size]
+
+    def _offset(self, index: int) -> int:
+        """Get the pack offset stored at an index position."""
+        if self.version == 1:
+            start = self._names - 4 + index * self._entry_size
+            return struct.unpack(">I", self._map[start : start + 4])[0]
+        start = self._offsets + index * 4
+        offset = struct.unpack(">I", self._map[start : start + 4])[0]
+        if offset & 0x80000000:
+            start = self._large_offsets + (offset & 0x7FFFFFFF) * 8
+            offset = struct.unpack(">Q", self._map[start : start + 8])[0]
+        return offset
+
+    def find(self, name: bytes) -> Optional[int]:
+        """Find the pack offset of an object.
+
+        Args:
+            name: Binary object name
+
+        Returns:
+            The object's offset in the packfile, or None if absent
+        """
+        first = name[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._name(mid)
+            if current < name:
+                lo = mid + 1
+            elif current > name:
+                hi = mid
+            else:
+                return self._offset(mid)
+        return None
+
+    def __iter__(self) -> Iterator[Tuple[bytes, int]]:
+        """Iterate over (binary name, pack offset) pairs in name order."""
+        for index in range(self.count):
+            yield self._name(index), self._offset(index)
+
+    def close(self) -> None:
+        """Unmap the index file."""
+        self._map.close()
+
+
+class PackFile:
+    """Memory-mapped ``.pack`` file that decodes entry headers only."""
+
+    def __init__(self, path: str, index: PackIndex, store: "ObjectStore"):
+        self.path = path
+        self.index = index
+        self._store = store
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != b"PACK":
+            self.close()
+            raise GitRepositoryError(f"Not a packfile: {path}")
+        # Resolved object types keyed by offset, shared by delta chains
+        self._types: Dict[int, str] = {}
+
+    def _entry_header(self, offset: int) -> Tuple[int, int, int, object]:
+        """Decode a pack entry header.
+
+        Args:
+            offset: Offset of the entry in the packfile
+
+        Returns:
+            Tuple of (type number, size, data offset, delta base) where the
+            delta base is an offset for OFS deltas, a binary name for REF
+            deltas and None otherwise
+        """
+        data = self._map
+        c = data[offset]
+        type_num = (c >> 4) & 7
+        size = c & 0x0F
+        shift = 4
+        pos = offset + 1
+        while c & 0x80:
+            c = data[pos]
+            pos += 1
+            size |= (c & 0x7F) << shift
+            shift += 7
+
+        base: object = None
+        if type_num == OFS_DELTA:
+            c = data[pos]
+            pos += 1
+            distance = c & 0x7F
+            while c & 0x80:
+                c = data[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (c & 0x7F)
+            base = offset - distance
+        elif type_num == REF_DELTA:
+            base = data[pos : pos + self.index.hash_size]
+            pos += self.index.hash_size
+        return type_num, size, pos, base
+
+    def object_type(self, offset: int) -> Optional[str]:
+        """Resolve an entry's object type by following its delta chain.
+
+        Args:
+            offset: Offset of the entry in the packfile
+
+        Returns:
+            The object type name, or None if a REF delta base is missing
+        """
+        chain = []
+        object_type = None
+        while object_type is None:
+            object_type = self._types.get(offset)
+            if object_type is not None:
+                break
+            chain.append(offset)
+            type_num, _, _, base = self._entry_header(offset)
+            if type_num == OFS_DELTA:
+                offset = base
+            elif type_num == REF_DELTA:
+                info = self._store.info(base.hex(), need_size=False)
+                if info is None:
+                    return None
+                object_type = info.type
+            elif type_num in OBJECT_TYPES:
+                object_type = OBJECT_TYPES[type_num]
+            else:
+                raise GitRepositoryError(
+                    f"Invalid object type {type_num} in {self.path} at {offset}"
+                )
+        for entry in chain:
+            self._types[entry] = object_type
+        return object_type
+
+    def object_size(self, offset: int) -> int:
+        """Get an entry's uncompressed object size.
+
+        Non-delta sizes come straight from the entry header. For deltas only
+        the delta header is inflated to read the result size.
+
+        Args:
+            offset: Offset of the entry in the packfile
+
+        Returns:
+            The object size in bytes
+        """
+        type_num, size, pos, _ = self._entry_header(offset)
+        if type_num not in (OFS_DELTA, REF_DELTA):
+            return size
+        chunks = (
+            self._map[start : start + HEADER_CHUNK]
+            for start in range(pos, len(self._map), HEADER_CHUNK)
+        )
+        # Two varints of at most ten bytes each hold both delta sizes
+        return _delta_sizes(_inflate_prefix(chunks, 20))[1]
+
+    def close(self) -> None:
+        """Unmap the packfile and its index."""
+        self._map.close()
+        self.index.close()
+
+
+class ObjectStore:
+    """Zero-fork object metadata reader for a repository's object database.
+
+    Packs are memory-mapped lazily on first use and stay mapped until
+    :meth:`close` is called.
+    """
+
+    def __init__(self, objects_dir: str, hash_size: int = 20):
+        """Initialize the store.
+
+        Args:
+            objects_dir: Path to the ``objects`` directory
+            hash_size: Length of binary object names (20 for SHA-1, 32 for SHA-256)
+        """
+        self.objects_dir = objects_dir
+        self.hash_size = hash_size
+        self._packs: Optional[List[PackFile]] = None
+        self._alternates: Optional[List["ObjectStore"]] = None
+
+    @classmethod
+    def open(cls, path: Optional[str] = None) -> "ObjectStore":
+        """Open the object store of the repository containing a path.
+
+        Handles ``.git`` files of worktrees and submodules as well as
+        ``GIT_DIR`` and ``GIT_OBJECT_DIRECTORY`` overrides.
+
+        Args:
+            path: Directory inside the repository, defaults to the current one
+
+        Returns:
+            The repository's object store
+
+        Raises:
+            GitRepositoryError: If no repository is found
+        """
+        git_dir = os.environ.get("GIT_DIR")
+        if git_dir is None:
+            current = os.path.abspath(path or os.getcwd())
+            while True:
+                candidate = os.path.join(current, ".git")
+                if os.path.isdir(candidate):
+                    git_dir = candidate
+                    break
+                if os.path.isfile(candidate):
+                    pointer = _read_text(candidate) or ""
+                    if pointer.startswith("gitdir:"):
+                        git_dir = os.path.join(current, pointer[7:].strip())
+                        break
+                parent = os.path.dirname(current)
+                if parent == current:
+                    raise GitRepositoryError("Not in a Git repository")
+                current = parent
+
+        common_dir = git_dir
+        pointer = _read_text(os.path.join(git_dir, "commondir"))
+        if pointer:
+            common_dir = os.path.join(git_dir, pointer)
+
+        hash_size = 20
+        config = _read_text(os.path.join(common_dir, "config")) or ""
+        if re.search(r"^\s*objectformat\s*=\s*sha256\s*$", config, re.I | re.M):
+            hash_size = 32
+
+        objects_dir = os.environ.get("GIT_OBJECT_DIRECTORY") or os.path.join(
+            common_dir, "objects"
+        )
+        return cls(objects_dir, hash_size)
+
+    def __enter__(self) -> "ObjectStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def packs(self) -> List[PackFile]:
+        """Packfiles of this store, newest first."""
+        if self._packs is None:
+            pack_dir = os.path.join(self.objects_dir, "pack")
+            try:
+                names = os.listdir(pack_dir)
+            except OSError:
+                names = []
+            idx_paths = [
+                os.path.join(pack_dir, name)
+                for name in names
+                if name.endswith(".idx") and name[:-4] + ".pack" in names
+            ]
+            idx_paths.sort(key=lambda p: os.stat(p).st_mtime_ns, reverse=True)
+            self._packs = []
+            for idx_path in idx_paths:
+                index = PackIndex(idx_path, self.hash_size)
+                self._packs.append(PackFile(idx_path[:-4] + ".pack", index, self))
+        return self._packs
+
+    @property
+    def alternates(self) -> List["ObjectStore"]:
+        """Object stores listed in ``objects/info/alternates``."""
+        if self._alternates is None:
+            self._alternates = []
+            listing = _read_text(os.path.join(self.objects_dir, "info", "alternates"))
+            for line in (listing or "").splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    alternate = os.path.join(self.objects_dir, line)
+                    self._alternates.append(ObjectStore(alternate, self.hash_size))
+        return self._alternates
+
+    def _loose_path(self, oid: str) -> str:
+        return os.path.join(self.objects_dir, oid[:2], oid[2:])
+
+    def _loose_info(self, oid: str, path: str) -> Optional[GitObjectInfo]:
+        """Decode the header of a loose object file.
+
+        Args:
+            oid: Hex object name
+            path: Path to the loose object file
+
+        Returns:
+            The object's type and size, or None if the file is missing
+        """
+        try:
+            with open(path, "rb") as f:
+                chunks = iter(lambda: f.read(HEADER_CHUNK), b"")
+                # "<type> <size>\0" fits comfortably in 32 bytes
+                header = _inflate_prefix(chunks, 32)
+        except OSError:
+            return None
+        type_name, _, rest = header.partition(b" ")
+        size, nul, _ = rest.partition(b"\0")
+        if not nul or not size.isdigit():
+            raise GitRepositoryError(f"Corrupt loose object header: {oid}")
+        return GitObjectInfo(oid=oid, type=type_name.decode("ascii"), size=int(size))
+
+    def info(self, oid: str, need_size: bool = True) -> Optional[GitObjectInfo]:
+        """Look up an object's type and size.
+
+        Args:
+            oid: Full hex object name
+            need_size: Whether to compute the size of deltified objects,
+                which are reported with size -1 otherwise
+
+        Returns:
+            The object's metadata, or None if it does not exist
+
+        Raises:
+            GitRepositoryError: If the object data is corrupt
+        """
+        oid = oid.lower()
+        try:
+            name = bytes.fromhex(oid)
+        except ValueError:
+            return None
+        if len(name) != self.hash_size:
+            return None
+
+        for pack in self.packs:
+            offset = pack.index.find(name)
+            if offset is not None:
+                object_type = pack.object_type(offset)
+                if object_type is None:
+                    continue
+                size = pack.object_size(offset) if need_size else -1
+                return GitObjectInfo(oid=oid, type=object_type, size=size)
+
+        info = self._loose_info(oid, self._loose_path(oid))
+        if info is not None:
+            return info
+        for alternate in self.alternates:
+            info = alternate.info(oid, need_size)
+            if info is not None:
+                return info
+        return None
+
+    def exists(self, oid: str) -> bool:
+        """Check whether an object exists without decoding its size."""
+        return self.info(oid, need_size=False) is not None
+
+    def iter_objects(
+        self, object_type: Optional[str] = None
+    ) -> Iterator[GitObjectInfo]:
+        """Iterate over every object in the store, including alternates.
+
+        Types are resolved from entry headers alone, so objects of other
+        types are skipped before any data is inflated.
+
+        Args:
+            object_type: Only yield objects of this type, e.g. "blob"
+
+        Yields:
+            Metadata for each distinct object
+        """
+        seen: Set[bytes] = set()
+        for pack in self.packs:
+            for name, offset in pack.index:
+                if name in seen:
+                    continue
+                seen.add(name)
+                found_type = pack.object_type(offset)
+                if found_type is None or (object_type and found_type != object_type):
+                    continue
+                yield GitObjectInfo(
+                    oid=name.hex(), type=found_type, size=pack.object_size(offset)
+                )
+
+        hex_digits = set("0123456789abcdef")
+        try:
+            fan_dirs = os.scandir(self.objects_dir)
+        except OSError:
+            fan_dirs = None
+        if fan_dirs is not None:
+            with fan_dirs:
+                for fan_dir in fan_dirs:
+                    if len(fan_dir.name) != 2 or not set(fan_dir.name) <= hex_digits:
+                        continue
+                    with os.scandir(fan_dir.path) as entries:
+                        for entry in entries:
+                            oid = fan_dir.name + entry.name
+                            try:
+                                name = bytes.fromhex(oid)
+                            except ValueError:
+                                continue
+                            if name in seen or len(name) != self.hash_size:
+                                continue
+                            seen.add(name)
+                            info = self._loose_info(oid, entry.path)
+                            if info is None:
+                                continue
+                            if object_type and info.type != object_type:
+                                continue
+                            yield info
+
+        for alternate in self.alternates:
+            for info in alternate.iter_objects(object_type):
+                name = bytes.fromhex(info.oid)
+                if name not in seen:
+                    seen.add(name)
+                    yield info
+
+    def close(self) -> None:
+        """Unmap all packfiles, including those of alternates."""
+        for pack in self._packs or []:
+            pack.close()
+        for alternate in self._alternates or []:
+            alternate.close()
+        self._packs = None
+        self._alternates = None
@@ -6,6 +6,7 @@ from datetime import datetime
 
 from qgits.qgit_core import run_command
 from qgits.qgit_errors import GitCommandError, GitStateError
+from qgits.qgit_graph import Reachability
 from qgits.qgit_logger import logger
 from qgits.qgit_benedict import (
     scan_repository,
@@ -18,6 +19,9 @@ from qgits.qgit_benedict import (
     COLORS,
 )
 
+# Categories whose files block a push unless it is forced
+BLOCKING_CATEGORIES = ("secrets",)
+
 def verify_branch() -> bool:
     """Verify we're on main branch and up to date.
     
@@ -29,7 +33,7 @@ def verify_branch() -> bool:
     """
     try:
         # Check current branch
-        current = run_command("git rev-parse --abbrev-ref HEAD").strip()
+        current = run_command("git rev-parse --abbrev-ref HEAD", cache=True).strip()
         if current != "main":
             raise GitStateError(
                 f"Not on main branch. Currently on: {current}\n"
@@ -39,9 +43,8 @@ def verify_branch() -> bool:
         # Fetch to ensure we have latest
         run_command("git fetch origin main")
         
-        # Check if we're behind
-        behind = run_command("git rev-list HEAD..origin/main --count").strip()
-        if int(behind) > 0:
+        # Check if we're behind: origin/main must already be in our history
+        if not Reachability.is_ancestor("origin/main", "HEAD"):
             raise GitStateError(
                 "Local main is behind origin/main.\n"
                 "Please pull latest changes first with: git pull origin main"
@@ -52,8 +55,15 @@ def verify_branch() -> bool:
     except GitCommandError as e:
         raise GitStateError(f"Branch verification failed: {str(e)}")
 
-def check_security() -> Tuple[bool, Dict[str, List[Dict[str, Any]]]]:
+def check_security(
+    source: str = "push",
+) -> Tuple[bool, Dict[str, List[Dict[str, Any]]]]:
     """Run security checks for risky files.
+
+    Args:
+        source: "push" to scan only the files the outgoing commits add or
+            modify, "index" to scan what git tracks or would track, or
+            "filesystem" to walk the whole working tree
     
     Returns:
         Tuple of (is_safe, scan_results)
@@ -66,7 +76,7 @@ def check_security() -> Tuple[bool, Dict[str, List[Dict[str, Any]]]]:
     
     try:
         # Run repository scan
-        scan_results, total_files = scan_repository()
+        scan_results, total_files = scan_repository(source=source)
         
         # Check if any risky files were found
         has_risky_files = any(files for files in scan_results.values())
@@ -76,11 +86,71 @@ def check_security() -> Tuple[bool, Dict[str, List[Dict[str, Any]]]]:
             return True, scan_results
             
         print(_format_warning("\nRisky files detected in repository."))
+        if source == "push":
+            print(
+                _format_warning(
+                    "These files are in the commits about to be pushed; untracking "
+                    "them does not remove them from those commits."
+                )
+            )
         return False, scan_results
         
     except Exception as e:
         raise GitStateError(f"Security check failed: {str(e)}")
 
+def confirm_outgoing(
+    scan_results: Dict[str, List[Dict[str, Any]]], force: bool = False
+) -> bool:
+    """Decide whether flagged files in the outgoing commits may be pushed.
+
+    Untracking cannot take files back out of commits, so the only choices
+    are pushing them or cancelling. Possible secrets block the push unless
+    it is forced; other categories, such as large files or build output,
+    only need a confirmation.
+
+    Args:
+        scan_results: Results of a push-scoped security scan
+        force: Whether to push without asking, even with secrets
+
+    Returns:
+        True if the push may go ahead
+    """
+    blocking = [
+        match
+        for category in BLOCKING_CATEGORIES
+        for match in scan_results.get(category, [])
+    ]
+    if force:
+        print(_format_warning("\n--force given, pushing the flagged files anyway."))
+        allowed = True
+    elif blocking:
+        print(
+            _format_error(
+                f"\n{len(blocking)} possible secret(s) in the outgoing commits. "
+                "Rewrite the outgoing history (e.g. 'qgit cancel') or push with "
+                "--force."
+            )
+        )
+        allowed = False
+    else:
+        choice = input("\nPush these files anyway? (y/N): ").strip().lower()
+        allowed = choice == "y"
+
+    logger.log(
+        level="warning",
+        command="shove",
+        message="Push allowed with flagged files" if allowed else "Push refused",
+        metadata={
+            "files": sum(len(files) for files in scan_results.values()),
+            "blocking": len(blocking),
+            "force": force,
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+    if not allowed:
+        print("\nPush cancelled.")
+    return allowed
+
 def handle_risky_files(scan_results: Dict[str, List[Dict[str, Any]]]) -> bool:
     """Handle detected risky files by prompting for action.
     
@@ -151,8 +221,12 @@ def push_to_main() -> bool:
     except GitCommandError as e:
         raise GitStateError(f"Push failed: {str(e)}")
 
-def execute_shove() -> bool:
+def execute_shove(source: str = "push", force: bool = False) -> bool:
     """Execute the shove command workflow.
+
+    Args:
+        source: Scan source for the security check, see check_security
+        force: Whether to push even if the security check flags files
     
     Returns:
         True if operation was successful
@@ -163,11 +237,14 @@ def execute_shove() -> bool:
             return False
             
         # Step 2: Run security checks
-        is_safe, scan_results = check_security()
+        is_safe, scan_results = check_security(source)
         
         # Step 3: Handle any risky files if found
         if not is_safe:
-            if not handle_risky_files(scan_results):
+            if source == "push":
+                if not confirm_outgoing(scan_results, force):
+                    return False
+            elif not force and not handle_risky_files(scan_results):
                 return False
                 
         # Step 4: Push to origin main
@@ -67,7 +67,9 @@ def create_snapshot(
         if include_untracked:
             GitCommand.stage_files()
         else:
-            GitCommand.stage_files(GitCommand.get_modified_files())
+            modified = GitCommand.get_modified_files()
+            if modified:
+                GitCommand.stage_files(modified)
 
         # Create commit
         snapshot_message = message or "Temporary snapshot"
@@ -120,15 +122,14 @@ def list_snapshots() -> None:
         for tag in tags:
             try:
                 # Get tag details
-                tag_info = GitCommand.run(f"git show-ref -d {tag}").split()[0]
-                commit_info = GitCommand.get_commit_info(tag_info)
+                commit_info = GitCommand.get_commit_info(f"refs/tags/{tag}")
 
                 # Extract snapshot ID from message
                 snapshot_id = commit_info["message"].split("(")[-1].rstrip(")")
 
                 # Get expiry info if available
                 try:
-                    expiry = GitCommand.run(f"git tag -l --format='%(contents)' {tag}")
+                    expiry = GitCommand.get_tag_contents(tag)
                     if "Expires:" in expiry:
                         expiry_date = expiry.split("Expires:")[1].strip()
                         expiry_info = f"(Expires: {expiry_date})"
@@ -183,13 +184,12 @@ def cleanup_snapshots(days: int = 30) -> None:
         for tag in tags:
             try:
                 # Get tag creation date
-                tag_info = GitCommand.run(f"git show-ref -d {tag}").split()[0]
-                commit_info = GitCommand.get_commit_info(tag_info)
+                commit_info = GitCommand.get_commit_info(f"refs/tags/{tag}")
                 tag_date = commit_info["timestamp"]
 
                 # Check expiry info
                 try:
-                    expiry = GitCommand.run(f"git tag -l --format='%(contents)' {tag}")
+                    expiry = GitCommand.get_tag_contents(tag)
                     if "Expires:" in expiry:
                         expiry_date = datetime.strptime(
                             expiry.split("Expires:")[1].strip(), "%Y-%m-%d"
@@ -266,7 +266,7 @@ def restore_snapshot(snapshot_id: str) -> bool:
 
         # Check if snapshot has expired
         try:
-            expiry = GitCommand.run(f"git tag -l --format='%(contents)' {tag}")
+            expiry = GitCommand.get_tag_contents(tag)
             if "Expires:" in expiry:
                 expiry_date = datetime.strptime(
                     expiry.split("Expires:")[1].strip(), "%Y-%m-%d"
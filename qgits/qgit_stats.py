@@ -1,303 +1,2238 @@
 #!/usr/bin/env python3
-"""QGit statistics module for generating repository analytics and insights."""
+"""QGit statistics module for generating repository analytics and insights.
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
-from collections import defaultdict
+All statistics are computed from a single streaming ``git log`` pass. Each
+commit is parsed once into a :class:`CommitRecord`, the records are packed
+into a columnar :class:`CommitTable`, and that table is shared by a set of
+pluggable aggregators, so asking for commit, churn and team stats together
+costs one history walk instead of one per report.
+"""
+
+import calendar
+import hashlib
+import os
+import re
+import shlex
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import numpy as np
 
 from qgits.qgit_git import GitCommand
+from qgits.qgit_graph import Reachability
 from qgits.qgit_errors import GitCommandError
 from qgits.qgit_logger import logger
+from internal.resource_manager import CoreType
+
+# Commit headers start with a record separator and use unit separators
+# between fields; with -z every numstat entry is NUL-terminated
+LOG_FORMAT = "--format=%x1e%H%x1f%an%x1f%ae%x1f%at%x1f%s"
+
+# Histories shorter than this are mined by a single git process
+PARALLEL_MIN_COMMITS = 2000
+
+# Ranges handed out per worker, so one slow range cannot idle the others
+RANGES_PER_WORKER = 4
+
+# Leaderboards over more numstat rows than this are approximated by default
+LEADERBOARD_EXACT_ROWS = 2_000_000
+
+# Numstat rows folded into the approximate leaderboard per batch
+LEADERBOARD_BATCH_ROWS = 500_000
+
+# Files reported per author by get_leaderboard_stats
+LEADERBOARD_TOP_FILES = 10
+
+# Register index bits of HyperLogLog sketches (4096 registers, ~1.6% error)
+HLL_PRECISION = 12
+
+# Proleptic ordinal of 1970-01-01, for turning day numbers into dates
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@dataclass
+class CommitRecord:
+    """A single commit as seen by the stats aggregators."""
+
+    oid: str
+    author: str
+    email: str
+    timestamp: int
+    subject: str
+    # (additions, deletions, path); counts are None for binary files
+    numstat: List[Tuple[Optional[int], Optional[int], str]] = field(
+        default_factory=list
+    )
+
+
+def iter_commit_records(
+    numstat: bool = True,
+    extra_args: Optional[List[str]] = None,
+    revisions: Optional[List[str]] = None,
+) -> Iterator[CommitRecord]:
+    """Stream commits from a single ``git log`` walk.
 
-def get_commit_stats(author: Optional[str] = None, 
-                    start_date: Optional[str] = None,
-                    end_date: Optional[str] = None) -> Dict[str, Any]:
-    """Get commit statistics for the repository.
-    
     Args:
-        author: Optional author to filter commits
-        start_date: Optional start date in YYYY-MM-DD format
-        end_date: Optional end date in YYYY-MM-DD format
-        
+        numstat: Whether to include per-file line counts
+        extra_args: Additional ``git log`` arguments such as filters
+        revisions: Optional commit ids to show, in order, instead of walking
+            the history
+
+    Yields:
+        One record per commit, newest first
+
+    Raises:
+        GitCommandError: If the history cannot be read
+    """
+    cmd = ["git", "log", "-z", LOG_FORMAT]
+    if numstat:
+        cmd.append("--numstat")
+    if revisions is not None:
+        cmd.extend(["--no-walk=unsorted", "--stdin"])
+    cmd.extend(extra_args or [])
+
+    record = None
+    tokens = GitCommand.stream(
+        cmd,
+        separator="\0",
+        input=None if revisions is None else "\n".join(revisions) + "\n",
+    )
+    for token in tokens:
+        if token.startswith("\x1e"):
+            if record is not None:
+                yield record
+            oid, author, email, timestamp, subject = token[1:].split("\x1f", 4)
+            record = CommitRecord(oid, author, email, int(timestamp), subject)
+            continue
+
+        token = token.lstrip("\n")
+        if not token or record is None:
+            continue
+        additions, deletions, path = token.split("\t", 2)
+        if not path:
+            # Renames are followed by separate old and new path entries
+            next(tokens, "")
+            path = next(tokens, "")
+        record.numstat.append(
+            (
+                int(additions) if additions.isdigit() else None,
+                int(deletions) if deletions.isdigit() else None,
+                path,
+            )
+        )
+
+    if record is not None:
+        yield record
+
+
+def stats_workers() -> int:
+    """Get the number of processes used to mine history.
+
+    Defaults to every core the resource manager allocates; the
+    ``QGIT_STATS_WORKERS`` environment variable overrides it.
+
     Returns:
-        Dictionary containing commit statistics
+        Number of worker processes, at least 1
+    """
+    try:
+        return max(1, int(os.environ["QGIT_STATS_WORKERS"]))
+    except (KeyError, ValueError):
+        cores = logger.resource_manager.get_core_allocation
+        return cores(CoreType.PERFORMANCE) + cores(CoreType.EFFICIENCY)
+
+
+def _mine_range(
+    revisions: List[str], numstat: bool, pathspec: List[str]
+) -> List[CommitRecord]:
+    """Mine one range of commits in a worker thread."""
+    return list(iter_commit_records(numstat, pathspec, revisions))
+
+
+def mine_commit_records(
+    numstat: bool = True,
+    extra_args: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+) -> Iterator[CommitRecord]:
+    """Stream commits like :func:`iter_commit_records`, mining in parallel.
+
+    Numstat output is dominated by git's diff work, so large walks are
+    split up. The commits are listed once with ``git rev-list``, which
+    computes no diffs, and the list is cut into contiguous ranges. Each
+    range is shown by its own ``git log`` in a thread pool, with at most
+    ``workers`` ranges mined ahead of the caller. Ranges are yielded in
+    list order, so the output matches a single walk exactly.
+
+    Args:
+        numstat: Whether to include per-file line counts
+        extra_args: Additional ``git log`` arguments such as filters
+        workers: Number of concurrent ``git log`` processes, defaults
+            to :func:`stats_workers`
+
+    Yields:
+        One record per commit, newest first
+
+    Raises:
+        GitCommandError: If the history cannot be read
     """
+    extra_args = list(extra_args or [])
+    workers = stats_workers() if workers is None else workers
+    if not numstat or workers < 2:
+        yield from iter_commit_records(numstat, extra_args)
+        return
+
+    # Options before "--" select commits, anything after limits the diffs
+    split = extra_args.index("--") if "--" in extra_args else len(extra_args)
+    selection, pathspec = extra_args[:split], extra_args[split:]
+    if all(arg.startswith("-") for arg in selection):
+        selection.append("HEAD")
+    commits = list(GitCommand.stream(["git", "rev-list", *selection, *pathspec]))
+    commits = [oid for oid in commits if oid]
+    if len(commits) < PARALLEL_MIN_COMMITS:
+        yield from iter_commit_records(numstat, pathspec, commits)
+        return
+
+    size = -(-len(commits) // (workers * RANGES_PER_WORKER))
+    ranges = [commits[i : i + size] for i in range(0, len(commits), size)]
+    logger.log(
+        level="info",
+        command="stats",
+        message="Mining history in parallel",
+        metadata={"commits": len(commits), "ranges": len(ranges), "workers": workers},
+    )
+    # The diffs are computed by the git subprocesses, so threads suffice.
+    # Only a window of ranges is in flight, so at most that many mined
+    # ranges are held in memory however slowly the caller consumes them.
+    workers = min(workers, len(ranges))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending = iter(ranges)
+    window: Deque[Future] = deque(
+        pool.submit(_mine_range, chunk, numstat, pathspec)
+        for chunk in islice(pending, workers)
+    )
     try:
-        # Build git log command with filters
-        cmd = ["git log", "--pretty=format:%H|%an|%ae|%at|%s"]
-        
+        while window:
+            records = window.popleft().result()
+            chunk = next(pending, None)
+            if chunk is not None:
+                window.append(pool.submit(_mine_range, chunk, numstat, pathspec))
+            yield from records
+            del records
+    finally:
+        # Ranges not started yet are dropped when the caller stops early
+        for future in window:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def _local_seconds(timestamps: np.ndarray) -> np.ndarray:
+    """Shift UTC timestamps to local wall-clock seconds.
+
+    UTC offsets are sampled once per day across the covered range and DST
+    transitions are located by bisection, so the per-commit work is a single
+    ``searchsorted`` instead of a ``datetime`` per commit.
+
+    Args:
+        timestamps: UTC timestamps in seconds
+
+    Returns:
+        Local timestamps as int64, such that ``// 86400`` gives the local day
+    """
+    if not len(timestamps):
+        return timestamps.astype(np.int64)
+
+    def offset(t: int) -> int:
+        return calendar.timegm(time.localtime(t)) - t
+
+    start, end = int(timestamps.min()), int(timestamps.max())
+    changes = [start]
+    offsets = [offset(start)]
+    for t in range(start + 86400, end + 86400, 86400):
+        current = offset(min(t, end))
+        if current != offsets[-1]:
+            # Bisect to the first second using the new offset
+            lo, hi = t - 86400, min(t, end)
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if offset(mid) == offsets[-1]:
+                    lo = mid
+                else:
+                    hi = mid
+            changes.append(hi)
+            offsets.append(current)
+    index = np.searchsorted(np.array(changes), timestamps, side="right") - 1
+    return timestamps + np.array(offsets, dtype=np.int64)[index]
+
+
+class CommitTable:
+    """Columnar commit history for vectorized aggregation.
+
+    Commits are stored as parallel arrays (int64 timestamps, int32 author
+    identity ids) and numstat rows as int32 arrays keyed by commit row and
+    interned file id, which costs tens of bytes per commit instead of a dict
+    per commit.
+    """
+
+    def __init__(
+        self,
+        oids: np.ndarray,
+        timestamps: np.ndarray,
+        identity_ids: np.ndarray,
+        identities: List[Tuple[str, str]],
+        file_commits: np.ndarray,
+        file_ids: np.ndarray,
+        additions: np.ndarray,
+        deletions: np.ndarray,
+        paths: List[str],
+    ):
+        """Initialize the table.
+
+        Args:
+            oids: Commit ids as fixed-width bytes, one per commit row
+            timestamps: Author timestamps, one per commit row
+            identity_ids: Index into ``identities`` for each commit row
+            identities: Interned (author name, email) pairs
+            file_commits: Commit row of each numstat row
+            file_ids: Index into ``paths`` for each numstat row
+            additions: Added lines per numstat row, -1 for binary files
+            deletions: Deleted lines per numstat row, -1 for binary files
+            paths: Interned file paths
+        """
+        self.oids = oids
+        self.timestamps = timestamps.astype(np.int64, copy=False)
+        self.identity_ids = identity_ids.astype(np.int32, copy=False)
+        self.identities = identities
+        self.file_commits = file_commits.astype(np.int32, copy=False)
+        self.file_ids = file_ids.astype(np.int32, copy=False)
+        self.additions = additions.astype(np.int32, copy=False)
+        self.deletions = deletions.astype(np.int32, copy=False)
+        self.paths = paths
+
+        # Authors are reported by name, so identities map onto name ids
+        name_ids: Dict[str, int] = {}
+        self.authors: List[str] = []
+        for name, _ in identities:
+            if name not in name_ids:
+                name_ids[name] = len(self.authors)
+                self.authors.append(name)
+        self.identity_authors = np.array(
+            [name_ids[name] for name, _ in identities], dtype=np.int32
+        )
+        self.author_ids = self.identity_authors[self.identity_ids]
+        self._local: Optional[np.ndarray] = None
+        self._path_hashes: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_records(cls, records: Iterable[CommitRecord]) -> "CommitTable":
+        """Build a table from a stream of commit records.
+
+        Args:
+            records: Commit records, e.g. from :func:`iter_commit_records`
+
+        Returns:
+            The columnar table
+        """
+        oids: List[str] = []
+        timestamps = array("q")
+        identity_ids = array("i")
+        file_commits = array("i")
+        file_ids = array("i")
+        additions = array("i")
+        deletions = array("i")
+        identity_index: Dict[Tuple[str, str], int] = {}
+        path_index: Dict[str, int] = {}
+
+        for row, record in enumerate(records):
+            identity = (record.author, record.email)
+            oids.append(record.oid)
+            timestamps.append(record.timestamp)
+            identity_ids.append(
+                identity_index.setdefault(identity, len(identity_index))
+            )
+            for added, deleted, path in record.numstat:
+                file_commits.append(row)
+                file_ids.append(path_index.setdefault(path, len(path_index)))
+                additions.append(-1 if added is None else added)
+                deletions.append(-1 if deleted is None else deleted)
+
+        return cls(
+            np.array(oids, dtype="S"),
+            np.frombuffer(timestamps, dtype=np.int64),
+            np.frombuffer(identity_ids, dtype=np.int32),
+            list(identity_index),
+            np.frombuffer(file_commits, dtype=np.int32),
+            np.frombuffer(file_ids, dtype=np.int32),
+            np.frombuffer(additions, dtype=np.int32),
+            np.frombuffer(deletions, dtype=np.int32),
+            list(path_index),
+        )
+
+    def local_seconds(self) -> np.ndarray:
+        """Get commit timestamps shifted to local time, computed once."""
+        if self._local is None:
+            self._local = _local_seconds(self.timestamps)
+        return self._local
+
+    def local_days(self) -> np.ndarray:
+        """Get the local calendar day number of each commit."""
+        return self.local_seconds() // 86400
+
+    def valid_rows(self) -> np.ndarray:
+        """Get a mask of numstat rows with line counts (not binary)."""
+        return (self.additions >= 0) & (self.deletions >= 0)
+
+    def path_hashes(self) -> np.ndarray:
+        """Get the 64-bit sketch hash of each path, computed once."""
+        if self._path_hashes is None:
+            self._path_hashes = _hash64(self.paths)
+        return self._path_hashes
+
+    def path_ranks(self) -> np.ndarray:
+        """Get each path's position in sorted order, for stable tie-breaks."""
+        ranks = np.empty(len(self.paths), dtype=np.int64)
+        ranks[np.argsort(np.array(self.paths, dtype=str), kind="stable")] = np.arange(
+            len(self.paths)
+        )
+        return ranks
+
+
+def _hash64(values: Iterable[str]) -> np.ndarray:
+    """Hash strings to stable 64-bit values for distinct-count sketches."""
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+            )
+            for value in values
+        ],
+        dtype=np.uint64,
+    )
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Get the bit length of each unsigned 64-bit value."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        # 32-bit halves convert to float64 exactly, so floor(log2) is exact
+        return np.where(
+            high > 0,
+            np.floor(np.log2(high)) + 33,
+            np.where(low > 0, np.floor(np.log2(low)) + 1, 0),
+        ).astype(np.int64)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with ``2 ** precision`` registers.
+
+    The relative error is about ``1.04 / sqrt(2 ** precision)``, 1.6% at the
+    default precision, in a fixed 4 KiB regardless of how many items were
+    added. Sketches of the same precision merge by taking the register-wise
+    maximum, so counts over time buckets or parallel workers combine
+    without revisiting the items.
+    """
+
+    def __init__(
+        self, precision: int = HLL_PRECISION, registers: Optional[np.ndarray] = None
+    ):
+        """Initialize the sketch.
+
+        Args:
+            precision: Number of hash bits that select a register
+            registers: Optional existing register values to adopt
+        """
+        self.precision = precision
+        if registers is None:
+            registers = np.zeros(1 << precision, dtype=np.uint8)
+        self.registers = registers
+
+    @staticmethod
+    def split(
+        hashes: np.ndarray, precision: int = HLL_PRECISION
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Split hashes into register indexes and register values.
+
+        Args:
+            hashes: 64-bit item hashes
+            precision: Number of hash bits that select a register
+
+        Returns:
+            Tuple of (register index, rank of the first set bit in the rest)
+        """
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+        rank = (64 - precision) - _bit_length(rest) + 1
+        return index, rank.astype(np.uint8)
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Add item hashes to the sketch."""
+        index, rank = self.split(hashes, self.precision)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Merge another sketch of the same precision into this one."""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Estimate the number of distinct items added."""
+        return int(round(float(self.estimate(self.registers[np.newaxis])[0])))
+
+    @staticmethod
+    def estimate(registers: np.ndarray) -> np.ndarray:
+        """Estimate distinct counts for a stack of register arrays.
+
+        Args:
+            registers: Array of shape (sketches, 2 ** precision)
+
+        Returns:
+            One estimate per sketch
+        """
+        m = registers.shape[1]
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+        zeros = (registers == 0).sum(axis=1)
+        # Linear counting is more accurate while many registers are empty
+        with np.errstate(divide="ignore"):
+            linear = m * np.log(m / np.maximum(zeros, 1))
+        return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def _distinct_counts(
+    groups: np.ndarray,
+    items: np.ndarray,
+    n_groups: int,
+    item_hashes: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Count distinct items per group, exactly or with HyperLogLog.
+
+    Args:
+        groups: Group id of each occurrence
+        items: Item id of each occurrence
+        n_groups: Number of groups
+        item_hashes: Hash of each item id; when given, counts are estimated
+            in ``n_groups`` sketches instead of materializing every pair
+
+    Returns:
+        Distinct item count per group
+    """
+    groups = groups.astype(np.int64)
+    if item_hashes is None:
+        width = int(items.max()) + 1 if len(items) else 1
+        pairs = np.unique(groups * width + items)
+        return np.bincount(pairs // width, minlength=n_groups)
+
+    index, rank = HyperLogLog.split(item_hashes[items])
+    registers = np.zeros((n_groups, 1 << HLL_PRECISION), dtype=np.uint8)
+    np.maximum.at(registers.reshape(-1), groups * (1 << HLL_PRECISION) + index, rank)
+    return np.rint(HyperLogLog.estimate(registers)).astype(np.int64)
+
+
+# Directory key of the per-(day, identity) commit totals in a rollup cube
+ROLLUP_TOTAL = -1
+
+# Sparse HyperLogLog registers of the files touched per (identity, day)
+SKETCH_DTYPE = np.dtype(
+    [("identity", np.int64), ("day", np.int64), ("index", np.int64), ("rank", np.uint8)]
+)
+
+
+def _top_level_dir(path: str) -> str:
+    """Get the top-level directory of a path, "." for files at the root."""
+    head, sep, _ = path.partition("/")
+    return head if sep else "."
+
+
+class RollupCube:
+    """Pre-aggregated commit activity by day, author and top-level directory.
+
+    Each cell holds the commits, additions and deletions of one author
+    identity on one local day, either overall or within one top-level
+    directory. Cells are sorted by (identity, directory, day) with running
+    sums, so a date range costs two binary searches per identity instead of
+    a history walk.
+
+    Distinct files cannot be summed across days, so each (identity, day)
+    also keeps the non-empty registers of a :class:`HyperLogLog` sketch of
+    the files it touched. A window query merges the registers of the days
+    in range into one sketch.
+    """
+
+    def __init__(
+        self,
+        identities: List[Tuple[str, str]],
+        dirs: List[str],
+        days: np.ndarray,
+        identity_ids: np.ndarray,
+        dir_ids: np.ndarray,
+        commits: np.ndarray,
+        additions: np.ndarray,
+        deletions: np.ndarray,
+        sketches: Optional[np.ndarray] = None,
+    ):
+        """Initialize the cube.
+
+        Args:
+            identities: Interned (author name, email) pairs
+            dirs: Interned top-level directories
+            days: Local day number of each cell
+            identity_ids: Index into ``identities`` of each cell
+            dir_ids: Index into ``dirs`` of each cell, or ``ROLLUP_TOTAL``
+                for the cell covering the whole commit
+            commits: Commit count of each cell
+            additions: Added lines of each cell
+            deletions: Deleted lines of each cell
+            sketches: Optional ``SKETCH_DTYPE`` registers of touched files
+        """
+        self.identities = identities
+        self.dirs = dirs
+        order = np.lexsort((days, dir_ids, identity_ids))
+        self.days = days.astype(np.int64)[order]
+        self.identity_ids = identity_ids.astype(np.int64)[order]
+        self.dir_ids = dir_ids.astype(np.int64)[order]
+        self.commits = commits.astype(np.int64)[order]
+        self.additions = additions.astype(np.int64)[order]
+        self.deletions = deletions.astype(np.int64)[order]
+
+        # Cells of one (identity, directory) segment share a key prefix, so
+        # a day range inside a segment is one searchsorted on these keys
+        self._segments = self.identity_ids * (len(dirs) + 1) + self.dir_ids + 1
+        self._base = int(self.days.min()) if len(self.days) else 0
+        self._span = int(self.days.max()) - self._base + 2 if len(self.days) else 1
+        self._keys = self._segments * self._span + self.days - self._base
+        self._prefix = {
+            name: np.concatenate(([0], np.cumsum(getattr(self, name))))
+            for name in ("commits", "additions", "deletions")
+        }
+
+        if sketches is None:
+            sketches = np.zeros(0, dtype=SKETCH_DTYPE)
+        self._sketch_keys = sketches["identity"] * self._span + (
+            sketches["day"] - self._base
+        )
+        order = np.argsort(self._sketch_keys, kind="stable")
+        self._sketch_keys = self._sketch_keys[order]
+        self.sketches = sketches[order]
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @classmethod
+    def from_table(cls, table: CommitTable) -> "RollupCube":
+        """Roll up a commit table.
+
+        Args:
+            table: The commit history to roll up
+
+        Returns:
+            The rollup cube of the table
+        """
+        n_identities = max(len(table.identities), 1)
+        days = table.local_days()
+        cell_keys = days * n_identities + table.identity_ids
+        dir_index: Dict[str, int] = {}
+        path_dirs = np.array(
+            [
+                dir_index.setdefault(_top_level_dir(path), len(dir_index))
+                for path in table.paths
+            ],
+            dtype=np.int64,
+        )
+        n_dirs = max(len(dir_index), 1)
+
+        # Binary files count as touched but add no lines
+        added = np.where(table.additions >= 0, table.additions, 0)
+        deleted = np.where(table.deletions >= 0, table.deletions, 0)
+
+        # Whole-commit cells
+        totals, commit_cells = np.unique(cell_keys, return_inverse=True)
+        row_cells = commit_cells[table.file_commits]
+        total_commits = np.bincount(commit_cells, minlength=len(totals))
+        total_additions = np.bincount(row_cells, weights=added, minlength=len(totals))
+        total_deletions = np.bincount(
+            row_cells, weights=deleted, minlength=len(totals)
+        )
+
+        # Per-directory cells; a commit counts once per directory it touches
+        row_dirs = path_dirs[table.file_ids] if len(path_dirs) else table.file_ids
+        dir_keys = cell_keys[table.file_commits] * n_dirs + row_dirs
+        cells, row_index = np.unique(dir_keys, return_inverse=True)
+        touches = np.unique(table.file_commits.astype(np.int64) * n_dirs + row_dirs)
+        dir_commits = np.bincount(
+            np.searchsorted(
+                cells, cell_keys[touches // n_dirs] * n_dirs + touches % n_dirs
+            ),
+            minlength=len(cells),
+        )
+        dir_additions = np.bincount(row_index, weights=added, minlength=len(cells))
+        dir_deletions = np.bincount(row_index, weights=deleted, minlength=len(cells))
+
+        # Keep the largest rank per (identity, day, register)
+        index, rank = HyperLogLog.split(table.path_hashes()[table.file_ids])
+        days_index, day_ids = np.unique(days, return_inverse=True)
+        sketch_keys = (
+            (table.identity_ids[table.file_commits].astype(np.int64) * len(days_index))
+            + day_ids[table.file_commits]
+        ) << HLL_PRECISION | index
+        registers, register_index = np.unique(sketch_keys, return_inverse=True)
+        sketches = np.zeros(len(registers), dtype=SKETCH_DTYPE)
+        np.maximum.at(sketches["rank"], register_index, rank)
+        sketches["index"] = registers & ((1 << HLL_PRECISION) - 1)
+        sketch_cells = registers >> HLL_PRECISION
+        sketches["identity"] = sketch_cells // max(len(days_index), 1)
+        sketches["day"] = days_index[sketch_cells % max(len(days_index), 1)]
+
+        dir_cells = cells // n_dirs
+        return cls(
+            list(table.identities),
+            list(dir_index),
+            np.concatenate((totals // n_identities, dir_cells // n_identities)),
+            np.concatenate((totals % n_identities, dir_cells % n_identities)),
+            np.concatenate(
+                (np.full(len(totals), ROLLUP_TOTAL), cells % n_dirs)
+            ),
+            np.concatenate((total_commits, dir_commits)),
+            np.concatenate((total_additions, dir_additions)),
+            np.concatenate((total_deletions, dir_deletions)),
+            sketches,
+        )
+
+    def rows(self) -> Iterator[Tuple[int, str, str, str, int, int, int]]:
+        """Iterate over the cells for storage.
+
+        Yields:
+            Tuples of (day, author, email, directory, commits, additions,
+            deletions); the directory is empty for whole-commit cells
+        """
+        for i in range(len(self)):
+            author, email = self.identities[self.identity_ids[i]]
+            dir_id = self.dir_ids[i]
+            yield (
+                int(self.days[i]),
+                author,
+                email,
+                "" if dir_id == ROLLUP_TOTAL else self.dirs[dir_id],
+                int(self.commits[i]),
+                int(self.additions[i]),
+                int(self.deletions[i]),
+            )
+
+    def sketch_rows(self) -> Iterator[Tuple[int, str, str, bytes]]:
+        """Iterate over the file sketches for storage.
+
+        Yields:
+            Tuples of (day, author, email, registers), the registers packed
+            as ``index << 8 | rank`` 32-bit values
+        """
+        cells, starts = np.unique(self._sketch_keys, return_index=True)
+        bounds = np.append(starts, len(self._sketch_keys))
+        packed = (self.sketches["index"] << 8 | self.sketches["rank"]).astype("<u4")
+        for i, start in enumerate(starts):
+            author, email = self.identities[self.sketches["identity"][start]]
+            yield (
+                int(self.sketches["day"][start]),
+                author,
+                email,
+                packed[start : bounds[i + 1]].tobytes(),
+            )
+
+    @staticmethod
+    def unpack_sketch(identity: int, day: int, registers: bytes) -> np.ndarray:
+        """Decode stored registers of one (identity, day) into sketch rows."""
+        packed = np.frombuffer(registers, dtype="<u4")
+        rows = np.zeros(len(packed), dtype=SKETCH_DTYPE)
+        rows["identity"] = identity
+        rows["day"] = day
+        rows["index"] = packed >> 8
+        rows["rank"] = packed & 0xFF
+        return rows
+
+    def unique_files(self, identities: np.ndarray, first: int, last: int) -> int:
+        """Estimate the distinct files touched by some identities in a range.
+
+        Args:
+            identities: Identity ids to include
+            first: First local day, inclusive
+            last: Last local day, inclusive
+
+        Returns:
+            Estimated number of distinct files
+        """
+        first = min(max(first - self._base, 0), self._span - 1)
+        last = min(max(last - self._base, -1), self._span - 2)
+        segments = identities * self._span
+        starts = np.searchsorted(self._sketch_keys, segments + first)
+        ends = np.searchsorted(self._sketch_keys, segments + last + 1)
+        lengths = ends - starts
+        rows = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(
+            lengths.sum()
+        )
+        sketch = HyperLogLog()
+        np.maximum.at(
+            sketch.registers, self.sketches["index"][rows], self.sketches["rank"][rows]
+        )
+        return sketch.count()
+
+    def _ranges(
+        self, identities: np.ndarray, dir_id: int, first: int, last: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Locate the cells of some identities within a day range.
+
+        Args:
+            identities: Identity ids to look up
+            dir_id: Directory id, or ``ROLLUP_TOTAL``
+            first: First local day, inclusive
+            last: Last local day, inclusive
+
+        Returns:
+            Tuple of (start, end) cell index arrays, one pair per identity
+        """
+        segments = (identities * (len(self.dirs) + 1) + dir_id + 1) * self._span
+        first = min(max(first - self._base, 0), self._span - 1)
+        last = min(max(last - self._base, -1), self._span - 2)
+        return (
+            np.searchsorted(self._keys, segments + first),
+            np.searchsorted(self._keys, segments + last + 1),
+        )
+
+    def _sum(self, name: str, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Sum a column over cell ranges using its running sums."""
+        prefix = self._prefix[name]
+        return prefix[ends] - prefix[starts]
+
+    def query(
+        self,
+        author: Optional[re.Pattern] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        approximate: bool = False,
+    ) -> Dict[str, Any]:
+        """Get commit statistics for a date range and author filter.
+
+        Args:
+            author: Optional pattern matched against "name <email>"
+            since: Optional timestamp; commits from its local day onwards count
+            until: Optional timestamp; commits up to its local day count
+            approximate: Whether to add a sketch estimate of the distinct
+                files touched
+
+        Returns:
+            Commit statistics, plus per-directory activity
+        """
+        identities = np.arange(len(self.identities), dtype=np.int64)
         if author:
-            cmd.append(f"--author={author}")
-        if start_date:
-            cmd.append(f"--since={start_date}")
-        if end_date:
-            cmd.append(f"--until={end_date}")
-            
-        # Get commit data
-        log_output = GitCommand.run(" ".join(cmd))
-        commits = []
-        authors = defaultdict(int)
-        dates = defaultdict(int)
-        
-        for line in log_output.split("\n"):
-            if not line:
-                continue
-            hash_, author_name, author_email, timestamp, message = line.split("|")
-            commits.append({
-                "hash": hash_,
-                "author": author_name,
-                "email": author_email,
-                "timestamp": datetime.fromtimestamp(int(timestamp)),
-                "message": message
-            })
-            authors[author_name] += 1
-            dates[datetime.fromtimestamp(int(timestamp)).date()] += 1
-            
-        # Calculate statistics
-        total_commits = len(commits)
-        unique_authors = len(authors)
-        commit_dates = sorted(dates.keys())
-        
-        # Calculate daily/weekly/monthly averages
-        if commit_dates:
-            date_range = (commit_dates[-1] - commit_dates[0]).days + 1
-            daily_avg = total_commits / date_range if date_range > 0 else 0
-            weekly_avg = daily_avg * 7
-            monthly_avg = daily_avg * 30
+            identities = identities[
+                [bool(author.search(f"{n} <{e}>")) for n, e in self.identities]
+            ]
+        first = self._base
+        last = self._base + self._span
+        if since is not None:
+            first = int(_local_seconds(np.array([since], dtype=np.int64))[0] // 86400)
+        if until is not None:
+            last = int(_local_seconds(np.array([until], dtype=np.int64))[0] // 86400)
+
+        starts, ends = self._ranges(identities, ROLLUP_TOTAL, first, last)
+        per_identity = self._sum("commits", starts, ends)
+        authors: Dict[str, int] = {}
+        for identity, count in zip(identities, per_identity):
+            if count:
+                name = self.identities[identity][0]
+                authors[name] = authors.get(name, 0) + int(count)
+
+        # Histogram of the cells in range
+        lengths = ends - starts
+        cells = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(
+            lengths.sum()
+        )
+        days, day_index = np.unique(self.days[cells], return_inverse=True)
+        day_counts = np.bincount(
+            day_index, weights=self.commits[cells], minlength=len(days)
+        )
+
+        total_commits = int(per_identity.sum())
+        if len(days):
+            daily_avg = total_commits / (int(days[-1] - days[0]) + 1)
         else:
-            daily_avg = weekly_avg = monthly_avg = 0
-            
-        return {
+            daily_avg = 0
+
+        directories = {}
+        for dir_id, name in enumerate(self.dirs):
+            starts, ends = self._ranges(identities, dir_id, first, last)
+            commits = int(self._sum("commits", starts, ends).sum())
+            if commits:
+                directories[name] = {
+                    "commits": commits,
+                    "additions": int(self._sum("additions", starts, ends).sum()),
+                    "deletions": int(self._sum("deletions", starts, ends).sum()),
+                }
+
+        stats = {
             "total_commits": total_commits,
-            "unique_authors": unique_authors,
-            "authors": dict(authors),
+            "unique_authors": len(authors),
+            "authors": authors,
             "daily_average": round(daily_avg, 2),
-            "weekly_average": round(weekly_avg, 2),
-            "monthly_average": round(monthly_avg, 2),
-            "commit_dates": {d.isoformat(): count for d, count in dates.items()}
+            "weekly_average": round(daily_avg * 7, 2),
+            "monthly_average": round(daily_avg * 30, 2),
+            "commit_dates": {
+                date.fromordinal(EPOCH_ORDINAL + int(day)).isoformat(): int(count)
+                for day, count in zip(days, day_counts)
+            },
+            "directories": directories,
         }
-        
-    except GitCommandError as e:
-        logger.log(
-            level="error",
-            command="stats",
-            message="Failed to get commit statistics",
-            metadata={"error": str(e)}
-        )
-        return {}
+        if approximate:
+            stats["unique_files"] = self.unique_files(identities, first, last)
+        return stats
 
-def get_churn_stats() -> Dict[str, Any]:
-    """Get code churn statistics for the repository.
-    
-    Returns:
-        Dictionary containing code churn statistics
+
+class StatsAggregator(ABC):
+    """Base class for consumers of the shared commit history.
+
+    Subclasses implement :meth:`aggregate` over the whole columnar table, and
+    those that set ``uses_rollups`` also implement :meth:`query`.
     """
-    try:
-        # Get file change statistics
-        cmd = "git log --numstat --pretty=format:"
-        output = GitCommand.run(cmd)
-        
-        file_changes = defaultdict(lambda: {"additions": 0, "deletions": 0})
-        current_commit = None
-        
-        for line in output.split("\n"):
-            if not line:
-                continue
-                
-            # Skip commit messages
-            if not line[0].isdigit():
-                continue
-                
-            additions, deletions, filename = line.split("\t")
-            if additions.isdigit() and deletions.isdigit():
-                file_changes[filename]["additions"] += int(additions)
-                file_changes[filename]["deletions"] += int(deletions)
-                
-        # Calculate total changes
-        total_additions = sum(f["additions"] for f in file_changes.values())
-        total_deletions = sum(f["deletions"] for f in file_changes.values())
-        
-        # Find most changed files
-        sorted_files = sorted(
-            file_changes.items(),
-            key=lambda x: x[1]["additions"] + x[1]["deletions"],
-            reverse=True
-        )[:10]
-        
+
+    # Whether this aggregator needs per-file line counts
+    needs_numstat = False
+    # Whether this aggregator can be answered from the stored rollups
+    uses_rollups = False
+
+    @abstractmethod
+    def aggregate(self, table: CommitTable) -> Dict[str, Any]:
+        """Compute the statistics for a commit table.
+
+        Args:
+            table: The commit history to aggregate
+
+        Returns:
+            The aggregated statistics
+        """
+
+    def query(self, cube: RollupCube) -> Dict[str, Any]:
+        """Compute the statistics from pre-aggregated rollups.
+
+        Args:
+            cube: Rollups of the commit history
+
+        Returns:
+            The aggregated statistics
+        """
+        raise NotImplementedError
+
+
+def _datetime_iso(timestamp: int) -> str:
+    return datetime.fromtimestamp(int(timestamp)).isoformat()
+
+
+class CommitAggregator(StatsAggregator):
+    """Commit counts per author and day, with optional filters.
+
+    Reports are answered from a :class:`RollupCube`, so date filters apply
+    to whole local days.
+    """
+
+    uses_rollups = True
+
+    def __init__(
+        self,
+        author: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        approximate: bool = False,
+    ):
+        """Initialize the aggregator.
+
+        Args:
+            author: Optional pattern matched against "name <email>" like
+                ``git log --author``
+            since: Optional timestamp of the first day to count
+            until: Optional timestamp of the last day to count
+            approximate: Whether to report an estimate of the distinct
+                files touched
+        """
+        try:
+            self.author = re.compile(author) if author else None
+        except re.error:
+            self.author = re.compile(re.escape(author))
+        self.since = since
+        self.until = until
+        self.approximate = approximate
+        # Files touched come from the numstat rows
+        self.needs_numstat = approximate
+
+    def aggregate(self, table: CommitTable) -> Dict[str, Any]:
+        return self.query(RollupCube.from_table(table))
+
+    def query(self, cube: RollupCube) -> Dict[str, Any]:
+        return cube.query(self.author, self.since, self.until, self.approximate)
+
+
+class ChurnAggregator(StatsAggregator):
+    """Line additions and deletions per file."""
+
+    needs_numstat = True
+
+    def __init__(self, top: int = 10):
+        """Initialize the aggregator.
+
+        Args:
+            top: Number of most changed files to report
+        """
+        self.top = top
+
+    def aggregate(self, table: CommitTable) -> Dict[str, Any]:
+        valid = table.valid_rows()
+        files = table.file_ids[valid]
+        additions = np.bincount(
+            files, weights=table.additions[valid], minlength=len(table.paths)
+        ).astype(np.int64)
+        deletions = np.bincount(
+            files, weights=table.deletions[valid], minlength=len(table.paths)
+        ).astype(np.int64)
+
+        # Most changed files, ties broken by path
+        touched = np.unique(files)
+        changes = additions[touched] + deletions[touched]
+        order = np.lexsort((table.path_ranks()[touched], -changes))[: self.top]
+
+        total_additions = int(additions.sum())
+        total_deletions = int(deletions.sum())
         return {
             "total_additions": total_additions,
             "total_deletions": total_deletions,
             "total_changes": total_additions + total_deletions,
             "most_changed_files": [
                 {
-                    "file": filename,
-                    "additions": stats["additions"],
-                    "deletions": stats["deletions"]
+                    "file": table.paths[f],
+                    "additions": int(additions[f]),
+                    "deletions": int(deletions[f]),
                 }
-                for filename, stats in sorted_files
-            ]
+                for f in touched[order]
+            ],
         }
-        
-    except GitCommandError as e:
+
+
+class TeamAggregator(StatsAggregator):
+    """Activity span, active days and files touched per author."""
+
+    needs_numstat = True
+
+    def __init__(self, approximate: bool = False):
+        """Initialize the aggregator.
+
+        Args:
+            approximate: Whether to estimate files touched with one
+                :class:`HyperLogLog` sketch per author instead of exact sets
+        """
+        self.approximate = approximate
+
+    def aggregate(self, table: CommitTable) -> Dict[str, Any]:
+        ids = table.author_ids
+        n_authors = len(table.authors)
+        commits = np.bincount(ids, minlength=n_authors)
+
+        first = np.full(n_authors, np.iinfo(np.int64).max, dtype=np.int64)
+        last = np.full(n_authors, np.iinfo(np.int64).min, dtype=np.int64)
+        np.minimum.at(first, ids, table.timestamps)
+        np.maximum.at(last, ids, table.timestamps)
+
+        # Distinct (author, local day) pairs give the active days
+        days = table.local_days()
+        if len(days):
+            width = int(days.max() - days.min()) + 1
+            pairs = np.unique(ids.astype(np.int64) * width + (days - days.min()))
+            active_days = np.bincount(pairs // width, minlength=n_authors)
+        else:
+            active_days = np.zeros(n_authors, dtype=np.int64)
+        files_touched = _distinct_counts(
+            ids[table.file_commits],
+            table.file_ids,
+            n_authors,
+            table.path_hashes() if self.approximate else None,
+        )
+
+        authors = {}
+        present = np.flatnonzero(commits)
+        first_local = _local_seconds(first[present])
+        last_local = _local_seconds(last[present])
+        for i, author in enumerate(present):
+            # ISO strings keep the result JSON serializable
+            authors[table.authors[author]] = {
+                "commits": int(commits[author]),
+                "first_commit": _datetime_iso(first[author]),
+                "last_commit": _datetime_iso(last[author]),
+                "active_days": int(active_days[author]),
+                "commit_span_days": int(last_local[i] - first_local[i]) // 86400 + 1,
+                "files_touched": int(files_touched[author]),
+            }
+        return {"total_authors": len(authors), "authors": authors}
+
+
+class LeaderboardAggregator(StatsAggregator):
+    """Line changes per author, broken down by their most changed files.
+
+    Files are tracked per author with a Space-Saving summary of at most
+    ``top_files`` entries, so only O(authors x k) (author, file) pairs are
+    kept. In exact mode all numstat rows form a single batch and the
+    result is exact. In approximate mode the rows are folded in batches of
+    ``LEADERBOARD_BATCH_ROWS``. A file that enters an author's full summary
+    is charged that summary's smallest count, reported as ``error``: its
+    true change count lies between ``additions + deletions`` and that plus
+    ``error``. The count of distinct files touched is then also estimated,
+    with one :class:`HyperLogLog` sketch per author.
+    """
+
+    needs_numstat = True
+
+    def __init__(
+        self, top_files: Optional[int] = None, approximate: Optional[bool] = None
+    ):
+        """Initialize the aggregator.
+
+        Args:
+            top_files: Number of files to report per author, all when None
+            approximate: Whether to use bounded memory at the cost of exact
+                file counts; by default only histories with more than
+                ``LEADERBOARD_EXACT_ROWS`` numstat rows are approximated
+        """
+        self.top_files = top_files
+        self.approximate = approximate
+
+    def aggregate(self, table: CommitTable) -> Dict[str, Any]:
+        n_authors = len(table.authors)
+        n_files = max(len(table.paths), 1)
+        k = self.top_files
+        approximate = self.approximate
+        if approximate is None:
+            approximate = len(table.file_ids) > LEADERBOARD_EXACT_ROWS
+        approximate = approximate and k is not None
+        commits = np.bincount(table.author_ids, minlength=n_authors)
+
+        # Email of each author's most recent commit
+        authors_seen, first_rows = np.unique(table.author_ids, return_index=True)
+        emails = {
+            int(a): table.identities[table.identity_ids[row]][1]
+            for a, row in zip(authors_seen, first_rows)
+        }
+
+        # Author totals are exact in both modes
+        valid = table.valid_rows()
+        row_authors = table.author_ids[table.file_commits]
+        additions = np.bincount(
+            row_authors[valid], weights=table.additions[valid], minlength=n_authors
+        ).astype(np.int64)
+        deletions = np.bincount(
+            row_authors[valid], weights=table.deletions[valid], minlength=n_authors
+        ).astype(np.int64)
+        files_touched = _distinct_counts(
+            row_authors,
+            table.file_ids,
+            n_authors,
+            table.path_hashes() if approximate else None,
+        )
+
+        # Per-author summaries as parallel arrays sorted by (author, file) key
+        keys = np.zeros(0, dtype=np.int64)
+        summary = np.zeros((3, 0), dtype=np.int64)
+        path_ranks = table.path_ranks()
+        batch = LEADERBOARD_BATCH_ROWS if approximate else max(len(valid), 1)
+        for start in range(0, len(valid), batch):
+            rows = np.flatnonzero(valid[start : start + batch]) + start
+            keys, summary = self._fold(
+                keys,
+                summary,
+                row_authors[rows].astype(np.int64) * n_files + table.file_ids[rows],
+                table.additions[rows],
+                table.deletions[rows],
+                n_authors,
+                path_ranks,
+            )
+
+        # Group by author, files sorted by estimated changes then path
+        pair_authors = keys // n_files
+        pair_files = keys % n_files
+        counts = summary.sum(axis=0)
+        order = np.lexsort(
+            (
+                path_ranks[pair_files],
+                -counts,
+                pair_authors,
+            )
+        )
+        bounds = np.searchsorted(pair_authors[order], np.arange(n_authors + 1))
+
+        authors = []
+        for author in np.flatnonzero(commits):
+            files_changed = []
+            for i in order[bounds[author] : bounds[author + 1]]:
+                entry = {
+                    "file": table.paths[pair_files[i]],
+                    "additions": int(summary[0, i]),
+                    "deletions": int(summary[1, i]),
+                }
+                if approximate:
+                    entry["error"] = int(summary[2, i])
+                files_changed.append(entry)
+            authors.append(
+                {
+                    "name": table.authors[author],
+                    "email": emails[int(author)],
+                    "commits": int(commits[author]),
+                    "additions": int(additions[author]),
+                    "deletions": int(deletions[author]),
+                    "total_changes": int(additions[author] + deletions[author]),
+                    "files_touched": int(files_touched[author]),
+                    "files_changed": files_changed,
+                }
+            )
+
+        # Sort authors by total changes
+        authors.sort(key=lambda x: (-x["total_changes"], x["name"]))
+        return {"authors": authors, "approximate": bool(approximate)}
+
+    def _fold(
+        self,
+        keys: np.ndarray,
+        summary: np.ndarray,
+        row_keys: np.ndarray,
+        row_additions: np.ndarray,
+        row_deletions: np.ndarray,
+        n_authors: int,
+        path_ranks: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Fold a batch of numstat rows into the per-author summaries.
+
+        Args:
+            keys: Sorted ``author * n_files + file`` keys of tracked pairs
+            summary: Rows of additions, deletions and error per tracked pair
+            row_keys: Pair key of each numstat row in the batch
+            row_additions: Added lines of each row
+            row_deletions: Deleted lines of each row
+            n_authors: Number of authors
+            path_ranks: Sorted position of each file's path, for tie-breaks
+
+        Returns:
+            The updated keys and summary
+        """
+        n_files = max(len(path_ranks), 1)
+        batch_keys, inverse = np.unique(row_keys, return_inverse=True)
+        batch = np.zeros((3, len(batch_keys)), dtype=np.int64)
+        batch[0] = np.bincount(inverse, weights=row_additions)
+        batch[1] = np.bincount(inverse, weights=row_deletions)
+
+        # Pairs already tracked just add up
+        pos = np.searchsorted(keys, batch_keys)
+        tracked = pos < len(keys)
+        tracked[tracked] = keys[pos[tracked]] == batch_keys[tracked]
+        summary[:2, pos[tracked]] += batch[:2, tracked]
+
+        # New pairs are charged the smallest count of a full summary
+        if self.top_files is not None and len(keys):
+            owners = keys // n_files
+            sizes = np.bincount(owners, minlength=n_authors)
+            floors = np.full(n_authors, np.iinfo(np.int64).max, dtype=np.int64)
+            np.minimum.at(floors, owners, summary.sum(axis=0))
+            floors = np.where(sizes >= self.top_files, floors, 0)
+            new = batch[:, ~tracked]
+            new[2] = floors[batch_keys[~tracked] // n_files]
+        else:
+            new = batch[:, ~tracked]
+        keys = np.concatenate((keys, batch_keys[~tracked]))
+        summary = np.concatenate((summary, new), axis=1)
+
+        if self.top_files is not None:
+            # Keep the k largest estimated counts of each author
+            owners = keys // n_files
+            order = np.lexsort(
+                (path_ranks[keys % n_files], -summary.sum(axis=0), owners)
+            )
+            starts = np.searchsorted(owners[order], owners[order])
+            order = order[np.arange(len(order)) - starts < self.top_files]
+            keys = keys[order]
+            summary = summary[:, order]
+
+        order = np.argsort(keys, kind="stable")
+        return keys[order], summary[:, order]
+
+
+class StatsStore:
+    """Persistent per-commit stats cache for incremental history walks.
+
+    Commits, their numstat rows and the set of commits reachable from each
+    ref are kept in SQLite under ``.git/qgit/stats.db``. A sync walks only
+    ``last_tip..tip`` and rebuilds a ref from scratch when its previous tip
+    is no longer an ancestor, i.e. when history was rewritten.
+
+    Each ref also keeps its :class:`RollupCube`. Incremental syncs add the
+    new commits to it; anything else marks it stale and it is rebuilt from
+    the cached commits on next use.
+
+    Blame results are cached per (blob id, path), so ownership only has to
+    re-blame files whose content changed.
+    """
+
+    SCHEMA_VERSION = "4"
+    TABLES = (
+        "ref_commits", "numstat", "paths", "commits", "tips", "rollups",
+        "rollup_sketches", "rollup_tips", "blame_files", "blame_lines",
+    )
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Initialize the store.
+
+        Args:
+            db_path: Optional database path, defaults to the repository's
+                ``.git/qgit/stats.db`` or ``~/.qgit/cache`` if that is not
+                writable
+        """
+        self.db_path = db_path or self._default_path()
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Path ids resolved during this session
+        self._path_ids: Dict[str, int] = {}
+        self._init_db()
+
+    @staticmethod
+    def _default_path() -> str:
+        """Pick the cache location for the current repository."""
+        common_dir = os.path.abspath(
+            GitCommand.run("git rev-parse --git-common-dir", cache=True)
+        )
+        try:
+            cache_dir = os.path.join(common_dir, "qgit")
+            os.makedirs(cache_dir, exist_ok=True)
+            if os.access(cache_dir, os.W_OK):
+                return os.path.join(cache_dir, "stats.db")
+        except OSError:
+            pass
+        cache_dir = os.path.join(os.path.expanduser("~"), ".qgit", "cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        key = hashlib.sha1(common_dir.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(cache_dir, f"stats-{key}.db")
+
+    def _init_db(self) -> None:
+        """Create the schema, discarding caches from other schema versions."""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema'"
+            ).fetchone()
+            if row and row[0] != self.SCHEMA_VERSION:
+                for table in self.TABLES:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS commits (
+                    id INTEGER PRIMARY KEY,
+                    oid TEXT NOT NULL UNIQUE,
+                    author TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    subject TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS paths (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE IF NOT EXISTS numstat (
+                    commit_id INTEGER NOT NULL,
+                    path_id INTEGER NOT NULL,
+                    additions INTEGER,
+                    deletions INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_numstat_commit
+                    ON numstat(commit_id);
+                CREATE TABLE IF NOT EXISTS ref_commits (
+                    ref TEXT NOT NULL,
+                    commit_id INTEGER NOT NULL,
+                    PRIMARY KEY (ref, commit_id)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS tips (
+                    ref TEXT PRIMARY KEY,
+                    oid TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS rollups (
+                    ref TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    author TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    dir TEXT NOT NULL,
+                    commits INTEGER NOT NULL,
+                    additions INTEGER NOT NULL,
+                    deletions INTEGER NOT NULL,
+                    PRIMARY KEY (ref, author, email, dir, day)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS rollup_sketches (
+                    ref TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    author TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    registers BLOB NOT NULL,
+                    PRIMARY KEY (ref, author, email, day)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS rollup_tips (
+                    ref TEXT PRIMARY KEY,
+                    oid TEXT NOT NULL,
+                    timezone TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS blame_files (
+                    id INTEGER PRIMARY KEY,
+                    oid TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    UNIQUE (oid, path)
+                );
+                CREATE TABLE IF NOT EXISTS blame_lines (
+                    file_id INTEGER NOT NULL,
+                    author TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    lines INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_blame_lines_file
+                    ON blame_lines(file_id);
+                """
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('schema', ?)",
+                (self.SCHEMA_VERSION,),
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self) -> "StatsStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def current_ref() -> Tuple[str, str]:
+        """Get the checked out ref and its tip.
+
+        Returns:
+            Tuple of (full ref name or "HEAD" when detached, commit id)
+        """
+        tip, ref = GitCommand.run(
+            "git rev-parse HEAD --symbolic-full-name HEAD", cache=True
+        ).split("\n")
+        return ref or "HEAD", tip
+
+    def sync(self, ref: str, tip: str, rebuild: bool = False) -> int:
+        """Bring the cached commit set of a ref up to date with its tip.
+
+        Args:
+            ref: Ref name the commit set belongs to
+            tip: Current tip commit of the ref
+            rebuild: Whether to discard the ref's cached state first
+
+        Returns:
+            Number of commits walked
+
+        Raises:
+            GitCommandError: If the history cannot be read
+        """
+        row = self.conn.execute("SELECT oid FROM tips WHERE ref = ?", (ref,)).fetchone()
+        last_tip = row[0] if row and not rebuild else None
+        if last_tip == tip:
+            return 0
+
+        if last_tip is not None and Reachability.is_ancestor(last_tip, tip):
+            mode, extra_args = "incremental", [f"{last_tip}..{tip}"]
+        else:
+            # First run, --rebuild or rewritten history
+            mode, extra_args = "full", [tip]
+
+        # New commits are only kept when they can update the rollups
+        new_records = None
+        if mode == "incremental" and self._rollups_at(ref, last_tip):
+            new_records = []
+
+        walked = 0
+        with self.conn:
+            if rebuild:
+                for table in self.TABLES:
+                    self.conn.execute(f"DELETE FROM {table}")
+                self._path_ids.clear()
+            elif mode == "full":
+                self.conn.execute("DELETE FROM ref_commits WHERE ref = ?", (ref,))
+            for record in mine_commit_records(numstat=True, extra_args=extra_args):
+                commit_id = self._store_commit(record)
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO ref_commits VALUES (?, ?)", (ref, commit_id)
+                )
+                if new_records is not None:
+                    new_records.append(record)
+                walked += 1
+            self.conn.execute("INSERT OR REPLACE INTO tips VALUES (?, ?)", (ref, tip))
+            if new_records is not None:
+                cube = RollupCube.from_table(CommitTable.from_records(new_records))
+                self._save_rollups(ref, tip, cube, replace=False)
+            else:
+                self.conn.execute("DELETE FROM rollup_tips WHERE ref = ?", (ref,))
+            if mode == "full" and not rebuild:
+                # Drop commits that only the rewritten history referred to
+                self.conn.execute(
+                    "DELETE FROM numstat WHERE commit_id NOT IN "
+                    "(SELECT commit_id FROM ref_commits)"
+                )
+                self.conn.execute(
+                    "DELETE FROM commits WHERE id NOT IN "
+                    "(SELECT commit_id FROM ref_commits)"
+                )
+
         logger.log(
-            level="error",
+            level="info",
             command="stats",
-            message="Failed to get churn statistics",
-            metadata={"error": str(e)}
+            message="Stats cache synced",
+            metadata={"ref": ref, "mode": mode, "commits": walked},
         )
-        return {}
+        return walked
+
+    def _store_commit(self, record: CommitRecord) -> int:
+        """Insert a commit and its numstat rows unless already cached.
+
+        Args:
+            record: The commit to store
+
+        Returns:
+            The commit's row id
+        """
+        row = self.conn.execute(
+            "SELECT id FROM commits WHERE oid = ?", (record.oid,)
+        ).fetchone()
+        if row:
+            return row[0]
+        commit_id = self.conn.execute(
+            "INSERT INTO commits (oid, author, email, timestamp, subject) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (record.oid, record.author, record.email, record.timestamp, record.subject),
+        ).lastrowid
+        rows = []
+        for additions, deletions, path in record.numstat:
+            path_id = self._path_ids.get(path)
+            if path_id is None:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO paths (path) VALUES (?)", (path,)
+                )
+                path_id = self.conn.execute(
+                    "SELECT id FROM paths WHERE path = ?", (path,)
+                ).fetchone()[0]
+                self._path_ids[path] = path_id
+            rows.append((commit_id, path_id, additions, deletions))
+        self.conn.executemany("INSERT INTO numstat VALUES (?, ?, ?, ?)", rows)
+        return commit_id
+
+    def table(self, ref: str) -> CommitTable:
+        """Load the cached commits of a ref as a columnar table, newest first.
+
+        Args:
+            ref: Ref name to load
+
+        Returns:
+            The ref's commit history, including numstat rows
+        """
+        commits = np.fromiter(
+            self.conn.execute(
+                """
+                SELECT c.id, c.oid, c.timestamp
+                FROM ref_commits r JOIN commits c ON c.id = r.commit_id
+                WHERE r.ref = ?
+                ORDER BY c.timestamp DESC
+                """,
+                (ref,),
+            ),
+            dtype=[("id", np.int64), ("oid", "S64"), ("timestamp", np.int64)],
+        )
+
+        # Identities are interned in SQL so Python only sees distinct ones
+        identities = []
+        identity_rows = {}
+        for author, email, ids in self.conn.execute(
+            """
+            SELECT c.author, c.email, GROUP_CONCAT(c.id)
+            FROM ref_commits r JOIN commits c ON c.id = r.commit_id
+            WHERE r.ref = ?
+            GROUP BY c.author, c.email
+            """,
+            (ref,),
+        ):
+            identity_rows[len(identities)] = np.array(ids.split(","), dtype=np.int64)
+            identities.append((author, email))
+
+        # Map commit ids onto table rows
+        order = np.argsort(commits["id"])
+        sorted_ids = commits["id"][order]
+        identity_ids = np.zeros(len(commits), dtype=np.int32)
+        for identity, ids in identity_rows.items():
+            identity_ids[order[np.searchsorted(sorted_ids, ids)]] = identity
+
+        numstat = np.fromiter(
+            self.conn.execute(
+                """
+                SELECT n.commit_id, n.path_id,
+                       COALESCE(n.additions, -1), COALESCE(n.deletions, -1)
+                FROM ref_commits r JOIN numstat n ON n.commit_id = r.commit_id
+                WHERE r.ref = ?
+                """,
+                (ref,),
+            ),
+            dtype=[
+                ("commit", np.int64),
+                ("path", np.int64),
+                ("additions", np.int32),
+                ("deletions", np.int32),
+            ],
+        )
+
+        # Renumber the store's path ids densely
+        path_ids, file_ids = np.unique(numstat["path"], return_inverse=True)
+        names = dict(
+            self.conn.execute(
+                "SELECT id, path FROM paths WHERE id IN (SELECT DISTINCT n.path_id "
+                "FROM ref_commits r JOIN numstat n ON n.commit_id = r.commit_id "
+                "WHERE r.ref = ?)",
+                (ref,),
+            )
+        )
+
+        return CommitTable(
+            commits["oid"],
+            commits["timestamp"],
+            identity_ids,
+            identities,
+            order[np.searchsorted(sorted_ids, numstat["commit"])],
+            file_ids,
+            numstat["additions"],
+            numstat["deletions"],
+            [names[int(i)] for i in path_ids],
+        )
+
+    @staticmethod
+    def _timezone() -> str:
+        """Describe the local timezone that rollup days are bucketed in."""
+        return f"{os.environ.get('TZ', '')}|{time.tzname}|{time.timezone}"
+
+    def _rollups_at(self, ref: str, tip: str) -> bool:
+        """Check whether a ref's stored rollups are current for a tip."""
+        row = self.conn.execute(
+            "SELECT oid, timezone FROM rollup_tips WHERE ref = ?", (ref,)
+        ).fetchone()
+        return row is not None and tuple(row) == (tip, self._timezone())
+
+    def _save_rollups(
+        self, ref: str, tip: str, cube: RollupCube, replace: bool = True
+    ) -> None:
+        """Store rollup cells for a ref.
+
+        Args:
+            ref: Ref name the rollups belong to
+            tip: Commit the rollups are current for
+            cube: Rollups to store
+            replace: Whether to replace the stored cells instead of adding
+                to them
+        """
+        if replace:
+            self.conn.execute("DELETE FROM rollups WHERE ref = ?", (ref,))
+            self.conn.execute("DELETE FROM rollup_sketches WHERE ref = ?", (ref,))
+        for day, author, email, registers in cube.sketch_rows():
+            if not replace:
+                # Sketches merge by keeping the larger rank per register
+                row = self.conn.execute(
+                    "SELECT registers FROM rollup_sketches "
+                    "WHERE ref = ? AND author = ? AND email = ? AND day = ?",
+                    (ref, author, email, day),
+                ).fetchone()
+                if row:
+                    registers = self._merge_registers(row[0], registers)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rollup_sketches VALUES (?, ?, ?, ?, ?)",
+                (ref, day, author, email, registers),
+            )
+        self.conn.executemany(
+            """
+            INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (ref, author, email, dir, day) DO UPDATE SET
+                commits = commits + excluded.commits,
+                additions = additions + excluded.additions,
+                deletions = deletions + excluded.deletions
+            """,
+            ((ref,) + row for row in cube.rows()),
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO rollup_tips VALUES (?, ?, ?)",
+            (ref, tip, self._timezone()),
+        )
+
+    def blame_entries(self) -> Dict[Tuple[str, str], List[Tuple[str, str, int]]]:
+        """Load every cached blame result.
+
+        Returns:
+            Dictionary mapping (blob id, path) to (author, email, lines) rows
+        """
+        entries: Dict[Tuple[str, str], List[Tuple[str, str, int]]] = {}
+        for oid, path in self.conn.execute("SELECT oid, path FROM blame_files"):
+            entries[(oid, path)] = []
+        for oid, path, author, email, lines in self.conn.execute(
+            """
+            SELECT f.oid, f.path, l.author, l.email, l.lines
+            FROM blame_files f JOIN blame_lines l ON l.file_id = f.id
+            """
+        ):
+            entries[(oid, path)].append((author, email, lines))
+        return entries
+
+    def store_blame(
+        self, oid: str, path: str, owners: List[Tuple[str, str, int]]
+    ) -> None:
+        """Cache the blame result of one file.
+
+        Args:
+            oid: Blob id of the file's content
+            path: Path of the file
+            owners: (author, email, lines) rows, empty for binary files
+        """
+        file_id = self.conn.execute(
+            "INSERT OR REPLACE INTO blame_files (oid, path) VALUES (?, ?)",
+            (oid, path),
+        ).lastrowid
+        self.conn.executemany(
+            "INSERT INTO blame_lines VALUES (?, ?, ?, ?)",
+            ((file_id, author, email, lines) for author, email, lines in owners),
+        )
+
+    def prune_blame(self, keep: Iterable[Tuple[str, str]]) -> None:
+        """Drop cached blame results except for the given files.
+
+        Args:
+            keep: (blob id, path) pairs to keep
+        """
+        with self.conn:
+            self.conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS blame_keep "
+                "(oid TEXT, path TEXT, PRIMARY KEY (oid, path))"
+            )
+            self.conn.execute("DELETE FROM blame_keep")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO blame_keep VALUES (?, ?)", keep
+            )
+            self.conn.execute(
+                "DELETE FROM blame_files WHERE (oid, path) NOT IN "
+                "(SELECT oid, path FROM blame_keep)"
+            )
+            self.conn.execute(
+                "DELETE FROM blame_lines WHERE file_id NOT IN "
+                "(SELECT id FROM blame_files)"
+            )
+
+    @staticmethod
+    def _merge_registers(first: bytes, second: bytes) -> bytes:
+        """Merge two packed sparse sketches of the same (identity, day)."""
+        rows = np.concatenate(
+            (
+                RollupCube.unpack_sketch(0, 0, first),
+                RollupCube.unpack_sketch(0, 0, second),
+            )
+        )
+        index, position = np.unique(rows["index"], return_inverse=True)
+        rank = np.zeros(len(index), dtype=np.uint8)
+        np.maximum.at(rank, position, rows["rank"])
+        return (index << 8 | rank).astype("<u4").tobytes()
+
+    def rollups(self, ref: str) -> RollupCube:
+        """Load the rollups of a ref, rebuilding them if stale.
+
+        Args:
+            ref: Ref name to load, which must have been synced
+
+        Returns:
+            The ref's rollup cube
+        """
+        row = self.conn.execute("SELECT oid FROM tips WHERE ref = ?", (ref,)).fetchone()
+        tip = row[0] if row else ""
+        if not self._rollups_at(ref, tip):
+            cube = RollupCube.from_table(self.table(ref))
+            with self.conn:
+                self._save_rollups(ref, tip, cube)
+            return cube
+
+        identity_index: Dict[Tuple[str, str], int] = {}
+        dir_index: Dict[str, int] = {}
+        cells = np.fromiter(
+            (
+                (
+                    day,
+                    identity_index.setdefault((author, email), len(identity_index)),
+                    (
+                        dir_index.setdefault(directory, len(dir_index))
+                        if directory
+                        else ROLLUP_TOTAL
+                    ),
+                    commits,
+                    additions,
+                    deletions,
+                )
+                for day, author, email, directory, commits, additions, deletions in (
+                    self.conn.execute(
+                        "SELECT day, author, email, dir, commits, additions, "
+                        "deletions FROM rollups WHERE ref = ?",
+                        (ref,),
+                    )
+                )
+            ),
+            dtype=[
+                ("day", np.int64),
+                ("identity", np.int64),
+                ("dir", np.int64),
+                ("commits", np.int64),
+                ("additions", np.int64),
+                ("deletions", np.int64),
+            ],
+        )
+        sketches = [
+            RollupCube.unpack_sketch(
+                identity_index.setdefault((author, email), len(identity_index)),
+                day,
+                registers,
+            )
+            for day, author, email, registers in self.conn.execute(
+                "SELECT day, author, email, registers FROM rollup_sketches "
+                "WHERE ref = ?",
+                (ref,),
+            )
+        ]
+        return RollupCube(
+            list(identity_index),
+            list(dir_index),
+            cells["day"],
+            cells["identity"],
+            cells["dir"],
+            cells["commits"],
+            cells["additions"],
+            cells["deletions"],
+            np.concatenate(sketches) if sketches else None,
+        )
+
+
+def resolve_date_range(
+    start_date: Optional[str] = None, end_date: Optional[str] = None
+) -> Tuple[Optional[int], Optional[int]]:
+    """Convert ``--since``/``--until`` style dates to timestamps.
+
+    Git does the parsing, so every date format ``git log`` accepts works.
+
+    Args:
+        start_date: Optional start date, e.g. YYYY-MM-DD
+        end_date: Optional end date, e.g. YYYY-MM-DD
 
-def get_team_stats() -> Dict[str, Any]:
-    """Get team collaboration statistics.
-    
     Returns:
-        Dictionary containing team collaboration statistics
+        Tuple of (since, until) timestamps, None where not given
+    """
+    args = []
+    if start_date:
+        args.append(f"--since={start_date}")
+    if end_date:
+        args.append(f"--until={end_date}")
+    if not args:
+        return None, None
+
+    since = until = None
+    output = GitCommand.run("git rev-parse " + " ".join(map(shlex.quote, args)))
+    for value in output.split("\n"):
+        if value.startswith("--max-age="):
+            since = int(value[len("--max-age=") :])
+        elif value.startswith("--min-age="):
+            until = int(value[len("--min-age=") :])
+    return since, until
+
+
+def iter_stats(
+    aggregators: Dict[str, StatsAggregator],
+    extra_args: Optional[List[str]] = None,
+    use_cache: bool = True,
+    rebuild: bool = False,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Feed one history walk to several aggregators, yielding each report.
+
+    The walk is loaded once into a columnar :class:`CommitTable` that every
+    aggregator reduces with vectorized operations. Without extra git
+    arguments the walk is served from the persistent :class:`StatsStore`,
+    which only asks git for commits added since the previous run, and
+    aggregators that support it are answered from its rollups without
+    loading the history at all.
+
+    Args:
+        aggregators: Aggregators keyed by report name
+        extra_args: Additional ``git log`` arguments applied to the walk
+        use_cache: Whether to use the persistent stats cache
+        rebuild: Whether to rebuild the stats cache from scratch
+
+    Yields:
+        Tuples of (report name, statistics) as each report completes
+
+    Raises:
+        GitCommandError: If the history cannot be read
+    """
+    if extra_args or not use_cache:
+        numstat = any(a.needs_numstat for a in aggregators.values())
+        records = mine_commit_records(numstat=numstat, extra_args=extra_args)
+        table = CommitTable.from_records(records)
+        for name, agg in aggregators.items():
+            yield name, agg.aggregate(table)
+        return
+
+    with StatsStore() as store:
+        ref, tip = store.current_ref()
+        store.sync(ref, tip, rebuild=rebuild)
+        if any(agg.uses_rollups for agg in aggregators.values()):
+            cube = store.rollups(ref)
+            for name, agg in aggregators.items():
+                if agg.uses_rollups:
+                    yield name, agg.query(cube)
+        if not all(agg.uses_rollups for agg in aggregators.values()):
+            table = store.table(ref)
+            for name, agg in aggregators.items():
+                if not agg.uses_rollups:
+                    yield name, agg.aggregate(table)
+
+
+def collect_stats(
+    aggregators: Dict[str, StatsAggregator],
+    extra_args: Optional[List[str]] = None,
+    use_cache: bool = True,
+    rebuild: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """Feed one history walk to several aggregators.
+
+    Args:
+        aggregators: Aggregators keyed by report name
+        extra_args: Additional ``git log`` arguments applied to the walk
+        use_cache: Whether to use the persistent stats cache
+        rebuild: Whether to rebuild the stats cache from scratch
+
+    Returns:
+        Dictionary mapping each report name to its statistics, see
+        :func:`iter_stats`
+
+    Raises:
+        GitCommandError: If the history cannot be read
     """
+    results = dict(iter_stats(aggregators, extra_args, use_cache, rebuild))
+    return {name: results[name] for name in aggregators}
+
+
+def _run_single(name: str, aggregator: StatsAggregator,
+                extra_args: Optional[List[str]] = None,
+                rebuild: bool = False) -> Dict[str, Any]:
+    """Run one aggregator over the history, logging failures."""
     try:
-        # Get commit data for all authors
-        cmd = "git log --pretty=format:%an|%ae|%at"
-        output = GitCommand.run(cmd)
-        
-        authors = defaultdict(lambda: {
-            "commits": 0,
-            "first_commit": None,
-            "last_commit": None,
-            "active_days": set()
-        })
-        
-        for line in output.split("\n"):
-            if not line:
-                continue
-                
-            author_name, author_email, timestamp = line.split("|")
-            commit_date = datetime.fromtimestamp(int(timestamp))
-            
-            author_stats = authors[author_name]
-            author_stats["commits"] += 1
-            author_stats["active_days"].add(commit_date.date())
-            
-            if not author_stats["first_commit"] or commit_date < author_stats["first_commit"]:
-                author_stats["first_commit"] = commit_date
-            if not author_stats["last_commit"] or commit_date > author_stats["last_commit"]:
-                author_stats["last_commit"] = commit_date
-                
-        # Calculate additional metrics
-        for author_stats in authors.values():
-            author_stats["active_days"] = len(author_stats["active_days"])
-            if author_stats["first_commit"] and author_stats["last_commit"]:
-                author_stats["commit_span_days"] = (
-                    author_stats["last_commit"] - author_stats["first_commit"]
-                ).days + 1
-            else:
-                author_stats["commit_span_days"] = 0
-                
-        # Convert datetime objects to ISO format for JSON serialization
-        for author_stats in authors.values():
-            if author_stats["first_commit"]:
-                author_stats["first_commit"] = author_stats["first_commit"].isoformat()
-            if author_stats["last_commit"]:
-                author_stats["last_commit"] = author_stats["last_commit"].isoformat()
-                
-        return {
-            "total_authors": len(authors),
-            "authors": dict(authors)
-        }
-        
-    except GitCommandError as e:
+        return collect_stats({name: aggregator}, extra_args, rebuild=rebuild)[name]
+    except (GitCommandError, sqlite3.Error) as e:
         logger.log(
             level="error",
             command="stats",
-            message="Failed to get team statistics",
+            message=f"Failed to get {name} statistics",
             metadata={"error": str(e)}
         )
         return {}
 
-def get_leaderboard_stats() -> Dict[str, Any]:
+
+def get_commit_stats(author: Optional[str] = None,
+                    start_date: Optional[str] = None,
+                    end_date: Optional[str] = None) -> Dict[str, Any]:
+    """Get commit statistics for the repository.
+
+    Args:
+        author: Optional author to filter commits
+        start_date: Optional start date in YYYY-MM-DD format
+        end_date: Optional end date in YYYY-MM-DD format
+
+    Returns:
+        Dictionary containing commit statistics
+    """
+    # Filters are answered from the stored rollups
+    since, until = resolve_date_range(start_date, end_date)
+    return _run_single("commit", CommitAggregator(author, since, until))
+
+def get_churn_stats() -> Dict[str, Any]:
+    """Get code churn statistics for the repository.
+
+    Returns:
+        Dictionary containing code churn statistics
+    """
+    return _run_single("churn", ChurnAggregator())
+
+def get_team_stats(approximate: bool = False) -> Dict[str, Any]:
+    """Get team collaboration statistics.
+
+    Args:
+        approximate: Whether to estimate files touched per author
+
+    Returns:
+        Dictionary containing team collaboration statistics
+    """
+    return _run_single("team", TeamAggregator(approximate))
+
+def get_leaderboard_stats(
+    rebuild: bool = False,
+    top_files: Optional[int] = LEADERBOARD_TOP_FILES,
+    approximate: Optional[bool] = None,
+) -> Dict[str, Any]:
     """Get leaderboard statistics showing line-by-line changes per author.
-    
+
+    Args:
+        rebuild: Whether to rebuild the stats cache from scratch
+        top_files: Number of files to list per author, all when None
+        approximate: Whether to track files in bounded memory, chosen by
+            history size when None
+
     Returns:
         Dictionary containing leaderboard statistics
     """
-    try:
-        # Get detailed change statistics per author
-        cmd = "git log --numstat --pretty=format:%an|%ae|%at"
-        output = GitCommand.run(cmd)
-        
-        author_stats = defaultdict(lambda: {
-            "additions": 0,
-            "deletions": 0,
-            "commits": 0,
-            "files_changed": defaultdict(lambda: {"additions": 0, "deletions": 0})
-        })
-        
-        current_author = None
-        current_email = None
-        
-        for line in output.split("\n"):
-            if not line:
-                continue
-                
-            # Check if line is author info
-            if "|" in line:
-                current_author, current_email, _ = line.split("|")
-                author_stats[current_author]["commits"] += 1
-                continue
-                
-            # Skip empty lines and non-numeric lines
-            if not line or not line[0].isdigit():
-                continue
-                
-            # Parse file changes
-            additions, deletions, filename = line.split("\t")
-            if additions.isdigit() and deletions.isdigit():
-                author_stats[current_author]["additions"] += int(additions)
-                author_stats[current_author]["deletions"] += int(deletions)
-                author_stats[current_author]["files_changed"][filename]["additions"] += int(additions)
-                author_stats[current_author]["files_changed"][filename]["deletions"] += int(deletions)
-        
-        # Calculate total changes and sort authors
-        for author in author_stats:
-            author_stats[author]["total_changes"] = (
-                author_stats[author]["additions"] + author_stats[author]["deletions"]
-            )
-            # Convert files_changed to list for sorting
-            author_stats[author]["files_changed"] = [
-                {"file": f, "additions": s["additions"], "deletions": s["deletions"]}
-                for f, s in author_stats[author]["files_changed"].items()
-            ]
-            # Sort files by total changes
-            author_stats[author]["files_changed"].sort(
-                key=lambda x: x["additions"] + x["deletions"],
-                reverse=True
-            )
-        
-        # Sort authors by total changes
-        sorted_authors = sorted(
-            author_stats.items(),
-            key=lambda x: x[1]["total_changes"],
-            reverse=True
-        )
-        
-        return {
-            "authors": [
-                {
-                    "name": author,
-                    "email": author_stats[author].get("email", ""),
-                    "commits": stats["commits"],
-                    "additions": stats["additions"],
-                    "deletions": stats["deletions"],
-                    "total_changes": stats["total_changes"],
-                    "files_changed": stats["files_changed"]
+    return _run_single(
+        "leaderboard", LeaderboardAggregator(top_files, approximate), rebuild=rebuild
+    )
+
+
+def list_tree_files(rev: str = "HEAD") -> List[Tuple[str, str]]:
+    """List the regular files of a commit's tree.
+
+    Args:
+        rev: Commit to list
+
+    Returns:
+        (blob id, path) pairs; symlinks and submodules are skipped
+
+    Raises:
+        GitCommandError: If the tree cannot be read
+    """
+    files = []
+    for entry in GitCommand.stream(
+        ["git", "ls-tree", "-r", "-z", "--full-tree", rev], separator="\0"
+    ):
+        if not entry:
+            continue
+        info, _, path = entry.partition("\t")
+        mode, kind, oid = info.split(" ")
+        if kind == "blob" and mode in ("100644", "100755"):
+            files.append((oid, path))
+    return files
+
+
+def list_text_files(rev: str = "HEAD") -> Set[str]:
+    """List the files of a commit's tree that git considers text.
+
+    One ``git grep -I`` over the tree applies git's own binary detection,
+    including ``.gitattributes``, without reading the blobs here. Empty
+    files have no lines to match and are left out as well.
+
+    Args:
+        rev: Commit to list
+
+    Returns:
+        Set of paths relative to the top of the repository
+    """
+    prefix = f"{rev}:"
+    argv = ["git", "grep", "-I", "-z", "--name-only", "--full-name", "-e", ""]
+    # Exit status 1 only means that no file matched
+    records = GitCommand.stream(
+        [*argv, rev, "--", ":(top)"], separator="\0", check=False
+    )
+    return {path[len(prefix) :] for path in records if path.startswith(prefix)}
+
+
+def blame_file(rev: str, path: str, root: str = ".") -> List[Tuple[str, str, int]]:
+    """Count the surviving lines of a file per author.
+
+    Args:
+        rev: Commit to blame at
+        path: Path of the file relative to root, which should be a text
+            file, see :func:`list_text_files`
+        root: Top of the repository's work tree
+
+    Returns:
+        (author, email, lines) rows
+
+    Raises:
+        GitCommandError: If blame fails
+    """
+    authors: Dict[str, Tuple[str, str]] = {}
+    lines: Dict[str, int] = defaultdict(int)
+    commit = None
+    header = True
+    argv = ["git", "-C", root, "blame", "--porcelain", rev, "--", path]
+    for line in GitCommand.stream(argv):
+        if header:
+            # "<commit> <original line> <final line> [<group size>]"
+            commit = line.split(" ", 1)[0]
+            header = False
+        elif line.startswith("\t"):
+            lines[commit] += 1
+            header = True
+        elif line.startswith("author "):
+            authors[commit] = (line[7:], authors.get(commit, ("", ""))[1])
+        elif line.startswith("author-mail "):
+            email = line[12:].strip("<>")
+            authors[commit] = (authors.get(commit, ("", ""))[0], email)
+
+    owners: Dict[Tuple[str, str], int] = defaultdict(int)
+    for commit, count in lines.items():
+        owners[authors.get(commit, ("", ""))] += count
+    return [(author, email, count) for (author, email), count in owners.items()]
+
+
+def collect_ownership(
+    rebuild: bool = False,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """Get current line ownership per author, directory and file.
+
+    Blame results are cached in the :class:`StatsStore` by (blob id, path),
+    so only files whose content changed since the last run are blamed
+    again, by a pool of threads each driving its own ``git blame``.
+
+    Args:
+        rebuild: Whether to discard cached blame results first
+        workers: Number of concurrent blames, defaults to
+            :func:`stats_workers`
+        progress: Optional callback receiving (files blamed, files to blame)
+
+    Returns:
+        Dictionary containing ownership statistics
+
+    Raises:
+        GitCommandError: If the tree or a file's blame cannot be read
+    """
+    rev = GitCommand.run("git rev-parse HEAD", cache=True)
+    root = GitCommand.run("git rev-parse --show-toplevel", cache=True)
+    files = list_tree_files(rev)
+    with StatsStore() as store:
+        if rebuild:
+            with store.conn:
+                store.conn.execute("DELETE FROM blame_lines")
+                store.conn.execute("DELETE FROM blame_files")
+        entries = store.blame_entries()
+        missing = [entry for entry in files if entry not in entries]
+        if missing:
+            # Binary files own no lines and are recorded without a blame
+            text = list_text_files(rev)
+            for oid, path in missing:
+                if path not in text:
+                    entries[(oid, path)] = []
+                    store.store_blame(oid, path, [])
+            missing = [entry for entry in missing if entry[1] in text]
+        if progress:
+            progress(0, len(missing))
+        if missing:
+            with ThreadPoolExecutor(max_workers=workers or stats_workers()) as pool:
+                futures = {
+                    pool.submit(blame_file, rev, path, root): (oid, path)
+                    for oid, path in missing
                 }
-                for author, stats in sorted_authors
-            ]
-        }
-        
-    except GitCommandError as e:
+                for done, future in enumerate(as_completed(futures), 1):
+                    oid, path = futures[future]
+                    entries[(oid, path)] = future.result()
+                    store.store_blame(oid, path, entries[(oid, path)])
+                    if done % 100 == 0:
+                        store.conn.commit()
+                    if progress:
+                        progress(done, len(missing))
+        store.conn.commit()
+        store.prune_blame(files)
+
+    logger.log(
+        level="info",
+        command="stats",
+        message="Ownership computed",
+        metadata={"files": len(files), "blamed": len(missing)},
+    )
+
+    authors: Dict[str, Dict[str, Any]] = {}
+    directories: Dict[str, Dict[str, Any]] = {}
+    file_stats = []
+    total_lines = 0
+    for oid, path in sorted(files, key=lambda entry: entry[1]):
+        owners = entries[(oid, path)]
+        if not owners:
+            continue
+        lines = sum(count for _, _, count in owners)
+        owner = max(owners, key=lambda row: (row[2], row[0]))
+        file_stats.append(
+            {"file": path, "lines": lines, "owner": owner[0], "owner_lines": owner[2]}
+        )
+        total_lines += lines
+        directory = directories.setdefault(
+            _top_level_dir(path), {"lines": 0, "authors": defaultdict(int)}
+        )
+        directory["lines"] += lines
+        for author, email, count in owners:
+            stats = authors.setdefault(author, {"email": email, "lines": 0, "files": 0})
+            stats["lines"] += count
+            stats["files"] += 1
+            directory["authors"][author] += count
+
+    for stats in authors.values():
+        stats["share"] = round(100 * stats["lines"] / total_lines, 2)
+    for directory in directories.values():
+        directory["authors"] = dict(
+            sorted(directory["authors"].items(), key=lambda item: (-item[1], item[0]))
+        )
+        directory["owner"] = next(iter(directory["authors"]), None)
+
+    return {
+        "total_lines": total_lines,
+        "total_files": len(file_stats),
+        "authors": dict(
+            sorted(authors.items(), key=lambda item: (-item[1]["lines"], item[0]))
+        ),
+        "directories": directories,
+        "files": file_stats,
+    }
+
+
+def get_ownership_stats(
+    rebuild: bool = False, progress: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, Any]:
+    """Get current line ownership statistics.
+
+    Args:
+        rebuild: Whether to re-blame every file
+        progress: Optional callback receiving (files blamed, files to blame)
+
+    Returns:
+        Dictionary containing ownership statistics
+    """
+    try:
+        return collect_ownership(rebuild=rebuild, progress=progress)
+    except (GitCommandError, sqlite3.Error) as e:
         logger.log(
             level="error",
             command="stats",
-            message="Failed to get leaderboard statistics",
+            message="Failed to get ownership statistics",
             metadata={"error": str(e)}
         )
         return {}
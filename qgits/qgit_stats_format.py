@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Streaming output formats for QGit statistics.
+
+Reports are flattened into small self-describing records, one per author,
+file, day or directory plus one summary per report, and written as each
+report completes instead of as one nested document at the end. Records are
+emitted either as newline-delimited JSON or as a stream of MessagePack maps
+encoded with ``struct``, which dashboards can decode with any MessagePack
+reader.
+"""
+
+import json
+import struct
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, TextIO, Tuple
+
+# Report keys that hold one record per entry: key -> (record type, name
+# field, value field for entries that are plain counts)
+RECORD_KEYS = {
+    "authors": ("author", "name", "commits"),
+    "commit_dates": ("day", "date", "commits"),
+    "directories": ("directory", "name", None),
+    "most_changed_files": ("file", "file", None),
+    "files_changed": ("file", "file", None),
+}
+
+# MessagePack integer forms as (value bits, type code, struct format)
+UINT_FORMS = ((8, 0xCC, "B"), (16, 0xCD, "H"), (32, 0xCE, "I"), (64, 0xCF, "Q"))
+INT_FORMS = ((7, 0xD0, "b"), (15, 0xD1, "h"), (31, 0xD2, "i"), (63, 0xD3, "q"))
+
+# Output formats understood by write_stats
+STREAM_FORMATS = ("json", "msgpack")
+
+
+def stats_records(report: str, stats: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Flatten one statistics report into records.
+
+    Args:
+        report: Report name, e.g. "commit" or "leaderboard"
+        stats: The report's statistics
+
+    Yields:
+        A summary record with the report's scalar values, then one record
+        per entry of each nested collection, tagged with "report" and "type"
+    """
+    yield {
+        "report": report,
+        "type": "summary",
+        **{k: v for k, v in stats.items() if not isinstance(v, (dict, list))},
+    }
+    for key, value in stats.items():
+        if isinstance(value, (dict, list)):
+            yield from _entry_records(report, key, value, {})
+
+
+def _entry_records(
+    report: str, key: str, entries: Any, parent: Dict[str, Any]
+) -> Iterator[Dict[str, Any]]:
+    """Flatten the entries of one nested collection into records."""
+    record_type, name_field, value_field = RECORD_KEYS.get(key, (key, "name", "value"))
+    items = entries.items() if isinstance(entries, dict) else enumerate(entries)
+    for name, entry in items:
+        record = {"report": report, "type": record_type, **parent}
+        if isinstance(entries, dict):
+            record[name_field] = name
+        nested = []
+        if isinstance(entry, dict):
+            for field, value in entry.items():
+                if isinstance(value, (dict, list)):
+                    nested.append((field, value))
+                else:
+                    record[field] = value
+        else:
+            record[value_field] = entry
+        yield record
+
+        # Nested collections, e.g. an author's files, reference their owner
+        owner = {record_type: record.get(name_field, name)}
+        for field, value in nested:
+            yield from _entry_records(report, field, value, owner)
+
+
+def write_ndjson(records: Iterable[Dict[str, Any]], stream: TextIO) -> int:
+    """Write records as newline-delimited JSON.
+
+    Args:
+        records: Records to write
+        stream: Text stream to write to
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, separators=(",", ":")))
+        stream.write("\n")
+        count += 1
+    stream.flush()
+    return count
+
+
+def pack_msgpack(value: Any, out: bytearray) -> None:
+    """Append the MessagePack encoding of a value.
+
+    Supports None, bools, ints, floats, strings, bytes, lists, tuples and
+    dicts, which covers every statistics record.
+
+    Args:
+        value: Value to encode
+        out: Buffer to append to
+
+    Raises:
+        TypeError: If the value has an unsupported type
+    """
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        out += struct.pack(">Bd", 0xCB, value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        _pack_header(len(data), out, 0xA0, 32, (0xD9, 0xDA, 0xDB))
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        _pack_header(len(value), out, None, 0, (0xC4, 0xC5, 0xC6))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), out, 0x90, 16, (None, 0xDC, 0xDD))
+        for item in value:
+            pack_msgpack(item, out)
+    elif isinstance(value, dict):
+        _pack_header(len(value), out, 0x80, 16, (None, 0xDE, 0xDF))
+        for key, item in value.items():
+            pack_msgpack(key, out)
+            pack_msgpack(item, out)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    """Append the smallest MessagePack integer encoding of a value."""
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out += struct.pack(">b", value)
+    else:
+        forms = UINT_FORMS if value >= 0 else INT_FORMS
+        for bits, code, fmt in forms:
+            if -(1 << bits) <= value < (1 << bits):
+                out += struct.pack(f">B{fmt}", code, value)
+                return
+        raise OverflowError("Integer too large for MessagePack")
+
+
+def _pack_header(
+    length: int,
+    out: bytearray,
+    fix_code: Any,
+    fix_limit: int,
+    codes: Tuple[Any, Any, Any],
+) -> None:
+    """Append a MessagePack length header.
+
+    Args:
+        length: Number of bytes or items that follow
+        out: Buffer to append to
+        fix_code: Code of the compact form holding the length in its low
+            bits, None if the type has none
+        fix_limit: Lengths below this use the compact form
+        codes: Codes of the 8, 16 and 32-bit length forms, None where the
+            type has no such form
+    """
+    if fix_code is not None and length < fix_limit:
+        out.append(fix_code | length)
+        return
+    for code, limit, fmt in zip(codes, (1 << 8, 1 << 16, 1 << 32), "BHI"):
+        if code is not None and length < limit:
+            out += struct.pack(f">B{fmt}", code, length)
+            return
+    raise OverflowError("Value too long for MessagePack")
+
+
+def write_msgpack(records: Iterable[Dict[str, Any]], stream: BinaryIO) -> int:
+    """Write records as a stream of MessagePack maps.
+
+    Args:
+        records: Records to write
+        stream: Binary stream to write to
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    buffer = bytearray()
+    for record in records:
+        pack_msgpack(record, buffer)
+        count += 1
+        if len(buffer) >= 64 * 1024:
+            stream.write(buffer)
+            buffer.clear()
+    stream.write(buffer)
+    stream.flush()
+    return count
+
+
+def write_stats(
+    reports: Iterable[Tuple[str, Dict[str, Any]]],
+    output_format: str,
+    stream: Any,
+) -> int:
+    """Write reports as records, each report as soon as it is available.
+
+    Args:
+        reports: (report name, statistics) pairs, e.g. from
+            :func:`qgits.qgit_stats.iter_stats`
+        output_format: One of ``STREAM_FORMATS``
+        stream: Text stream for "json"; binary stream for "msgpack"
+
+    Returns:
+        Number of records written
+
+    Raises:
+        ValueError: If the output format is unknown
+    """
+    if output_format not in STREAM_FORMATS:
+        raise ValueError(f"Unknown stats format: {output_format}")
+    writer = write_ndjson if output_format == "json" else write_msgpack
+    return sum(writer(stats_records(name, stats), stream) for name, stats in reports)
@@ -10,6 +10,7 @@ from qgits.qgit_errors import (
     format_error,
 )
 from qgits.qgit_git import GitCommand
+from qgits.qgit_graph import Reachability
 from qgits.qgit_snapshot import create_snapshot
 
 
@@ -28,19 +29,25 @@ def analyze_operations(operations: List[str]) -> List[Dict[str, Any]]:
     """
     analyzed_ops = []
 
+    parsed_ops = []
     for op in operations:
         parts = op.split()
         if len(parts) < 3:
             continue
 
         ref, commit_hash, *action = parts
-        action = " ".join(action)
+        parsed_ops.append((ref, commit_hash, " ".join(action)))
 
+    # Look up remote containment for all operations in a single history walk
+    containment = Reachability.containing(
+        [commit_hash for _, commit_hash, _ in parsed_ops],
+        Reachability.remote_branches(),
+    )
+
+    for ref, commit_hash, action in parsed_ops:
         try:
             # Check if this operation affects any remote branches
-            remote_branches = GitCommand.run(
-                f"git branch -r --contains {commit_hash}"
-            ).strip()
+            remote_branches = containment[commit_hash]
 
             operation_info = {
                 "type": "unknown",
@@ -48,9 +55,7 @@ def analyze_operations(operations: List[str]) -> List[Dict[str, Any]]:
                 "commit": commit_hash,
                 "action": action,
                 "affects_remote": bool(remote_branches),
-                "branches_affected": (
-                    remote_branches.split("\n") if remote_branches else []
-                ),
+                "branches_affected": remote_branches,
                 "timestamp": GitCommand.get_commit_info(commit_hash)[
                     "timestamp"
                 ].isoformat(),
@@ -348,7 +353,7 @@ def undo_operation(
 
         try:
             # Get recent operations
-            operations = GitCommand.run("git reflog --format='%h %gs' -n 50").split(
+            operations = GitCommand.run("git reflog --format='%gd %h %gs' -n 50").split(
                 "\n"
             )
             analyzed_ops = analyze_operations(operations)
@@ -3,168 +3,1014 @@
 """Utility functions for qgit operations."""
 
 import fnmatch
+import hashlib
+import json
 import os
-from typing import Any, Dict, List, Tuple
+import queue
+import re
+import shlex
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from qgits.qgit_errors import GitCommandError
+from qgits.qgit_git import GitCommand
 
-def detect_risky_files(
-    directory: str = ".", batch_size: int = 1000
-) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
-    """Scan directory for potentially risky files.
+
+# Glob patterns of potentially risky files by category. Patterns follow
+# .gitignore conventions: a trailing "/" matches a directory at any depth,
+# a pattern without "/" matches the file name at any depth.
+RISKY_PATTERNS: Dict[str, List[str]] = {
+    "secrets": [
+        "*.pem",
+        "*.key",
+        "*.cert",
+        "*.p12",
+        "*.pfx",  # Certificates and keys
+        "*password*",
+        "*secret*",
+        "*credential*",  # Common secret patterns
+        "*.env",
+        ".env.*",
+        ".env",  # Environment files
+        "*config*.json",
+        "*config*.yaml",
+        "*config*.yml",  # Config files
+        "*auth*",
+        "*token*",  # Auth-related files
+        "id_rsa",
+        "id_dsa",
+        "*.pub",  # SSH keys
+        "*.npmrc",  # NPM config files
+        ".cargo/credentials.toml",  # Rust cargo credentials
+        "*.cargo-credentials",  # Rust cargo credentials
+        ".yarnrc.yml",  # Yarn config files
+        ".pnpm-store/",  # pnpm store
+    ],
+    "large_files": [
+        "*.zip",
+        "*.tar.gz",
+        "*.tar",
+        "*.rar",  # Archives
+        "*.iso",
+        "*.img",
+        "*.dmg",  # Disk images
+        "*.mp4",
+        "*.mov",
+        "*.avi",
+        "*.mkv",  # Videos
+        "*.jpg",
+        "*.jpeg",
+        "*.png",
+        "*.gif",  # Images
+        "*.pdf",
+        "*.doc",
+        "*.docx",
+        "*.ppt",  # Documents
+        "*.bin",
+        "*.exe",
+        "*.dll",  # Binaries
+        "*.wasm",  # WebAssembly files
+        "*.rlib",  # Rust library files
+        "*.rmeta",  # Rust metadata files
+        "*.rdata",  # Rust data files
+        "*.js.map",  # JavaScript source maps
+        "*.ts.map",  # TypeScript source maps
+    ],
+    "development": [
+        "__pycache__/",
+        "*.pyc",
+        "*.pyo",  # Python cache
+        "node_modules/",
+        "bower_components/",  # JS dependencies
+        "vendor/",
+        "packages/",  # Package directories
+        ".venv/",
+        "venv/",
+        "env/",  # Virtual environments
+        "build/",
+        "dist/",
+        "*.egg-info/",  # Build artifacts
+        ".gradle/",
+        "target/",  # Build directories
+        "*.log",
+        "logs/",
+        "*.debug",  # Log files
+        ".DS_Store",
+        "Thumbs.db",  # OS files
+        "*.swp",
+        "*.swo",
+        "*~",  # Editor files
+        "*.sqlite",
+        "*.db",
+        "*.sqlite3",  # Databases
+        ".idea/",
+        ".vscode/",
+        "*.sublime-*",  # IDE files
+        # JavaScript/TypeScript specific
+        "coverage/",  # Test coverage reports
+        ".nyc_output/",  # NYC coverage reports
+        "*.tsbuildinfo",  # TypeScript build info
+        ".eslintcache",  # ESLint cache
+        ".cache/",  # Various caches
+        "out/",  # Build output
+        # Rust specific
+        "Cargo.lock",  # Rust lock file
+        "*.rlib",  # Rust library files
+        "*.rmeta",  # Rust metadata files
+        "*.rdata",  # Rust data files
+        "*.dSYM/",  # Debug symbols
+        ".rustc_info.json",  # Rust compiler info
+        ".cargo-ok",  # Cargo build status
+    ],
+}
+
+
+# Where detect_risky_files takes candidate files from: the working tree, the
+# files git tracks plus untracked files that are not ignored, or the files
+# added or modified by the commits about to be pushed
+SCAN_SOURCES = ("filesystem", "index", "push")
+
+# Raw diff statuses of a file whose new blob is part of the commit
+PUSHED_STATUSES = frozenset("AMT")
+
+# Index entries with this mode are submodules, not files
+SUBMODULE_MODE = "160000"
+
+# Directories modified this recently are not cached, as a later change within
+# the same timestamp tick would leave their stat tuple unchanged
+RACY_MTIME_NS = 2_000_000_000
+
+# A directory listing as (subdirectory names, number of files, matching
+# entries as (name, is directory, [(category, pattern), ...]))
+DirListing = Tuple[List[str], int, List[Tuple[str, bool, List[Tuple[str, str]]]]]
+
+# Stat tuple identifying a directory's contents: (inode, size, mtime_ns)
+StatKey = Tuple[int, int, int]
+
+# Characters that make a pattern a glob rather than a literal name
+GLOB_CHARS = frozenset("*?[")
+
+
+def _glob_regex(glob: str) -> str:
+    """Translate a glob into a regex where only "**" crosses directories.
+
+    Args:
+        glob: Glob pattern, e.g. "*config*.json"
+
+    Returns:
+        Regex source matching the same strings
+    """
+    parts = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        char = glob[i]
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            # A "]" right after "[" or "[!" belongs to the set
+            first = i + 2 if glob[i + 1 : i + 2] == "!" else i + 1
+            close = glob.find("]", first + 1)
+            if close == -1:
+                parts.append(re.escape(char))
+            else:
+                body = glob[i + 1 : close]
+                negate = body.startswith("!")
+                if negate:
+                    body = body[1:]
+                # Escape what is special in a regex set but literal in a glob
+                body = re.sub(r"([\\\[\]^&~|])", r"\\\1", body)
+                # A negated set never matches the directory separator
+                parts.append(f"[^/{body}]" if negate else f"[{body}]")
+                i = close + 1
+                continue
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+class PatternMatcher:
+    """Match paths against categorized glob patterns in a single pass.
+
+    Patterns are compiled once into an extension table for "*.ext"
+    patterns, a set of exact file names, a set of directory names and one
+    combined regex for the remaining globs, so classifying a path costs a
+    few dict lookups and at most one regex match instead of one ``fnmatch``
+    call per pattern. Within a category, the pattern listed first wins.
+    Directory patterns are also compiled on their own, so a walker can stop
+    at a matching directory without listing its contents.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        """Compile a pattern table.
+
+        Args:
+            patterns: Glob patterns keyed by category, in priority order
+        """
+        self.sources: List[Tuple[str, str]] = []
+        self._extensions: Dict[str, Tuple[int, ...]] = {}
+        self._names: Dict[str, Tuple[int, ...]] = {}
+        self._directories: Dict[str, Tuple[int, ...]] = {}
+        self._dir_cache: Dict[str, Tuple[int, ...]] = {}
+        globs: Dict[str, List[str]] = {}
+        dir_globs: Dict[str, List[str]] = {}
+
+        seen = set()
+        for category, category_patterns in patterns.items():
+            for pattern in category_patterns:
+                is_dir = pattern.endswith("/")
+                body = pattern.rstrip("/")
+                # Unanchored patterns match at any depth already
+                if body.startswith("**/"):
+                    body = body[3:]
+                anchored = body.startswith("/")
+                body = body.lstrip("/")
+                key = (category, is_dir, anchored, body)
+                if not body or key in seen:
+                    continue
+                seen.add(key)
+
+                index = len(self.sources)
+                self.sources.append((category, pattern))
+                literal = not GLOB_CHARS.intersection(body) and "/" not in body
+                extension = body[1:]
+                if literal and not anchored:
+                    table = self._directories if is_dir else self._names
+                    table[body] = table.get(body, ()) + (index,)
+                elif (
+                    not is_dir
+                    and not anchored
+                    and body.startswith("*.")
+                    and not GLOB_CHARS.intersection(extension)
+                    and "/" not in extension
+                ):
+                    self._extensions[extension] = self._extensions.get(
+                        extension, ()
+                    ) + (index,)
+                else:
+                    regex = ("" if anchored else "(?:.*/)?") + _glob_regex(body)
+                    if is_dir:
+                        dir_globs.setdefault(category, []).append(
+                            f"(?P<p{index}>{regex})"
+                        )
+                        regex += "/.*"
+                    globs.setdefault(category, []).append(f"(?P<p{index}>{regex})")
+
+        self._regex = self._combine(globs)
+        self._dir_regex = self._combine(dir_globs)
+        # Identifies the compiled pattern set, e.g. for invalidating caches
+        self.fingerprint = hashlib.sha1(repr(self.sources).encode()).hexdigest()
+
+    @staticmethod
+    def _combine(globs: Dict[str, List[str]]) -> Optional["re.Pattern[str]"]:
+        """Combine per-category glob regexes into one pattern.
+
+        Each category becomes an optional lookahead, so a single match
+        reports the first matching glob of every category.
+
+        Args:
+            globs: Named-group regexes keyed by category, in priority order
+
+        Returns:
+            Compiled pattern, None if there are no globs
+        """
+        if not globs:
+            return None
+        return re.compile(
+            "".join(
+                f"(?:(?=(?:{'|'.join(alternatives)})\\Z))?"
+                for alternatives in globs.values()
+            ),
+            re.DOTALL,
+        )
+
+    def _best(self, matches: Iterable[int]) -> List[Tuple[str, str]]:
+        """Reduce matching pattern indices to the first match per category."""
+        best: Dict[str, int] = {}
+        for index in matches:
+            category = self.sources[index][0]
+            if index < best.get(category, len(self.sources)):
+                best[category] = index
+        return [self.sources[index] for index in sorted(best.values())]
+
+    @staticmethod
+    def _group_matches(regex: Optional["re.Pattern[str]"], path: str) -> List[int]:
+        """Indices of the glob patterns a combined regex matched."""
+        match = regex.match(path) if regex is not None else None
+        # Most paths match nothing, which leaves every group unset
+        if match is None or match.lastindex is None:
+            return []
+        return [
+            int(group[1:])
+            for group, value in match.groupdict().items()
+            if value is not None
+        ]
+
+    def _directory_matches(self, directory: str) -> Tuple[int, ...]:
+        """Patterns matching any component of a directory, cached per directory."""
+        matches = self._dir_cache.get(directory)
+        if matches is None:
+            matches = ()
+            for component in directory.split("/"):
+                matches += self._directories.get(component, ())
+            self._dir_cache[directory] = matches
+        return matches
+
+    def match(self, path: str) -> List[Tuple[str, str]]:
+        """Classify a path.
+
+        Args:
+            path: "/"-separated path relative to the scanned directory
+
+        Returns:
+            One (category, source pattern) pair per matching category, in
+            category order; empty if nothing matches
+        """
+        directory, _, name = path.rpartition("/")
+        matches = list(self._names.get(name, ()))
+        if directory and self._directories:
+            matches.extend(self._directory_matches(directory))
+        dot = name.find(".")
+        while dot != -1:
+            matches.extend(self._extensions.get(name[dot:], ()))
+            dot = name.find(".", dot + 1)
+        matches.extend(self._group_matches(self._regex, path))
+        return self._best(matches)
+
+    def match_directory(self, path: str) -> List[Tuple[str, str]]:
+        """Classify a directory by the directory patterns alone.
+
+        Only the last component is looked up, as a walker that stops at
+        matching directories never reaches the contents of a matching
+        parent.
+
+        Args:
+            path: "/"-separated directory path relative to the scanned
+                directory, without a trailing "/"
+
+        Returns:
+            One (category, source pattern) pair per matching category, in
+            category order; empty if nothing matches
+        """
+        matches = list(self._directories.get(path.rpartition("/")[2], ()))
+        matches.extend(self._group_matches(self._dir_regex, path))
+        return self._best(matches)
+
+
+@lru_cache(maxsize=None)
+def risky_matcher() -> PatternMatcher:
+    """Get the compiled matcher for ``RISKY_PATTERNS``.
+
+    Returns:
+        Shared PatternMatcher, compiled on first use
+    """
+    return PatternMatcher(RISKY_PATTERNS)
+
+
+@dataclass
+class ScanProgress:
+    """Progress of a running directory scan.
+
+    Attributes:
+        files: Files classified so far
+        directories: Directories listed so far
+        pending: Directories queued or being listed
+        elapsed: Seconds since the scan started
+    """
+
+    files: int
+    directories: int
+    pending: int
+    elapsed: float
+
+    @property
+    def files_per_second(self) -> float:
+        """Files classified per second so far."""
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class ScanCache:
+    """Persistent per-directory cache of working-tree scan results.
+
+    Each directory's listing and classification is kept in SQLite under
+    ``.git/qgit/scan.db`` with the directory's (inode, size, mtime_ns).
+    Creating, removing or renaming an entry changes a directory's mtime, so
+    a directory whose stat tuple is unchanged is neither listed nor
+    classified again; only its matching files are stat'ed for their current
+    size. Everything is discarded when the compiled patterns change.
+    """
+
+    SCHEMA_VERSION = "1"
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            db_path: Optional database path, defaults to the repository's
+                ``.git/qgit/scan.db`` or ``~/.qgit/cache`` if that is not
+                writable or there is no repository
+        """
+        self.db_path = db_path or self._default_path()
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_db()
+
+    @staticmethod
+    def _default_path() -> str:
+        """Pick the cache location for the current repository."""
+        try:
+            common_dir = os.path.abspath(
+                GitCommand.run("git rev-parse --git-common-dir", cache=True)
+            )
+            cache_dir = os.path.join(common_dir, "qgit")
+            os.makedirs(cache_dir, exist_ok=True)
+            if os.access(cache_dir, os.W_OK):
+                return os.path.join(cache_dir, "scan.db")
+        except (GitCommandError, OSError):
+            common_dir = os.getcwd()
+        cache_dir = os.path.join(os.path.expanduser("~"), ".qgit", "cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        key = hashlib.sha1(common_dir.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(cache_dir, f"scan-{key}.db")
+
+    def _init_db(self) -> None:
+        """Create the schema, discarding caches from other schema versions."""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema'"
+            ).fetchone()
+            if row and row[0] != self.SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS directories")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS directories (
+                    root TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    inode INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    files INTEGER NOT NULL,
+                    subdirectories TEXT NOT NULL,
+                    matches TEXT NOT NULL,
+                    PRIMARY KEY (root, path)
+                ) WITHOUT ROWID
+                """
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('schema', ?)",
+                (self.SCHEMA_VERSION,),
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self) -> "ScanCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def load(
+        self, root: str, fingerprint: str
+    ) -> Dict[str, Tuple[StatKey, DirListing]]:
+        """Load the cached directories of a scan root.
+
+        Args:
+            root: Absolute path of the scanned directory
+            fingerprint: Fingerprint of the compiled patterns; a different
+                one than last time discards the whole cache
+
+        Returns:
+            Stat tuple and listing keyed by the directory's relative prefix
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'patterns'"
+            ).fetchone()
+            if not row or row[0] != fingerprint:
+                self.conn.execute("DELETE FROM directories")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('patterns', ?)",
+                    (fingerprint,),
+                )
+        rows = self.conn.execute(
+            "SELECT path, inode, size, mtime_ns, files, subdirectories, matches "
+            "FROM directories WHERE root = ?",
+            (root,),
+        )
+        return {
+            path: (
+                (inode, size, mtime_ns),
+                (
+                    subdirectories.split("\0") if subdirectories else [],
+                    files,
+                    [
+                        (name, directory, [tuple(match) for match in matches])
+                        for name, directory, matches in json.loads(matches)
+                    ],
+                ),
+            )
+            for path, inode, size, mtime_ns, files, subdirectories, matches in rows
+        }
+
+    def save(
+        self,
+        root: str,
+        updates: Dict[str, Tuple[StatKey, DirListing]],
+        removed: Iterable[str],
+    ) -> None:
+        """Store changed directories and forget removed ones.
+
+        Args:
+            root: Absolute path of the scanned directory
+            updates: Stat tuple and listing keyed by relative prefix
+            removed: Prefixes of directories that no longer exist
+        """
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM directories WHERE root = ? AND path = ?",
+                ((root, path) for path in removed),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        root,
+                        path,
+                        *key,
+                        files,
+                        "\0".join(subdirectories),
+                        json.dumps(matches),
+                    )
+                    for path, (key, (subdirectories, files, matches)) in updates.items()
+                ),
+            )
+
+
+def _list_directory(
+    path: str, prefix: str, matcher: PatternMatcher
+) -> Tuple[DirListing, Dict[str, int]]:
+    """List and classify the entries of one directory.
+
+    Args:
+        path: Directory to list
+        prefix: "/"-separated path of the directory relative to the scan
+            root, with a trailing "/", or "" for the root
+        matcher: Compiled risky patterns
+
+    Returns:
+        Tuple of (listing, sizes of matching files from their cached
+        ``DirEntry.stat()``)
+    """
+    subdirectories = []
+    matched = []
+    sizes = {}
+    files = 0
+    for entry in os.scandir(path):
+        relpath = prefix + entry.name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir:
+            # Like os.walk, symlinked directories are not followed
+            if entry.name == ".git" or entry.is_symlink():
+                continue
+            matches = matcher.match_directory(relpath)
+            if not matches:
+                subdirectories.append(entry.name)
+                continue
+            # Record the directory once instead of listing its contents
+            matched.append((entry.name, True, matches))
+        else:
+            files += 1
+            matches = matcher.match(relpath)
+            if not matches:
+                continue
+            try:
+                sizes[entry.name] = entry.stat().st_size
+            except OSError:
+                continue
+            matched.append((entry.name, False, matches))
+    return (subdirectories, files, matched), sizes
+
+
+def _scan_directory(
+    path: str,
+    prefix: str,
+    matcher: PatternMatcher,
+    cached: Optional[Tuple[StatKey, DirListing]] = None,
+) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]], int, Any]:
+    """Scan one directory, reusing its cached listing if it is unchanged.
+
+    Args:
+        path: Directory to scan
+        prefix: "/"-separated path of the directory relative to the scan
+            root, with a trailing "/", or "" for the root
+        matcher: Compiled risky patterns
+        cached: Cached stat tuple and listing of the directory, if any
+
+    Returns:
+        Tuple of (subdirectories to descend into as (path, prefix) pairs,
+        matches found, number of files listed, (stat tuple, listing) to
+        cache or None if the cached listing was used or is racy)
+    """
+    try:
+        stat = os.stat(path)
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if cached is not None and cached[0] == key:
+            listing, sizes, update = cached[1], None, None
+        else:
+            listing, sizes = _list_directory(path, prefix, matcher)
+            racy = time.time_ns() - stat.st_mtime_ns < RACY_MTIME_NS
+            update = None if racy else (key, listing)
+    except OSError:
+        return [], [], 0, None
+
+    subdirectories, files, matched = listing
+    found = []
+    for name, directory, matches in matched:
+        entry_path = os.path.join(path, name)
+        if directory:
+            size = 0
+        elif sizes is not None:
+            size = sizes[name]
+        else:
+            try:
+                size = os.stat(entry_path).st_size
+            except OSError:
+                continue
+        for category, pattern in matches:
+            found.append(
+                {
+                    "path": entry_path,
+                    "size": size,
+                    "pattern": pattern,
+                    "category": category,
+                    "directory": directory,
+                }
+            )
+    children = [
+        (os.path.join(path, name), f"{prefix}{name}/") for name in subdirectories
+    ]
+    return children, found, files, update
+
+
+def _scan_filesystem(
+    directory: str,
+    matcher: PatternMatcher,
+    workers: Optional[int],
+    progress: Optional[Callable[[ScanProgress], None]],
+    cache: Optional[ScanCache] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Find risky files by walking the working tree.
+
+    Directories are listed with ``os.scandir`` by a pool of threads, and
+    sizes come from the cached ``DirEntry.stat()`` of matching files only.
+    Directories matching a directory pattern, such as ``node_modules/``,
+    are reported once as a single entry with ``"directory": True`` and
+    size 0 instead of being descended into. With a cache, directories whose
+    stat tuple is unchanged since the last scan are not listed again.
 
     Args:
         directory: Directory to scan
-        batch_size: Number of files to process in each batch
+        matcher: Compiled risky patterns
+        workers: Number of threads listing directories
+        progress: Optional progress callback
+        cache: Optional persistent cache of directory listings
 
     Returns:
-        Tuple of (scan results by category, total files scanned)
+        Tuple of (matches, total files scanned)
     """
-    risky_patterns = {
-        "secrets": [
-            "*.pem",
-            "*.key",
-            "*.cert",
-            "*.p12",
-            "*.pfx",  # Certificates and keys
-            "*password*",
-            "*secret*",
-            "*credential*",  # Common secret patterns
-            "*.env",
-            ".env.*",
-            ".env",  # Environment files
-            "*config*.json",
-            "*config*.yaml",
-            "*config*.yml",  # Config files
-            "*auth*",
-            "*token*",  # Auth-related files
-            "id_rsa",
-            "id_dsa",
-            "*.pub",  # SSH keys
-            "*.npmrc",  # NPM config files
-            ".cargo/credentials.toml",  # Rust cargo credentials
-            "*.cargo-credentials",  # Rust cargo credentials
-            "*.npmrc",  # NPM credentials
-            ".yarnrc.yml",  # Yarn config files
-            ".pnpm-store/",  # pnpm store
-        ],
-        "large_files": [
-            "*.zip",
-            "*.tar.gz",
-            "*.tar",
-            "*.rar",  # Archives
-            "*.iso",
-            "*.img",
-            "*.dmg",  # Disk images
-            "*.mp4",
-            "*.mov",
-            "*.avi",
-            "*.mkv",  # Videos
-            "*.jpg",
-            "*.jpeg",
-            "*.png",
-            "*.gif",  # Images
-            "*.pdf",
-            "*.doc",
-            "*.docx",
-            "*.ppt",  # Documents
-            "*.bin",
-            "*.exe",
-            "*.dll",  # Binaries
-            "*.wasm",  # WebAssembly files
-            "*.rlib",  # Rust library files
-            "*.rmeta",  # Rust metadata files
-            "*.rdata",  # Rust data files
-            "*.js.map",  # JavaScript source maps
-            "*.ts.map",  # TypeScript source maps
-        ],
-        "development": [
-            "__pycache__/",
-            "*.pyc",
-            "*.pyo",  # Python cache
-            "node_modules/",
-            "bower_components/",  # JS dependencies
-            "vendor/",
-            "packages/",  # Package directories
-            ".venv/",
-            "venv/",
-            "env/",  # Virtual environments
-            "build/",
-            "dist/",
-            "*.egg-info/",  # Build artifacts
-            ".gradle/",
-            "target/",  # Build directories
-            "*.log",
-            "logs/",
-            "*.debug",  # Log files
-            ".DS_Store",
-            "Thumbs.db",  # OS files
-            "*.swp",
-            "*.swo",
-            "*~",  # Editor files
-            "*.sqlite",
-            "*.db",
-            "*.sqlite3",  # Databases
-            ".idea/",
-            ".vscode/",
-            "*.sublime-*",  # IDE files
-            # JavaScript/TypeScript specific
-            "coverage/",  # Test coverage reports
-            ".nyc_output/",  # NYC coverage reports
-            "*.tsbuildinfo",  # TypeScript build info
-            ".eslintcache",  # ESLint cache
-            ".cache/",  # Various caches
-            "dist/",  # Build output
-            "build/",  # Build output
-            "out/",  # Build output
-            # Rust specific
-            "target/",  # Rust build directory
-            "**/target/",  # Rust build directory in subdirectories
-            "Cargo.lock",  # Rust lock file
-            "*.rlib",  # Rust library files
-            "*.rmeta",  # Rust metadata files
-            "*.rdata",  # Rust data files
-            "*.dSYM/",  # Debug symbols
-            ".rustc_info.json",  # Rust compiler info
-            ".cargo-ok",  # Cargo build status
-        ],
-    }
-
-    results = {category: [] for category in risky_patterns}
+    root = os.path.realpath(directory)
+    cached = cache.load(root, matcher.fingerprint) if cache else {}
+    updates: Dict[str, Tuple[StatKey, DirListing]] = {}
+    visited = set()
+    matches = []
     file_count = 0
-    batch = []
+    directory_count = 0
+    start = time.monotonic()
+    last_report = start
+
+    # Workers hand listings back through a queue, so the walk costs O(1)
+    # bookkeeping per directory however many are outstanding
+    listings: "queue.Queue[Any]" = queue.Queue()
+
+    def list_directory(path: str, prefix: str) -> None:
+        try:
+            scanned = _scan_directory(path, prefix, matcher, cached.get(prefix))
+            listings.put((prefix, scanned))
+        except Exception as e:
+            listings.put(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        executor.submit(list_directory, directory, "")
+        pending = 1
+        while pending:
+            try:
+                listing = listings.get(timeout=0.1)
+            except queue.Empty:
+                listing = None
+            if isinstance(listing, Exception):
+                raise listing
+            if listing is not None:
+                prefix, (subdirectories, found, files, update) = listing
+                visited.add(prefix)
+                if update is not None:
+                    updates[prefix] = update
+                pending -= 1
+                directory_count += 1
+                file_count += files
+                matches.extend(found)
+                for path, prefix in subdirectories:
+                    executor.submit(list_directory, path, prefix)
+                    pending += 1
+
+            now = time.monotonic()
+            if progress and (now - last_report >= 0.1 or not pending):
+                last_report = now
+                elapsed = now - start
+                progress(ScanProgress(file_count, directory_count, pending, elapsed))
+
+    if cache:
+        cache.save(root, updates, cached.keys() - visited)
+    return matches, file_count
+
+
+def _blob_sizes(directory: str, oids: Iterable[str]) -> Dict[str, int]:
+    """Look up the sizes of blobs with one ``git cat-file`` call.
+
+    Args:
+        directory: Directory inside the repository
+        oids: Blob ids
 
-    def process_batch(batch: List[str]) -> None:
-        for filepath in batch:
+    Returns:
+        Size in bytes keyed by blob id; missing blobs are left out
+
+    Raises:
+        GitCommandError: If the object database cannot be read
+    """
+    oids = list(oids)
+    if not oids:
+        return {}
+    sizes = {}
+    batch_check = ["git", "-C", directory, "cat-file"]
+    batch_check.append("--batch-check=%(objectname) %(objectsize)")
+    for line in GitCommand.stream(batch_check, input="\n".join(oids) + "\n"):
+        oid, _, size = line.partition(" ")
+        if size.isdigit():
+            sizes[oid] = int(size)
+    return sizes
+
+
+def outgoing_revisions(
+    remote: str = "origin", branch: Optional[str] = None
+) -> List[str]:
+    """Get the revision arguments selecting the commits a push would send.
+
+    Args:
+        remote: Remote being pushed to
+        branch: Branch being pushed, defaults to the current branch
+
+    Returns:
+        ``["<remote>/<branch>..HEAD"]``, or every commit not on any remote
+        if the remote branch does not exist yet
+
+    Raises:
+        GitCommandError: If the current branch cannot be determined
+    """
+    branch = branch or GitCommand.run("git rev-parse --abbrev-ref HEAD", cache=True)
+    upstream = f"refs/remotes/{remote}/{branch}"
+    verify = f"git rev-parse --verify --quiet {shlex.quote(upstream)}"
+    if GitCommand.run(verify, check=False):
+        return [f"{upstream}..HEAD"]
+    return ["HEAD", "--not", "--remotes"]
+
+
+def _scan_push(
+    directory: str,
+    matcher: PatternMatcher,
+    progress: Optional[Callable[[ScanProgress], None]],
+    revisions: Optional[List[str]] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Find risky files among the files the outgoing commits add or modify.
+
+    One ``git log --raw`` stream lists every file version the commits
+    carry, so a file added by one commit and deleted by a later one is
+    still found: it is pushed all the same. Merge commits contribute no
+    files of their own; the commits they bring in are walked instead.
+
+    Args:
+        directory: Directory inside the repository; only changes below it
+            are scanned
+        matcher: Compiled risky patterns
+        progress: Optional progress callback, called once at the end
+        revisions: Revision arguments selecting the commits, defaults to
+            :func:`outgoing_revisions`
+
+    Returns:
+        Tuple of (matches, number of distinct files changed)
+
+    Raises:
+        GitCommandError: If the history cannot be read
+    """
+    start = time.monotonic()
+    revisions = revisions or outgoing_revisions()
+    log = ["git", "-C", directory, "log", "--raw", "-z", "--no-renames"]
+    log += ["--no-abbrev", "--relative", "--format=%H", *revisions, "--"]
+    # Newest pushed version of each path as (commit, blob id, deleted at
+    # HEAD); the log runs newest first, so a path's first entry is its
+    # state at HEAD and later entries are older versions
+    versions: Dict[str, Tuple[str, str, bool]] = {}
+    deleted = set()
+    commit = raw = None
+    for record in GitCommand.stream(log, "\0"):
+        if raw is not None:
+            # Raw entries are ":<modes> <old blob> <new blob> <status>", path
+            _, _, _, oid, status = raw.split(" ")
+            raw = None
+            if record in versions:
+                continue
+            if status == "D":
+                deleted.add(record)
+            elif status in PUSHED_STATUSES:
+                versions[record] = (commit, oid, record in deleted)
+            continue
+        record = record.lstrip("\n")
+        if record.startswith(":"):
+            raw = record
+        elif record:
+            commit = record
+
+    candidates = []
+    for path, version in versions.items():
+        matches = matcher.match(path)
+        if matches:
+            candidates.append((path, version, matches))
+    sizes = _blob_sizes(directory, {version[1] for _, version, _ in candidates})
+
+    found = []
+    for path, (commit, oid, removed), matches in candidates:
+        for category, pattern in matches:
+            found.append(
+                {
+                    "path": os.path.join(directory, path),
+                    "size": sizes.get(oid, 0),
+                    "pattern": pattern,
+                    "category": category,
+                    "directory": False,
+                    "commit": commit,
+                    "deleted": removed,
+                }
+            )
+
+    changed = len(versions.keys() | deleted)
+    if progress:
+        progress(ScanProgress(changed, 0, 0, time.monotonic() - start))
+    return found, changed
+
+
+def _scan_index(
+    directory: str,
+    matcher: PatternMatcher,
+    progress: Optional[Callable[[ScanProgress], None]],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Find risky files among the files git tracks or would track.
+
+    Candidates come from the index plus untracked files that are not
+    ignored, so ignored trees are never visited. Tracked files take their
+    size from their blob, looked up in one ``git cat-file`` call for the
+    matching files only; only matching untracked files are stat'ed.
+
+    Args:
+        directory: Directory inside the repository to scan
+        matcher: Compiled risky patterns
+        progress: Optional progress callback, called once at the end
+
+    Returns:
+        Tuple of (matches, total files scanned)
+
+    Raises:
+        GitCommandError: If the index cannot be read
+    """
+    start = time.monotonic()
+    git = ["git", "-C", directory]
+    # Path -> blob id, None for untracked files; unmerged paths list one
+    # entry per stage and keep the last
+    blobs: Dict[str, Optional[str]] = {}
+    for record in GitCommand.stream(git + ["ls-files", "-z", "--stage"], "\0"):
+        info, _, path = record.partition("\t")
+        mode, oid, _ = info.split(" ", 2)
+        if mode != SUBMODULE_MODE:
+            blobs[path] = oid
+    others = ["ls-files", "-z", "--others", "--exclude-standard"]
+    for path in GitCommand.stream(git + others, "\0"):
+        blobs[path] = None
+
+    candidates = []
+    for path, oid in blobs.items():
+        matches = matcher.match(path)
+        if matches:
+            candidates.append((path, oid, matches))
+
+    sizes = _blob_sizes(directory, {oid for _, oid, _ in candidates if oid})
+    found = []
+    for path, oid, matches in candidates:
+        filepath = os.path.join(directory, path)
+        if oid is not None:
+            size = sizes.get(oid, 0)
+        else:
             try:
                 size = os.path.getsize(filepath)
-                for category, patterns in risky_patterns.items():
-                    for pattern in patterns:
-                        if fnmatch.fnmatch(filepath, pattern):
-                            results[category].append(
-                                {"path": filepath, "size": size, "pattern": pattern}
-                            )
-                            break
             except OSError:
                 continue
+        for category, pattern in matches:
+            found.append(
+                {
+                    "path": filepath,
+                    "size": size,
+                    "pattern": pattern,
+                    "category": category,
+                    "directory": False,
+                }
+            )
 
-    for root, dirs, files in os.walk(directory):
-        # Skip .git directory
-        if ".git" in dirs:
-            dirs.remove(".git")
+    if progress:
+        progress(ScanProgress(len(blobs), 0, 0, time.monotonic() - start))
+    return found, len(blobs)
 
-        for file in files:
-            filepath = os.path.join(root, file)
-            batch.append(filepath)
-            file_count += 1
 
-            if len(batch) >= batch_size:
-                process_batch(batch)
-                batch = []
+def detect_risky_files(
+    directory: str = ".",
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    source: str = "filesystem",
+    cache: Optional[ScanCache] = None,
+    revisions: Optional[List[str]] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+    """Scan directory for potentially risky files.
 
-    # Process remaining files
-    if batch:
-        process_batch(batch)
+    Args:
+        directory: Directory to scan
+        workers: Number of threads listing directories for the
+            "filesystem" source, defaults to the ``ThreadPoolExecutor``
+            default
+        progress: Optional callback receiving a ScanProgress about ten
+            times a second and once at the end
+        source: One of ``SCAN_SOURCES``: "filesystem" walks the working
+            tree, skipping the contents of risky directories; "index" scans
+            what git tracks plus untracked files that are not ignored;
+            "push" scans the files the outgoing commits add or modify
+        cache: Optional ScanCache letting the "filesystem" source skip
+            directories that have not changed since the last scan
+        revisions: Revision arguments selecting the commits for the "push"
+            source, defaults to :func:`outgoing_revisions`
+
+    Returns:
+        Tuple of (scan results by category, total files scanned)
+
+    Raises:
+        ValueError: If the source is unknown
+        GitCommandError: If the "index" or "push" source cannot read the
+            repository
+    """
+    matcher = risky_matcher()
+    if source == "filesystem":
+        found, file_count = _scan_filesystem(
+            directory, matcher, workers, progress, cache
+        )
+    elif source == "index":
+        found, file_count = _scan_index(directory, matcher, progress)
+    elif source == "push":
+        found, file_count = _scan_push(directory, matcher, progress, revisions)
+    else:
+        raise ValueError(f"Unknown scan source: {source}")
 
+    results = {category: [] for category in RISKY_PATTERNS}
+    for match in found:
+        results[match["category"]].append(match)
+    # Threads finish in any order; keep reports stable between runs
+    for matches in results.values():
+        matches.sort(key=lambda match: match["path"])
     return results, file_count
 
 
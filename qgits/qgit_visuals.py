@@ -82,6 +82,8 @@ from qgits.qgit_core import (
     get_staged_files,
     is_git_repo,
 )
+from qgits.qgit_errors import GitCommandError, GitTimeoutError
+from qgits.qgit_git import GitCommand
 
 
 # Configure logging
@@ -915,6 +917,8 @@ class GitVisualizer:
         """Refresh Git status information asynchronously."""
         logging.info("Refreshing Git repository status")
         try:
+            # Take one fresh status snapshot; the helpers below are views over it
+            GitCommand.get_repo_status(refresh=True)
             self.staged_files = set(get_staged_files())
             self.modified_files = set(get_modified_files())
             self.current_branch = get_current_branch()
@@ -1140,55 +1144,49 @@ class GitVisualizer:
 
             # Use a more efficient Git command that combines all needed info
             try:
-                process = await asyncio.create_subprocess_exec(
-                    "git",
-                    "log",
-                    "--follow",
-                    "--max-count=3",  # Reduced from 5 to 3
-                    "--format=%H%x00%an%x00%at%x00%s",
-                    "--",
-                    rel_path,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
+                output = await GitCommand.arun(
+                    [
+                        "git",
+                        "log",
+                        "--follow",
+                        "--max-count=3",  # Reduced from 5 to 3
+                        "--format=%H%x00%an%x00%at%x00%s",
+                        "--",
+                        rel_path,
+                    ],
+                    timeout=2.0,
                     cwd=self.repo_path,
                 )
-
-                try:
-                    stdout, _ = await asyncio.wait_for(
-                        process.communicate(), timeout=0.2
-                    )  # Reduced timeout
-                    if process.returncode == 0:
-                        commits = []
-                        contributors = set()
-                        for line in stdout.decode().strip().split("\n"):
-                            if line:
-                                hash_, author, timestamp, msg = line.split("\0")
-                                commits.append((hash_, author, float(timestamp), msg))
-                                contributors.add(author)
-
-                        if commits:
-                            # Update cache with processed data
-                            cache_data = {
-                                "commit_count": len(commits),
-                                "last_modified": commits[0][2],
-                                "last_commit_message": commits[0][3],
-                                "contributors": contributors,
-                            }
-                            self._git_history_cache[rel_path] = cache_data
-
-                            # Update node directly from processed data
-                            node.commit_count = len(commits)
-                            node.last_modified = commits[0][2]
-                            node.last_commit_message = commits[0][3]
-                            node.contributors = contributors
-                            node.color = self._get_node_color(node)
-                            return
-
-                except asyncio.TimeoutError:
-                    pass
-
-            except Exception:
-                pass
+                commits = []
+                contributors = set()
+                for line in output.split("\n"):
+                    if line:
+                        hash_, author, timestamp, msg = line.split("\0")
+                        commits.append((hash_, author, float(timestamp), msg))
+                        contributors.add(author)
+
+                if commits:
+                    # Update cache with processed data
+                    cache_data = {
+                        "commit_count": len(commits),
+                        "last_modified": commits[0][2],
+                        "last_commit_message": commits[0][3],
+                        "contributors": contributors,
+                    }
+                    self._git_history_cache[rel_path] = cache_data
+
+                    # Update node directly from processed data
+                    node.commit_count = len(commits)
+                    node.last_modified = commits[0][2]
+                    node.last_commit_message = commits[0][3]
+                    node.contributors = contributors
+                    node.color = self._get_node_color(node)
+                    return
+
+            except GitTimeoutError:
+                logging.warning(f"Timed out reading Git history for {rel_path}")
+            except GitCommandError as e:
+                logging.debug(f"Could not read Git history for {rel_path}: {e}")
 
             # Default color for files without history
             node.color = np.array([0.5, 0.5, 0.5, 1.0])
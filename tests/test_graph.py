@@ -0,0 +1,121 @@
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+from qgits.qgit_git import GitCommand
+from qgits.qgit_graph import CommitGraph, Reachability
+from qgits.qgit_objects import ObjectStore
+
+
+class TestReachability:
+    @pytest.fixture
+    def git_repo(self):
+        """Create a repository with branches, merges and remote-tracking refs."""
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            subprocess.run(["git", "init", "-q", "-b", "main"], check=True)
+            subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+            subprocess.run(
+                ["git", "config", "user.email", "test@example.com"], check=True
+            )
+            subprocess.run(["git", "config", "gc.auto", "0"], check=True)
+            self.grow("main", "feature", "hotfix")
+
+            yield tmp_dir
+
+            GitCommand.close_object_sessions()
+            os.chdir(old_cwd)
+
+    @staticmethod
+    def commit(message):
+        """Make an empty commit on the current branch."""
+        subprocess.run(
+            ["git", "commit", "-q", "--allow-empty", "-m", message], check=True
+        )
+
+    def grow(self, main, *branches):
+        """Add side branches and a merge, publish them, then commit on top."""
+        head = subprocess.run(
+            ["git", "rev-parse", "-q", "--verify", "HEAD"], stdout=subprocess.DEVNULL
+        )
+        if head.returncode:
+            self.commit("root")
+        subprocess.run(["git", "checkout", "-q", main], check=True)
+        for branch in branches:
+            subprocess.run(["git", "checkout", "-q", "-B", branch, main], check=True)
+            for i in range(3):
+                self.commit(f"{branch} {i}")
+            subprocess.run(["git", "checkout", "-q", main], check=True)
+            self.commit(f"{main} after {branch}")
+        subprocess.run(
+            ["git", "merge", "-q", "--no-ff", "-m", "merge", branches[0]], check=True
+        )
+        for branch in (main, *branches):
+            subprocess.run(
+                ["git", "update-ref", f"refs/remotes/origin/{branch}", branch],
+                check=True,
+            )
+        # Contained in no remote-tracking branch
+        self.commit(f"{main} unpublished")
+
+    @staticmethod
+    def remote_refs():
+        """Get remote-tracking branches and their tips."""
+        output = subprocess.check_output(
+            ["git", "for-each-ref", "--format=%(refname:short) %(objectname)"]
+            + ["refs/remotes"],
+            text=True,
+        )
+        return dict(line.split() for line in output.splitlines())
+
+    def assert_matches_git(self):
+        """Check containing() for every commit against git branch -r --contains."""
+        output = subprocess.check_output(["git", "rev-list", "--all"], text=True)
+        commits = output.split()
+        result = Reachability.containing(commits, self.remote_refs())
+        for commit in commits:
+            expected = subprocess.check_output(
+                ["git", "branch", "-r", "--format=%(refname:short)"]
+                + ["--contains", commit],
+                text=True,
+            ).split()
+            assert sorted(result[commit]) == sorted(expected), commit
+
+    def test_without_commit_graph(self, git_repo):
+        """Test containment computed with rev-list."""
+        with ObjectStore.open() as store:
+            assert CommitGraph.open(store) is None
+        self.assert_matches_git()
+
+    def test_commit_graph_with_newer_commits(self, git_repo, monkeypatch):
+        """Test the commit-graph walk, including commits not yet in the graph."""
+        subprocess.run(["git", "commit-graph", "write", "--reachable"], check=True)
+        self.grow("feature", "topic", "release")
+        self.grow("main", "late")
+
+        def unavailable(*args):
+            raise AssertionError("fell back to rev-list")
+
+        monkeypatch.setattr(Reachability, "_walk_rev_list", unavailable)
+        self.assert_matches_git()
+
+    def test_split_commit_graph(self, git_repo, monkeypatch):
+        """Test a split commit-graph chain followed by ungraphed commits."""
+        subprocess.run(
+            ["git", "commit-graph", "write", "--reachable", "--split"], check=True
+        )
+        self.grow("feature", "topic")
+        subprocess.run(
+            ["git", "commit-graph", "write", "--reachable", "--split=no-merge"],
+            check=True,
+        )
+        self.grow("main", "late")
+
+        def unavailable(*args):
+            raise AssertionError("fell back to rev-list")
+
+        monkeypatch.setattr(Reachability, "_walk_rev_list", unavailable)
+        self.assert_matches_git()
@@ -0,0 +1,126 @@
+import glob
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+from qgits.qgit_objects import ObjectStore
+
+
+class TestObjectStore:
+    @pytest.fixture
+    def git_repo(self):
+        """Create a repository whose history packs into delta chains."""
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            subprocess.run(["git", "init", "-q"], check=True)
+            subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+            subprocess.run(
+                ["git", "config", "user.email", "test@example.com"], check=True
+            )
+
+            lines = [f"line {i} of a file that changes a little\n" for i in range(2000)]
+            for version in range(6):
+                lines[version * 300] = f"changed in version {version}\n"
+                with open("data.txt", "w") as f:
+                    f.writelines(lines)
+                with open("blob.bin", "wb") as f:
+                    f.write(bytes(range(256)) * (version + 1))
+                subprocess.run(["git", "add", "-A"], check=True)
+                subprocess.run(["git", "commit", "-q", "-m", f"v{version}"], check=True)
+            subprocess.run(["git", "tag", "-a", "v1", "-m", "tag"], check=True)
+
+            yield tmp_dir
+
+            os.chdir(old_cwd)
+
+    @staticmethod
+    def expected():
+        """Get every object's type and size from git itself."""
+        output = subprocess.check_output(
+            ["git", "cat-file", "--batch-check", "--batch-all-objects"], text=True
+        )
+        return {
+            oid: (object_type, int(size))
+            for oid, object_type, size in (line.split() for line in output.splitlines())
+        }
+
+    @staticmethod
+    def pack_kinds():
+        """Get the entry kinds of every pack, e.g. "blob" or "delta"."""
+        kinds = set()
+        for index in glob.glob(".git/objects/pack/*.idx"):
+            output = subprocess.check_output(
+                ["git", "verify-pack", "-v", index], text=True
+            )
+            for line in output.splitlines():
+                fields = line.split()
+                if len(fields) >= 5 and len(fields[0]) == 40:
+                    kinds.add("delta" if len(fields) == 7 else fields[1])
+        return kinds
+
+    def assert_matches_git(self):
+        """Check info() and iter_objects() against git cat-file."""
+        expected = self.expected()
+        assert expected
+        with ObjectStore.open() as store:
+            for oid, (object_type, size) in expected.items():
+                info = store.info(oid)
+                assert info is not None, oid
+                assert (info.type, info.size) == (object_type, size), oid
+            found = {info.oid: (info.type, info.size) for info in store.iter_objects()}
+        assert found == expected
+
+    def test_loose_objects(self, git_repo):
+        """Test that loose objects match git before anything is packed."""
+        assert not glob.glob(".git/objects/pack/*.pack")
+        self.assert_matches_git()
+
+    def test_gc_with_loose_objects(self, git_repo):
+        """Test packed objects with offset deltas alongside newer loose ones."""
+        subprocess.run(["git", "gc", "-q"], check=True)
+        assert "delta" in self.pack_kinds()
+        with open("new.txt", "w") as f:
+            f.write("loose after gc")
+        subprocess.run(["git", "add", "-A"], check=True)
+        subprocess.run(["git", "commit", "-q", "-m", "loose"], check=True)
+        self.assert_matches_git()
+
+    def test_ref_deltas(self, git_repo):
+        """Test packs whose deltas name their base by object id."""
+        subprocess.run(
+            ["git", "-c", "repack.useDeltaBaseOffset=false", "repack", "-q", "-adf"],
+            check=True,
+        )
+        assert "delta" in self.pack_kinds()
+        self.assert_matches_git()
+
+    def test_index_v1(self, git_repo):
+        """Test version 1 pack indexes."""
+        subprocess.run(
+            ["git", "-c", "pack.indexVersion=1", "repack", "-q", "-adf"], check=True
+        )
+        index = glob.glob(".git/objects/pack/*.idx")[0]
+        with open(index, "rb") as f:
+            assert f.read(4) != b"\377tOc"
+        self.assert_matches_git()
+
+    def test_large_offset_table(self, git_repo):
+        """Test version 2 indexes storing offsets in the 64-bit table."""
+        subprocess.run(["git", "repack", "-q", "-adf"], check=True)
+        pack = glob.glob(".git/objects/pack/*.pack")[0]
+        index = pack[: -len(".pack")] + ".idx"
+        os.chmod(index, 0o644)
+        os.remove(index)
+        # Offsets above the given limit go to the large offset table
+        subprocess.run(
+            ["git", "index-pack", "--index-version=2,0x40", "-o", index, pack],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        # Header, fan-out, names, CRCs, offsets and trailer, plus the table
+        count = len(self.expected())
+        assert os.path.getsize(index) > 8 + 1024 + count * 28 + 40
+        self.assert_matches_git()
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+from qgits import qgit_shove
+from qgits.qgit_git import GitCommand
+
+
+class TestShoveSecurityCheck:
+    @pytest.fixture
+    def git_repo(self, monkeypatch):
+        """Create a clone of a bare remote and record pushes instead of pushing."""
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            remote = os.path.join(tmp_dir, "remote.git")
+            work = os.path.join(tmp_dir, "work")
+            subprocess.run(["git", "init", "-q", "--bare", remote], check=True)
+            subprocess.run(["git", "clone", "-q", remote, work], check=True)
+            os.chdir(work)
+            subprocess.run(["git", "checkout", "-q", "-b", "main"], check=True)
+            subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+            subprocess.run(
+                ["git", "config", "user.email", "test@example.com"], check=True
+            )
+            self.commit("README.md")
+            subprocess.run(["git", "push", "-q", "origin", "main"], check=True)
+
+            self.pushes = []
+            monkeypatch.setattr(qgit_shove, "verify_branch", lambda: True)
+            monkeypatch.setattr(
+                qgit_shove, "push_to_main", lambda: self.pushes.append(1) or True
+            )
+
+            yield work
+
+            GitCommand.close_object_sessions()
+            os.chdir(old_cwd)
+
+    @staticmethod
+    def commit(path):
+        """Commit a new file."""
+        with open(path, "w") as f:
+            f.write("content")
+        subprocess.run(["git", "add", path], check=True)
+        subprocess.run(["git", "commit", "-q", "-m", f"add {path}"], check=True)
+
+    @staticmethod
+    def answer(monkeypatch, reply):
+        """Answer every prompt with a fixed reply, failing if none is expected."""
+
+        def prompt(message=""):
+            if reply is None:
+                raise AssertionError(f"unexpected prompt: {message}")
+            return reply
+
+        monkeypatch.setattr("builtins.input", prompt)
+
+    def test_clean_push(self, git_repo, monkeypatch):
+        """Test that outgoing commits without flagged files are pushed."""
+        self.answer(monkeypatch, None)
+        self.commit("main.py")
+        assert qgit_shove.execute_shove() is True
+        assert self.pushes
+
+    def test_secret_refused(self, git_repo, monkeypatch):
+        """Test that a possible secret in the outgoing commits blocks the push."""
+        self.answer(monkeypatch, None)
+        self.commit("server.pem")
+        assert qgit_shove.execute_shove() is False
+        assert not self.pushes
+
+    def test_secret_forced(self, git_repo, monkeypatch):
+        """Test that --force pushes a possible secret without prompting."""
+        self.answer(monkeypatch, None)
+        self.commit("server.pem")
+        assert qgit_shove.execute_shove(force=True) is True
+        assert self.pushes
+
+    @pytest.mark.parametrize("reply, pushed", [("y", True), ("", False)])
+    def test_other_categories_confirmed(self, git_repo, monkeypatch, reply, pushed):
+        """Test that large or generated files only need a confirmation."""
+        self.answer(monkeypatch, reply)
+        self.commit("logo.png")
+        self.commit("debug.log")
+        assert qgit_shove.execute_shove() is pushed
+        assert bool(self.pushes) is pushed
@@ -0,0 +1,309 @@
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+import pytest
+
+from qgits import qgit_stats
+from qgits.qgit_git import GitCommand
+from qgits.qgit_stats import (
+    HLL_PRECISION,
+    ChurnAggregator,
+    CommitAggregator,
+    CommitRecord,
+    CommitTable,
+    HyperLogLog,
+    LeaderboardAggregator,
+    RollupCube,
+    StatsStore,
+    TeamAggregator,
+    _hash64,
+    collect_stats,
+    mine_commit_records,
+)
+
+
+def random_hashes(rng, count):
+    """Draw uniformly distributed 64-bit hashes."""
+    return np.frombuffer(rng.bytes(8 * count), dtype=np.uint64)
+
+
+class TestMineCommitRecords:
+    def test_bounded_window(self, monkeypatch):
+        """Test that ranges are mined in order, at most one window ahead."""
+        commits = [f"{i:040x}" for i in range(5000)]
+        mined = []
+
+        def stream(argv, *args, **kwargs):
+            return iter(commits)
+
+        def mine_range(revisions, numstat, pathspec):
+            mined.append(revisions[0])
+            return list(revisions)
+
+        monkeypatch.setattr(qgit_stats.GitCommand, "stream", stream)
+        monkeypatch.setattr(qgit_stats, "_mine_range", mine_range)
+        workers = 3
+        size = -(-len(commits) // (workers * qgit_stats.RANGES_PER_WORKER))
+        seen = []
+        for record in mine_commit_records(workers=workers):
+            seen.append(record)
+            consumed = -(-len(seen) // size)
+            assert len(mined) <= consumed + workers
+        assert seen == commits
+
+        # Stopping early leaves the remaining ranges unmined
+        mined.clear()
+        records = mine_commit_records(workers=workers)
+        next(records)
+        records.close()
+        assert len(mined) <= workers + 1
+
+
+class TestHyperLogLog:
+    # Standard error of the estimate at the default precision, about 1.6%
+    ERROR = 1.04 / np.sqrt(1 << HLL_PRECISION)
+
+    def test_error_bound(self):
+        """Test that 100k distinct paths are counted within the error bound."""
+        sketch = HyperLogLog()
+        sketch.add(_hash64(f"src/module_{i}/file_{i}.py" for i in range(100_000)))
+        assert abs(sketch.count() - 100_000) / 100_000 < 3 * self.ERROR
+
+    def test_error_spread(self):
+        """Test that the error across seeded trials matches the standard error."""
+        rng = np.random.default_rng(17)
+        errors = []
+        for _ in range(20):
+            sketch = HyperLogLog()
+            sketch.add(random_hashes(rng, 100_000))
+            errors.append(sketch.count() / 100_000 - 1)
+        assert np.sqrt(np.mean(np.square(errors))) < 1.5 * self.ERROR
+        assert np.max(np.abs(errors)) < 3 * self.ERROR
+
+    def test_duplicates_ignored(self):
+        """Test that adding the same items again changes nothing."""
+        rng = np.random.default_rng(17)
+        hashes = random_hashes(rng, 100_000)
+        sketch = HyperLogLog()
+        sketch.add(hashes)
+        registers = sketch.registers.copy()
+        sketch.add(hashes[::-1])
+        assert np.array_equal(sketch.registers, registers)
+
+    def test_merge_is_register_max(self):
+        """Test that merging takes the register-wise maximum."""
+        rng = np.random.default_rng(17)
+        hashes = random_hashes(rng, 100_000)
+        first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        first.add(hashes[:60_000])
+        second.add(hashes[40_000:])
+        union.add(hashes)
+
+        expected = np.maximum(first.registers, second.registers)
+        merged = HyperLogLog(registers=first.registers.copy())
+        merged.merge(second)
+        assert np.array_equal(merged.registers, expected)
+        assert np.array_equal(merged.registers, union.registers)
+        second.merge(first)
+        assert np.array_equal(second.registers, expected)
+        assert abs(merged.count() - 100_000) / 100_000 < 3 * self.ERROR
+
+
+class TestRollupSketches:
+    DAY = 86400
+
+    @pytest.fixture
+    def store(self):
+        """Open a stats store in a temporary database."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with StatsStore(os.path.join(tmp_dir, "stats.db")) as store:
+                yield store
+
+    @staticmethod
+    def records(start, count, seed):
+        """Generate commits touching many files across a few days."""
+        rng = np.random.default_rng(seed)
+        authors = [("Ada", "ada@example.com"), ("Linus", "linus@example.com")]
+        records = []
+        for i in range(start, start + count):
+            author, email = authors[i % len(authors)]
+            files = rng.integers(0, 30_000, size=40)
+            records.append(
+                CommitRecord(
+                    f"{i:040x}",
+                    author,
+                    email,
+                    1_700_000_000 + (i % 5) * TestRollupSketches.DAY + i,
+                    f"commit {i}",
+                    [(1, 0, f"dir_{f % 7}/file_{f}.txt") for f in files],
+                )
+            )
+        return records
+
+    @staticmethod
+    def registers(cube):
+        """Expand a cube's sparse sketches to dense registers per (author, day)."""
+        dense = {}
+        for row in cube.sketches:
+            key = (cube.identities[row["identity"]], int(row["day"]))
+            registers = dense.setdefault(key, np.zeros(1 << HLL_PRECISION, np.uint8))
+            registers[row["index"]] = max(registers[row["index"]], row["rank"])
+        return dense
+
+    def assert_same_sketches(self, loaded, expected):
+        """Check that two cubes hold identical sketches and estimates."""
+        loaded_registers = self.registers(loaded)
+        expected_registers = self.registers(expected)
+        assert loaded_registers.keys() == expected_registers.keys()
+        for key, registers in expected_registers.items():
+            assert np.array_equal(loaded_registers[key], registers), key
+        first, last = int(expected.days.min()), int(expected.days.max())
+        for identity in expected.identities:
+            assert loaded.unique_files(
+                np.array([loaded.identities.index(identity)]), first, last
+            ) == expected.unique_files(
+                np.array([expected.identities.index(identity)]), first, last
+            )
+
+    def test_round_trip(self, store):
+        """Test that sparse registers survive storage unchanged."""
+        table = CommitTable.from_records(self.records(0, 1000, 17))
+        cube = RollupCube.from_table(table)
+        with store.conn:
+            store.conn.execute("INSERT INTO tips VALUES (?, ?)", ("main", "tip"))
+            store._save_rollups("main", "tip", cube)
+        loaded = store.rollups("main")
+        assert len(loaded.sketches) == len(cube.sketches)
+        self.assert_same_sketches(loaded, cube)
+
+        # The merged sketch of all days against every file each author touched
+        first, last = int(cube.days.min()), int(cube.days.max())
+        for identity, (author, _) in enumerate(loaded.identities):
+            paths = {
+                path
+                for record in self.records(0, 1000, 17)
+                if record.author == author
+                for _, _, path in record.numstat
+            }
+            estimate = loaded.unique_files(np.array([identity]), first, last)
+            assert abs(estimate - len(paths)) / len(paths) < 3 * TestHyperLogLog.ERROR
+
+    def test_incremental_merge(self, store):
+        """Test that sketches added incrementally merge into the stored ones."""
+        older, newer = self.records(0, 600, 17), self.records(600, 400, 18)
+        with store.conn:
+            store.conn.execute("INSERT INTO tips VALUES (?, ?)", ("main", "tip"))
+            store._save_rollups(
+                "main", "tip", RollupCube.from_table(CommitTable.from_records(older))
+            )
+            store._save_rollups(
+                "main",
+                "tip",
+                RollupCube.from_table(CommitTable.from_records(newer)),
+                replace=False,
+            )
+        expected = RollupCube.from_table(CommitTable.from_records(older + newer))
+        self.assert_same_sketches(store.rollups("main"), expected)
+
+
+class TestStatsStoreSync:
+    @pytest.fixture
+    def git_repo(self):
+        """Create a repository with a few authors over several days."""
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            subprocess.run(["git", "init", "-q"], check=True)
+            subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+            subprocess.run(
+                ["git", "config", "user.email", "test@example.com"], check=True
+            )
+            self.day = 0
+            for i in range(6):
+                self.commit(i)
+
+            yield tmp_dir
+
+            GitCommand.close_object_sessions()
+            os.chdir(old_cwd)
+
+    def commit(self, i, amend=False):
+        """Change a few files as one of three authors on the next day."""
+        for path in (f"src/module_{i % 4}.py", f"docs/page_{i % 3}.md", "README"):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a") as f:
+                f.write(f"change {i}\n" * (i + 1))
+        if i % 5 == 0:
+            # Binary files have numstat rows without line counts
+            with open(f"logo_{i}.bin", "wb") as f:
+                f.write(bytes(range(256)) * (i + 1))
+        self.day += 1
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME=["Ada", "Linus", "Grace"][i % 3],
+            GIT_AUTHOR_EMAIL=f"author{i % 3}@example.com",
+            GIT_AUTHOR_DATE=f"2024-01-{self.day:02d}T12:00:00+0000",
+            GIT_COMMITTER_DATE=f"2024-01-{self.day:02d}T12:00:00+0000",
+        )
+        subprocess.run(["git", "add", "-A"], check=True)
+        command = ["git", "commit", "-q", "-m", f"change {i}"]
+        if amend:
+            command.append("--amend")
+        subprocess.run(command, check=True, env=env)
+
+    @staticmethod
+    def aggregators():
+        """Get fresh aggregators for every cached report."""
+        return {
+            "commit": CommitAggregator(approximate=True),
+            "filtered": CommitAggregator(author="Ada", since=1704412800),
+            "churn": ChurnAggregator(),
+            "team": TeamAggregator(),
+            "leaderboard": LeaderboardAggregator(),
+        }
+
+    def assert_cache_matches(self):
+        """Check that cached reports equal ones computed from a fresh walk."""
+        cached = collect_stats(self.aggregators())
+        uncached = collect_stats(self.aggregators(), use_cache=False)
+        assert cached == uncached
+        with StatsStore() as store:
+            ref, _ = store.current_ref()
+            oids = store.table(ref).oids.astype(str)
+        expected = subprocess.check_output(["git", "rev-list", "HEAD"], text=True)
+        assert sorted(oids) == sorted(expected.split())
+
+    def synced(self):
+        """Sync the current branch and return the number of commits walked."""
+        with StatsStore() as store:
+            return store.sync(*store.current_ref())
+
+    def test_incremental_sync(self, git_repo):
+        """Test that new commits are walked alone and reports stay identical."""
+        assert self.synced() == 6
+        self.assert_cache_matches()
+        for i in range(6, 9):
+            self.commit(i)
+        assert self.synced() == 3
+        self.assert_cache_matches()
+        assert self.synced() == 0
+
+    def test_amend(self, git_repo):
+        """Test that an amended tip replaces the rewritten commit."""
+        self.assert_cache_matches()
+        self.commit(10, amend=True)
+        self.assert_cache_matches()
+        self.commit(11)
+        assert self.synced() == 1
+        self.assert_cache_matches()
+
+    def test_reset_hard(self, git_repo):
+        """Test that commits dropped by a reset disappear from the reports."""
+        self.assert_cache_matches()
+        subprocess.run(["git", "reset", "-q", "--hard", "HEAD~3"], check=True)
+        self.assert_cache_matches()
+        self.commit(12)
+        assert self.synced() == 1
+        self.assert_cache_matches()
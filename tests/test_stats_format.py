@@ -0,0 +1,117 @@
+import io
+
+import pytest
+
+from qgits.qgit_stats_format import pack_msgpack, write_msgpack
+
+
+def packed(value):
+    """Encode a single value."""
+    out = bytearray()
+    pack_msgpack(value, out)
+    return bytes(out)
+
+
+class TestMessagePack:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (0, b"\x00"),
+            (127, b"\x7f"),
+            (128, b"\xcc\x80"),
+            (255, b"\xcc\xff"),
+            (256, b"\xcd\x01\x00"),
+            (65535, b"\xcd\xff\xff"),
+            (65536, b"\xce\x00\x01\x00\x00"),
+            (2**32 - 1, b"\xce\xff\xff\xff\xff"),
+            (2**32, b"\xcf\x00\x00\x00\x01\x00\x00\x00\x00"),
+            (2**64 - 1, b"\xcf" + b"\xff" * 8),
+            (-1, b"\xff"),
+            (-32, b"\xe0"),
+            (-33, b"\xd0\xdf"),
+            (-128, b"\xd0\x80"),
+            (-129, b"\xd1\xff\x7f"),
+            (-32768, b"\xd1\x80\x00"),
+            (-32769, b"\xd2\xff\xff\x7f\xff"),
+            (-(2**31), b"\xd2\x80\x00\x00\x00"),
+            (-(2**31) - 1, b"\xd3\xff\xff\xff\xff\x7f\xff\xff\xff"),
+            (-(2**63), b"\xd3\x80" + b"\x00" * 7),
+        ],
+    )
+    def test_int_boundaries(self, value, expected):
+        """Test that integers use the smallest form at every boundary."""
+        assert packed(value) == expected
+
+    @pytest.mark.parametrize("value", [2**64, -(2**63) - 1])
+    def test_int_overflow(self, value):
+        """Test that integers outside 64 bits are rejected."""
+        with pytest.raises(OverflowError):
+            packed(value)
+
+    @pytest.mark.parametrize(
+        "length, header",
+        [
+            (0, b"\xa0"),
+            (31, b"\xbf"),
+            (32, b"\xd9\x20"),
+            (255, b"\xd9\xff"),
+            (256, b"\xda\x01\x00"),
+            (65535, b"\xda\xff\xff"),
+            (65536, b"\xdb\x00\x01\x00\x00"),
+        ],
+    )
+    def test_str_lengths(self, length, header):
+        """Test fixstr, str8, str16 and str32 headers."""
+        assert packed("a" * length) == header + b"a" * length
+
+    def test_str_length_in_bytes(self):
+        """Test that string lengths count UTF-8 bytes, not characters."""
+        assert packed("é") == b"\xa2\xc3\xa9"
+        assert packed("é" * 16) == b"\xd9\x20" + "é".encode() * 16
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (None, b"\xc0"),
+            (False, b"\xc2"),
+            (True, b"\xc3"),
+            (1.5, b"\xcb\x3f\xf8" + b"\x00" * 6),
+            (-0.0, b"\xcb\x80" + b"\x00" * 7),
+            (0.1, b"\xcb\x3f\xb9\x99\x99\x99\x99\x99\x9a"),
+            (b"", b"\xc4\x00"),
+            (b"\x01" * 256, b"\xc5\x01\x00" + b"\x01" * 256),
+            ([], b"\x90"),
+            ((1, [2]), b"\x92\x01\x91\x02"),
+            ([None] * 16, b"\xdc\x00\x10" + b"\xc0" * 16),
+            ({"a": 1}, b"\x81\xa1a\x01"),
+        ],
+    )
+    def test_other_types(self, value, expected):
+        """Test floats, None, bools, bytes, arrays and maps."""
+        assert packed(value) == expected
+
+    def test_map16(self):
+        """Test that maps with 16 or more keys use the map16 form."""
+        value = {str(i): i for i in range(16)}
+        expected = b"\xde\x00\x10" + b"".join(
+            bytes([0xA0 | len(str(i))]) + str(i).encode() + bytes([i])
+            for i in range(16)
+        )
+        assert packed(value) == expected
+
+    def test_unsupported_type(self):
+        """Test that values without a MessagePack form are rejected."""
+        with pytest.raises(TypeError):
+            packed(object())
+
+    def test_stream_decodes(self):
+        """Test that a written stream decodes with a MessagePack reader."""
+        msgpack = pytest.importorskip("msgpack")
+        records = [
+            {"report": "commit", "type": "summary", "total": 2**40, "ratio": 0.25},
+            {"report": "commit", "type": "author", "name": "Zoë", "active": True},
+        ]
+        stream = io.BytesIO()
+        assert write_msgpack(records, stream) == 2
+        unpacker = msgpack.Unpacker(io.BytesIO(stream.getvalue()), raw=False)
+        assert list(unpacker) == records
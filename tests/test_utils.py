@@ -0,0 +1,320 @@
+import fnmatch
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+import pytest
+
+from qgits import qgit_utils
+from qgits.qgit_utils import (
+    RACY_MTIME_NS,
+    RISKY_PATTERNS,
+    PatternMatcher,
+    ScanCache,
+    _scan_filesystem,
+    detect_risky_files,
+    outgoing_revisions,
+    risky_matcher,
+)
+
+
+class TestPatternMatcher:
+    @pytest.fixture
+    def matcher(self):
+        """Get the compiled risky-file matcher."""
+        return risky_matcher()
+
+    def test_extension_beats_later_name(self, matcher):
+        """Test that "*.env" is reported for .env, as it is listed first."""
+        assert matcher.match(".env") == [("secrets", "*.env")]
+        assert matcher.match("app/.env") == [("secrets", "*.env")]
+        assert matcher.match(".env.local") == [("secrets", ".env.*")]
+
+    def test_priority_across_tables(self):
+        """Test that list order decides between extension, name, dir and regex."""
+        matcher = PatternMatcher({"docs": ["*.txt", "notes.txt", "n*s.txt", "docs/"]})
+        assert matcher.match("notes.txt") == [("docs", "*.txt")]
+        assert matcher.match("docs/notes.txt") == [("docs", "*.txt")]
+
+        matcher = PatternMatcher({"docs": ["docs/", "n*s.txt", "notes.txt", "*.txt"]})
+        assert matcher.match("docs/notes.txt") == [("docs", "docs/")]
+        assert matcher.match("a/notes.txt") == [("docs", "n*s.txt")]
+        assert matcher.match("a/readme.txt") == [("docs", "*.txt")]
+
+    def test_categories_in_order(self):
+        """Test that every matching category is reported, in table order."""
+        matcher = PatternMatcher({"first": ["*.log"], "second": ["debug*"]})
+        assert matcher.match("debug.log") == [
+            ("first", "*.log"),
+            ("second", "debug*"),
+        ]
+        assert matcher.match("trace.log") == [("first", "*.log")]
+
+    def test_directory_at_depth(self, matcher):
+        """Test that directory patterns match contents at any depth."""
+        assert matcher.match("a/b/target/o") == [("development", "target/")]
+        assert matcher.match("a/b/target/c/d") == [("development", "target/")]
+        assert matcher.match_directory("a/b/target") == [("development", "target/")]
+        # A file with a directory pattern's name is not a directory
+        assert matcher.match("a/b/target") == []
+
+    def test_glob_directories(self, matcher):
+        """Test that "*.egg-info/" and "*.dSYM/" match directories only."""
+        assert matcher.match_directory("src/qgit.egg-info") == [
+            ("development", "*.egg-info/")
+        ]
+        assert matcher.match_directory("App.dSYM") == [("development", "*.dSYM/")]
+        assert matcher.match("x/App.dSYM/Contents/Info.plist") == [
+            ("development", "*.dSYM/")
+        ]
+        assert matcher.match("qgit.egg-info") == []
+        assert matcher.match_directory("src/lib") == []
+
+    def test_negated_set(self):
+        """Test "[!x]" sets, which never match the directory separator."""
+        matcher = PatternMatcher({"c": ["file[!0-9].txt", "[!]a]x"]})
+        assert matcher.match("filea.txt") == [("c", "file[!0-9].txt")]
+        assert matcher.match("dir/filea.txt") == [("c", "file[!0-9].txt")]
+        assert matcher.match("file1.txt") == []
+        assert matcher.match("file/.txt") == []
+        assert matcher.match("bx") == [("c", "[!]a]x")]
+        assert matcher.match("]x") == []
+        assert matcher.match("ax") == []
+
+    def test_fnmatch_parity(self, matcher):
+        """Test agreement with fnmatch on the file name for file patterns."""
+        file_patterns = {
+            category: [pattern for pattern in patterns if "/" not in pattern]
+            for category, patterns in RISKY_PATTERNS.items()
+        }
+        pieces = ["a", "config", "secret", "Secret", "token", "auth", "id_rsa"]
+        pieces += [".env", ".json", ".yml", ".tar", ".gz", ".js", ".map", ".key"]
+        pieces += [".pub", ".db", ".lock", ".sublime-", "~", "_", "-", "x"]
+        pieces += ["Cargo", "Thumbs", ".DS_Store", "project"]
+        rng = random.Random(21)
+        names = [
+            pattern.replace("*", "x")
+            for patterns in file_patterns.values()
+            for pattern in patterns
+        ]
+        names += [
+            "".join(rng.choice(pieces) for _ in range(rng.randint(1, 4)))
+            for _ in range(5000)
+        ]
+        for name in names:
+            expected = []
+            for category, patterns in file_patterns.items():
+                for pattern in patterns:
+                    if fnmatch.fnmatchcase(name, pattern):
+                        expected.append((category, pattern))
+                        break
+            assert matcher.match(name) == expected, name
+            assert matcher.match(f"src/lib/{name}") == expected, name
+
+
+class TestScanCache:
+    @pytest.fixture
+    def tree(self):
+        """Create a small working tree and a cache database outside of it."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = os.path.join(tmp_dir, "tree")
+            for path in ["src/app.py", "src/app.log", "docs/notes.md", "logs/x"]:
+                os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+                with open(os.path.join(root, path), "w") as f:
+                    f.write("content")
+            cache = ScanCache(os.path.join(tmp_dir, "scan.db"))
+            yield root, cache
+            cache.close()
+
+    @staticmethod
+    def age(root):
+        """Move every directory's mtime out of the racy window."""
+        old = time.time_ns() - 2 * RACY_MTIME_NS
+        for path, _, _ in os.walk(root):
+            os.utime(path, ns=(old, old))
+
+    @staticmethod
+    def scan(root, cache=None):
+        """Scan a tree and return its matches in a comparable form."""
+        matches, files = _scan_filesystem(root, risky_matcher(), 2, None, cache)
+        return files, sorted(tuple(sorted(match.items())) for match in matches)
+
+    def test_fingerprint_reset(self, tree):
+        """Test that a different pattern fingerprint discards the cache."""
+        root, cache = tree
+        self.age(root)
+        self.scan(root, cache)
+        fingerprint = risky_matcher().fingerprint
+        assert set(cache.load(root, fingerprint)) == {"", "src/", "docs/"}
+        assert cache.load(root, "other") == {}
+        assert cache.load(root, fingerprint) == {}
+
+    def test_removed_directories_pruned(self, tree):
+        """Test that directories gone from the tree are dropped from the cache."""
+        root, cache = tree
+        self.age(root)
+        self.scan(root, cache)
+        shutil.rmtree(os.path.join(root, "docs"))
+        self.scan(root, cache)
+        assert set(cache.load(root, risky_matcher().fingerprint)) == {"", "src/"}
+
+    def test_racy_directories_not_cached(self, tree):
+        """Test that directories modified within the racy window are not cached."""
+        root, cache = tree
+        self.scan(root, cache)
+        assert cache.load(root, risky_matcher().fingerprint) == {}
+        self.age(root)
+        self.scan(root, cache)
+        assert set(cache.load(root, risky_matcher().fingerprint)) == {
+            "",
+            "src/",
+            "docs/",
+        }
+
+    def test_unchanged_directory_only_stats_sizes(self, tree, monkeypatch):
+        """Test that a cached directory is not listed but sizes are current."""
+        root, cache = tree
+        self.age(root)
+        self.scan(root, cache)
+
+        listed = []
+        list_directory = qgit_utils._list_directory
+
+        def counting(path, prefix, matcher):
+            listed.append(prefix)
+            return list_directory(path, prefix, matcher)
+
+        monkeypatch.setattr(qgit_utils, "_list_directory", counting)
+        # Rewriting a file leaves its directory's stat tuple unchanged
+        with open(os.path.join(root, "src", "app.log"), "a") as f:
+            f.write("more content")
+        files, matches = self.scan(root, cache)
+        assert listed == []
+        assert files == 3
+        sizes = {dict(match)["path"]: dict(match)["size"] for match in matches}
+        assert sizes[os.path.join(root, "src", "app.log")] == len("contentmore content")
+
+    def test_cached_matches_uncached(self, tree):
+        """Test that cached scans equal uncached ones as the tree changes."""
+        root, cache = tree
+
+        def add():
+            with open(os.path.join(root, "src", "server.key"), "w") as f:
+                f.write("key")
+
+        def resize():
+            with open(os.path.join(root, "src", "app.log"), "w") as f:
+                f.write("a much longer log file")
+
+        def rmdir():
+            shutil.rmtree(os.path.join(root, "docs"))
+
+        def subtree():
+            os.makedirs(os.path.join(root, "src", "lib", "node_modules", "pkg"))
+            os.makedirs(os.path.join(root, "src", "lib", "deep"))
+            with open(os.path.join(root, "src", "lib", "deep", ".env"), "w") as f:
+                f.write("TOKEN=1")
+
+        self.age(root)
+        assert self.scan(root, cache) == self.scan(root)
+        for change in (add, resize, rmdir, subtree):
+            change()
+            assert self.scan(root, cache) == self.scan(root), change.__name__
+            self.age(root)
+            assert self.scan(root, cache) == self.scan(root), change.__name__
+
+
+class TestPushScan:
+    @pytest.fixture
+    def git_repo(self):
+        """Create a repository cloned from a bare remote with one pushed commit."""
+        old_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            remote = os.path.join(tmp_dir, "remote.git")
+            work = os.path.join(tmp_dir, "work")
+            subprocess.run(["git", "init", "-q", "--bare", remote], check=True)
+            subprocess.run(["git", "clone", "-q", remote, work], check=True)
+            os.chdir(work)
+            subprocess.run(["git", "checkout", "-q", "-b", "main"], check=True)
+            subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+            subprocess.run(
+                ["git", "config", "user.email", "test@example.com"], check=True
+            )
+            self.commit({"README.md": "readme", "pushed.key": "old key"})
+            subprocess.run(["git", "push", "-q", "origin", "main"], check=True)
+
+            yield os.getcwd()
+
+            os.chdir(old_cwd)
+
+    @staticmethod
+    def commit(files, delete=()):
+        """Write and delete files, then commit everything and return the id."""
+        for path, content in files.items():
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+        for path in delete:
+            os.remove(path)
+        subprocess.run(["git", "add", "-A"], check=True)
+        subprocess.run(["git", "commit", "-q", "-m", "change"], check=True)
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+
+    @staticmethod
+    def scan():
+        """Run a push-scoped scan and key its matches by relative path."""
+        results, _ = detect_risky_files(".", source="push")
+        return {
+            os.path.relpath(match["path"]): match
+            for matches in results.values()
+            for match in matches
+        }
+
+    def test_only_outgoing_commits(self, git_repo):
+        """Test that files already on the remote are not reported."""
+        self.commit({"server.pem": "certificate"})
+        assert outgoing_revisions() == ["refs/remotes/origin/main..HEAD"]
+        assert set(self.scan()) == {"server.pem"}
+
+    def test_added_then_deleted(self, git_repo):
+        """Test that a file deleted again before the push is still reported."""
+        added = self.commit({"id_rsa": "private key"})
+        self.commit({}, delete=["id_rsa"])
+        found = self.scan()
+        assert set(found) == {"id_rsa"}
+        assert found["id_rsa"]["deleted"] is True
+        assert found["id_rsa"]["commit"] == added
+        assert found["id_rsa"]["size"] == len("private key")
+
+    def test_no_ff_merge(self, git_repo):
+        """Test that files brought in by a merged branch are reported."""
+        subprocess.run(["git", "checkout", "-q", "-b", "side"], check=True)
+        side = self.commit({"config/.env": "TOKEN=1"})
+        subprocess.run(["git", "checkout", "-q", "main"], check=True)
+        self.commit({"notes.md": "notes"})
+        subprocess.run(
+            ["git", "merge", "-q", "--no-ff", "-m", "merge", "side"], check=True
+        )
+        found = self.scan()
+        assert set(found) == {os.path.join("config", ".env")}
+        assert found[os.path.join("config", ".env")]["commit"] == side
+        assert found[os.path.join("config", ".env")]["deleted"] is False
+
+    def test_paths_with_spaces(self, git_repo):
+        """Test that paths with spaces and quotes are read verbatim."""
+        path = os.path.join("my keys", 'my "old" cert.pem')
+        self.commit({path: "certificate"})
+        found = self.scan()
+        assert set(found) == {path}
+        assert found[path]["size"] == len("certificate")
+
+    def test_fallback_without_remote_branch(self, git_repo):
+        """Test that a branch unknown to the remote scans commits on no remote."""
+        subprocess.run(["git", "checkout", "-q", "-b", "feature"], check=True)
+        self.commit({"feature.key": "new key"})
+        assert outgoing_revisions() == ["HEAD", "--not", "--remotes"]
+        assert set(self.scan()) == {"feature.key"}